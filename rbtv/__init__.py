@@ -1 +1,13 @@
-from .rbtv import API, RBTVAPI, HTTPError, batch_iter, bohne_name_to_id, name_of_season, show_name_to_id  # noqa: F401
+from .bulk import BulkResult  # noqa: F401
+from .names import NameIndex, name_of_season  # noqa: F401
+from .rbtv import API, RBTVAPI, HTTPError, batch_iter, bohne_name_to_id, show_name_to_id  # noqa: F401
+from .seasons import SeasonIndex  # noqa: F401
+
+
+def __getattr__(name: str):
+    # `rbtv.types` is only needed for static type checking, so it's loaded on first access
+    if name == "types":
+        from importlib import import_module
+
+        return import_module(".types", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,1079 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+from time import perf_counter, time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+from urllib.parse import quote
+
+import aiohttp
+from genutility.exceptions import assert_choice
+
+from .bulk import BulkResult
+from .cache import BaseCache, copy_json
+from .fuzzy import NameMatch, TrigramIndex
+from .jsonstream import EpisodeSplitter, ObjectStreamParser, check_stream_event
+from .metrics import Metrics, RequestEvent
+from .names import NameIndex, fill_fuzzy_index
+from .ratelimit import RateLimiter
+from .rbtv import BaseAPI, oauth_required
+from .schedule import day_starts, schedule_windows
+from .searchindex import SearchIndex
+from .seasons import SeasonIndex
+from .store import EntityStore
+from .text import alphastring
+
+if TYPE_CHECKING:
+    from .types import (
+        IRBTVEvent,
+        IRBTVEventTeam,
+        blogPreviewResponse,
+        blogResponse,
+        bohnePortrait,
+        bohneResponse,
+        cmsPageResponse,
+        cmsRouteResponse,
+        entityUserResponse,
+        frontendInitResponse,
+        mediaEpisodeCombinedResponse,
+        mediaEpisodePreviewCombinedResponse,
+        mediaSeasonResponse,
+        mediaShowPreviewMiniResponse,
+        mediaShowPreviewResponse,
+        mediaShowResponse,
+        schedule,
+        searchResultResonse,
+        simpleShopItem,
+        streamCount,
+        subscriptionDefaultResponse,
+        subscriptionListResponse,
+        subscriptionResponse,
+    )
+
+T = TypeVar("T")
+
+
+class AsyncSingleFlight(Generic[T]):
+    """asyncio version of `rbtv.singleflight.SingleFlight`. The call runs in its own task,
+    so cancelling one of the waiting callers doesn't cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Hashable, Tuple["asyncio.Future[T]", List[int]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """See `rbtv.singleflight.SingleFlight.do`."""
+
+        try:
+            task, waiters = self._tasks[key]
+        except KeyError:
+            leader = True
+            task = asyncio.ensure_future(func())
+            waiters = [0]
+            self._tasks[key] = (task, waiters)
+            # runs before the leader resumes, so `waiters` is final when the leader returns
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            leader = False
+            waiters[0] += 1
+
+        result = await asyncio.shield(task)
+        return result, not leader or waiters[0] > 0
+
+
+class AsyncAPI(BaseAPI):
+    """asyncio version of `rbtv.API`. Single-item endpoints are coroutines,
+    paged endpoints are async generators.
+    Error responses which are not retried raise `aiohttp.ClientResponseError` (with the status code in `status`)
+    where `rbtv.API` raises `rbtv.HTTPError`.
+    """
+
+    def __init__(
+        self,
+        timeout: int = 60,
+        scheme: str = "https",
+        pool_maxsize: int = 100,
+        keep_alive: bool = True,
+        max_concurrency: int = 100,
+        page_workers: int = 1,
+        stream: bool = False,
+        cache: Optional[BaseCache] = None,
+        cache_size: int = 1024,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 300,
+        decoder: str = "auto",
+        records: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        metrics: Optional[Metrics] = None,
+        store: Optional[EntityStore] = None,
+    ) -> None:
+        """`pool_maxsize` is the maximum number of open connections,
+        `max_concurrency` the maximum number of requests in flight at the same time.
+        Requests above these limits wait for a free slot.
+        The underlying session is created on first use, so the client can be
+        instantiated outside of a running event loop.
+        `page_workers` is the default number of pages of paginated endpoints which are requested
+        concurrently. It can be overridden per call using the `workers` argument.
+        If `stream` is true, the items of paginated endpoints are parsed incrementally
+        while the response is received. Paged episode endpoints then yield one page per episode.
+        See `rbtv.rbtv.BaseAPI` for the cache, decoder, records, rate limiting, retry, metrics and store arguments.
+        Concurrent identical GET requests are coalesced into a single HTTP request.
+        """
+
+        super().__init__(
+            timeout,
+            scheme,
+            cache,
+            cache_size,
+            ttls,
+            default_ttl,
+            decoder,
+            records,
+            rate_limiter,
+            retries,
+            backoff,
+            max_backoff,
+            metrics,
+            store,
+        )
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.max_concurrency = max_concurrency
+        self.page_workers = page_workers
+        self.stream = stream
+        self.stream_chunk_size = 64 * 1024
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._flights: AsyncSingleFlight[Dict[str, Any]] = AsyncSingleFlight()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_maxsize, limit_per_host=self.pool_maxsize, force_close=not self.keep_alive
+            )
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def close(self) -> None:
+        """Closes all pooled connections."""
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self.cache.close()
+
+    async def __aenter__(self) -> "AsyncAPI":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def _request(self, path: str, refresh: bool = False, **params: Any) -> Dict[str, Any]:
+        """Sends a GET request to `path`, unless it can be answered from the response cache or the entity store.
+        If `refresh` is true, the request is sent even then (conditionally, if a cached response exists)
+        and its response replaces the cached one.
+        """
+
+        url = self._url(path, params)
+        event = self._start_event("GET", path, url)
+
+        try:
+            if not refresh:
+                res, entry = self._cache_get(url)
+                if res is not None:
+                    event.cache = "hit"
+                    return res
+
+                res = self._store_serve(path, params)
+                if res is not None:
+                    event.cache = "store"
+                    return res
+
+            async def fetch() -> Dict[str, Any]:
+                event.cache = "miss"
+                return await self._fetch(url, path, event, refresh)
+
+            # concurrent requests for the same url wait for the first one instead of sending their own.
+            # `fetch` only runs for the first one, the others are reported as "coalesced".
+            # refreshing requests don't join normal ones, which might be answered from the cache
+            event.cache = "coalesced"
+            res, shared = await self._flights.do((url, refresh), fetch)
+            if shared:
+                # every caller of a shared result gets its own copy, including the one which fetched it
+                return copy_json(res)
+            return res
+        except Exception as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            self._finish_event(event)
+
+    async def _fetch(self, url: str, path: str, event: RequestEvent, refresh: bool = False) -> Dict[str, Any]:
+        if refresh:
+            entry = self.cache.get(url)
+        else:
+            res, entry = self._cache_get(url)
+            if res is not None:
+                event.cache = "hit"
+                return res
+
+        headers = entry.conditional_headers() if entry is not None else None
+        async with self._get(url, event, headers=headers) as r:
+            if r.status == 304 and entry is not None:
+                event.cache = "revalidated"
+                res = self._cache_revalidated(url, path, entry)
+                self._store_ingest(path, res)
+                return res
+            data = await r.read()
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+
+        event.bytes = len(data)
+        res = self._loads(data)
+        self._cache_set(url, path, res, etag, last_modified)
+        self._store_ingest(path, res)
+        return res
+
+    @asynccontextmanager
+    async def _get(self, url: str, event: RequestEvent, **kwargs: Any) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Sends a GET request, waiting for the rate limiter and retrying throttled or failed requests.
+        Raises for error responses which are not retried.
+        """
+
+        session = self._get_session()
+        assert self._semaphore is not None
+
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            async with self._semaphore:
+                logging.debug("GET %s", url)
+                async with session.get(url, **kwargs) as r:
+                    event.status = r.status
+                    delay = self._retry_delay(event.retries, r.status, r.headers)
+                    if delay is None:
+                        r.raise_for_status()
+                        yield r
+                        return
+            logging.warning("GET %s failed with status %d, retrying in %.1f seconds", url, r.status, delay)
+            await asyncio.sleep(delay)
+            event.retries += 1
+
+    async def _patch_request(self, path: str, body: Dict[str, Any]) -> Any:
+        url = self._url(path)
+        event = self._start_event("PATCH", path, url)
+        event.cache = "bypass"
+        session = self._get_session()
+        assert self._semaphore is not None
+
+        try:
+            async with self._semaphore:
+                logging.debug("PATCH %s", url)
+                async with session.patch(url, json=body) as r:
+                    event.status = r.status
+                    r.raise_for_status()
+                    data = await r.read()
+            event.bytes = len(data)
+            res = self._loads(data)
+        except Exception as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            self._finish_event(event)
+
+        assert res["success"]
+        return res["data"]
+
+    async def _pages_serial(
+        self, path: str, limit: int, params: Dict[str, Any], refresh: bool = False
+    ) -> AsyncIterator[Any]:
+        offset = 0
+        total = limit
+
+        while offset < total:
+            res = await self._request(path, refresh=refresh, offset=offset, limit=limit, **params)
+            total = res["pagination"]["total"]
+            assert res["success"]
+            yield res["data"]
+            offset += limit
+
+    async def _events_streamed(
+        self, path: str, limit: int, params: Dict[str, Any], stream_key: str
+    ) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        """See `rbtv.API._events_streamed`."""
+
+        offset = 0
+        total = limit
+
+        while offset < total:
+            url = self._url(path, {**params, "offset": offset, "limit": limit})
+            parser = ObjectStreamParser(stream_key)
+            event = self._start_event("GET", path, url)
+            event.cache = "stream"
+            success = False
+
+            try:
+                async with self._get(url, event) as r:
+                    event.latency = perf_counter() - event.start
+                    final = False
+                    while not final:
+                        chunk = await r.content.read(self.stream_chunk_size)
+                        event.bytes += len(chunk)
+                        final = not chunk
+                        for key, value in parser.feed(chunk, final):
+                            if key == "pagination":
+                                total = value["total"]
+                            elif key == "success":
+                                success = value
+                            else:
+                                check_stream_event(key, stream_key, path)
+                                yield key, value
+            except Exception as e:
+                event.error = type(e).__name__
+                raise
+            finally:
+                self._finish_event(event)
+
+            assert success
+            yield "", None
+            offset += limit
+
+    async def _items_streamed(self, path: str, limit: int, params: Dict[str, Any]) -> AsyncIterator[Any]:
+        """See `rbtv.API._items_streamed`."""
+
+        async for key, value in self._events_streamed(path, limit, params, "data"):
+            if key is None:
+                self._store_ingest(path, {"data": [value]})
+                yield value
+
+    async def _episodes_streamed(self, path: str, limit: int, params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """See `rbtv.API._episodes_streamed`."""
+
+        splitter = EpisodeSplitter()
+        async for key, value in self._events_streamed(path, limit, params, "data.episodes"):
+            for page in splitter.end_page() if key == "" else splitter.feed(key, value):
+                self._store_ingest(path, {"data": page})
+                yield page
+
+    async def _pages_parallel(
+        self, path: str, limit: int, workers: int, params: Dict[str, Any], refresh: bool = False
+    ) -> AsyncIterator[Any]:
+        res = await self._request(path, refresh=refresh, offset=0, limit=limit, **params)
+        total = res["pagination"]["total"]
+        assert res["success"]
+        yield res["data"]
+
+        offsets = iter(range(limit, total, limit))
+        pending: Deque[asyncio.Task] = deque()
+
+        def submit(n: int) -> None:
+            for offset in islice(offsets, n):
+                pending.append(
+                    asyncio.ensure_future(self._request(path, refresh=refresh, offset=offset, limit=limit, **params))
+                )
+
+        try:
+            submit(workers)
+            while pending:
+                res = await pending.popleft()
+                assert res["success"]
+                submit(1)
+                yield res["data"]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _request_paged(
+        self,
+        path: str,
+        limit: int,
+        flat: bool = True,
+        workers: Optional[int] = None,
+        stream: Optional[bool] = None,
+        record: Optional[str] = None,
+        refresh: bool = False,
+        **params: Any,
+    ) -> AsyncIterator[Any]:
+        convert = self._record_converter(record)
+
+        if self.stream if stream is None else stream:
+            items = self._items_streamed(path, limit, params) if flat else self._episodes_streamed(path, limit, params)
+            async for item in items:
+                yield convert(item)
+            return
+
+        workers = workers or self.page_workers
+        if workers > 1:
+            pages = self._pages_parallel(path, limit, workers, params, refresh)
+        else:
+            pages = self._pages_serial(path, limit, params, refresh)
+
+        async for data in pages:
+            if flat:
+                for item in data:
+                    yield convert(item)
+            else:
+                yield convert(data)
+
+    async def _request_single(self, path: str, record: Optional[str] = None, **params: Any) -> Any:
+        res = await self._request(path, **params)
+        assert res["success"]
+        return self._record_converter(record)(res["data"])
+
+    async def _bulk_result(self, path: str, _id: int, record: Optional[str]) -> BulkResult:
+        try:
+            return BulkResult(_id, await self._request_single(path.format(_id), record))
+        except Exception as e:
+            return BulkResult(_id, None, e)
+
+    async def _request_bulk(
+        self, path: str, ids: Iterable[int], workers: int, ordered: bool, record: Optional[str] = None
+    ) -> AsyncIterator[BulkResult]:
+        """See `rbtv.API._request_bulk`."""
+
+        it = iter(ids)
+        seen: Set[int] = set()
+        pending: Deque[Tuple[asyncio.Future, bool]] = deque()  # (future, sent to the server)
+        in_flight = 0
+
+        try:
+            while True:
+                for _id in it if in_flight < workers else ():
+                    if _id in seen:
+                        continue
+                    seen.add(_id)
+
+                    if self._cached(path.format(_id)):
+                        res = await self._bulk_result(path, _id, record)
+                        if ordered and pending:
+                            future = asyncio.get_running_loop().create_future()
+                            future.set_result(res)
+                            pending.append((future, False))
+                        else:
+                            yield res
+                    else:
+                        pending.append((asyncio.ensure_future(self._bulk_result(path, _id, record)), True))
+                        in_flight += 1
+                        if in_flight >= workers:
+                            break
+
+                if not pending:
+                    break
+
+                if ordered:
+                    future, network = pending.popleft()
+                else:
+                    await asyncio.wait([f for f, _ in pending], return_when=asyncio.FIRST_COMPLETED)
+                    future, network = next(item for item in pending if item[0].done())
+                    pending.remove((future, network))
+
+                if network:
+                    in_flight -= 1
+                yield await future
+        finally:
+            for future, _ in pending:
+                future.cancel()
+
+    # Blog
+
+    def get_blog_posts(self) -> AsyncIterator[blogResponse]:
+        """Returns all blog posts for the given pagination parameters."""
+
+        return self._request_paged("/v1/blog/all", 50, True)
+
+    def get_blog_posts_preview(self) -> AsyncIterator[blogPreviewResponse]:
+        """Returns all blog posts."""
+
+        return self._request_paged("/v1/blog/preview/all", 50, True)
+
+    async def get_blog_post(self, blogpost_id: int) -> blogResponse:
+        """Returns a single blog post."""
+
+        return await self._request_single(f"/v1/blog/{blogpost_id}")
+
+    async def get_blog_post_preview(self, blogpost_id: int) -> blogPreviewResponse:
+        return await self._request_single(f"/v1/blog/preview/{blogpost_id}")
+
+    # Bohne
+
+    async def get_bohnen_portraits(self) -> List[bohnePortrait]:
+        """Returns reduced information about all team members."""
+
+        return await self._request_single("/v1/bohne/portrait/all")
+
+    async def get_bohne(self, mgmtid: int) -> bohneResponse:
+        """Returns information about a single team member."""
+
+        return await self._request_single(f"/v1/bohne/{mgmtid}")
+
+    def get_bohnen(self, mgmtids: Iterable[int], workers: int = 8, ordered: bool = True) -> AsyncIterator[BulkResult]:
+        """Returns information about the given team members. See `rbtv.API.get_episodes`."""
+
+        return self._request_bulk("/v1/bohne/{}", mgmtids, workers, ordered)
+
+    async def get_bohne_portrait(self, mgmtid: int) -> bohnePortrait:
+        """Returns reduced information about a given team member."""
+
+        return await self._request_single(f"/v1/bohne/portrait/{mgmtid}")
+
+    # CMS
+
+    async def get_cms_routes(self) -> List[cmsRouteResponse]:
+        """Returns all CMS routes (frontend paths which are connected to CMS pages)."""
+
+        return await self._request_single("/v1/cms/route/all")
+
+    async def get_cms_page(self, cms_id: int) -> cmsPageResponse:
+        """Returns the given CMS page."""
+
+        return await self._request_single(f"/v1/cms/{cms_id}")
+
+    # Frontend
+
+    async def get_frontend_init_info(self) -> frontendInitResponse:
+        """Returns necessary information for frontend initialization,
+        such as current stream details, cms routes etc.
+        """
+
+        return await self._request_single("/v1/frontend/init")
+
+    # Mediathek Episode
+
+    def get_episodes_by_bohne(
+        self, bohne_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> AsyncIterator[mediaEpisodeCombinedResponse]:
+        """Returns information about all episodes for the given Bohne."""
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return self._request_paged(
+            f"/v1/media/episode/bybohne/{bohne_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodeCombinedResponse",
+        )
+
+    async def get_episode(self, episode_id: int) -> mediaEpisodeCombinedResponse:
+        """Returns information about a single episode."""
+
+        return await self._request_single(f"/v1/media/episode/{episode_id}", record="mediaEpisodeCombinedResponse")
+
+    def get_episodes(
+        self, episode_ids: Iterable[int], workers: int = 8, ordered: bool = True
+    ) -> AsyncIterator[BulkResult]:
+        """Returns information about the given episodes. See `rbtv.API.get_episodes`."""
+
+        return self._request_bulk(
+            "/v1/media/episode/{}", episode_ids, workers, ordered, record="mediaEpisodeCombinedResponse"
+        )
+
+    def get_episodes_by_season(
+        self, season_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> AsyncIterator[mediaEpisodeCombinedResponse]:
+        """Returns information about all episodes of a given season."""
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return self._request_paged(
+            f"/v1/media/episode/byseason/{season_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodeCombinedResponse",
+        )
+
+    def get_episodes_by_show(
+        self, show_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> AsyncIterator[mediaEpisodeCombinedResponse]:
+        """Returns information about all episodes for the given show."""
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return self._request_paged(
+            f"/v1/media/episode/byshow/{show_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodeCombinedResponse",
+        )
+
+    def get_newest_episodes_preview(
+        self, order: str = "ASC", workers: Optional[int] = None, refresh: bool = False
+    ) -> AsyncIterator[mediaEpisodePreviewCombinedResponse]:
+        """See `rbtv.API.get_newest_episodes_preview`."""
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return self._request_paged(
+            "/v1/media/episode/preview/newest",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+            refresh=refresh,
+        )
+
+    @oauth_required()
+    def get_abobox_content_for_self(self) -> AsyncIterator[mediaEpisodePreviewCombinedResponse]:
+        """Returns all episodes from subscribed shows and bohnen for the authorised user."""
+
+        return self._request_paged("/v1/media/abobox/self", 50, False)
+
+    def get_unsorted_episodes_by_show(
+        self, show_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> AsyncIterator[mediaEpisodePreviewCombinedResponse]:
+        """Returns reduced information about all episodes of a given season."""
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return self._request_paged(
+            f"/v1/media/episode/byshow/unsorted/{show_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+        )
+
+    async def get_episodes_by_bohne_preview(
+        self, bohne_id: int, order: str = "ASC"
+    ) -> mediaEpisodePreviewCombinedResponse:
+        """Returns reduced information about all episodes for the given Bohne."""
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return await self._request_single(
+            f"/v1/media/episode/bybohne/preview/{bohne_id}", record="mediaEpisodePreviewCombinedResponse"
+        )
+
+    async def get_episode_preview(self, episode_id: int) -> mediaEpisodePreviewCombinedResponse:
+        """Returns reduced information about a single episode."""
+
+        return await self._request_single(
+            f"/v1/media/episode/preview/{episode_id}", record="mediaEpisodePreviewCombinedResponse"
+        )
+
+    def get_episodes_by_season_preview(
+        self, season_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> AsyncIterator[mediaEpisodePreviewCombinedResponse]:
+        """Returns reduced information about all episodes of a given season."""
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return self._request_paged(
+            f"/v1/media/episode/byseason/preview/{season_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+        )
+
+    def get_episodes_by_show_preview(
+        self, show_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> AsyncIterator[mediaEpisodePreviewCombinedResponse]:
+        """Returns reduced information about all episodes for the given show."""
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return self._request_paged(
+            f"/v1/media/episode/byshow/preview/{show_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+        )
+
+    def get_unsorted_episodes_by_show_preview(
+        self, show_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> AsyncIterator[mediaEpisodePreviewCombinedResponse]:
+        """Returns reduced information about all unsorted (no season set)
+        episodes for the given show.
+        """
+
+        assert_choice("order", order, {"ASC", "DESC"})
+        return self._request_paged(
+            f"/v1/media/episode/byshow/unsorted/preview/{show_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+        )
+
+    # Mediathek Show
+
+    def get_shows(
+        self, sortby: str = "LastEpisode", only: Optional[str] = None, workers: Optional[int] = None
+    ) -> AsyncIterator[mediaShowResponse]:
+        assert_choice("sortby", sortby, {"LastEpisode"})
+        assert_choice("only", only, {None, "podcast"})
+        return self._request_paged(
+            "/v1/media/show/all", 50, sortby=sortby, only=only, workers=workers, record="mediaShowResponse"
+        )
+
+    async def get_show(self, show_id: int) -> mediaShowResponse:
+        """Returns information about the given show."""
+
+        return await self._request_single(f"/v1/media/show/{show_id}", record="mediaShowResponse")
+
+    def get_shows_by_id(
+        self, show_ids: Iterable[int], workers: int = 8, ordered: bool = True
+    ) -> AsyncIterator[BulkResult]:
+        """Returns information about the given shows. See `rbtv.API.get_episodes`."""
+
+        return self._request_bulk("/v1/media/show/{}", show_ids, workers, ordered, record="mediaShowResponse")
+
+    async def get_featured_shows_preview(self) -> List[mediaShowPreviewResponse]:
+        return await self._request_single("/v1/media/show/preview/featured", record="mediaShowPreviewResponse")
+
+    def get_shows_preview(
+        self, sortby: str = "LastEpisode", only: Optional[str] = None, workers: Optional[int] = None
+    ) -> AsyncIterator[mediaShowPreviewResponse]:
+        """Returns paginated, reduced information about all shows."""
+
+        assert_choice("sortby", sortby, {"LastEpisode"})
+        assert_choice("only", only, {None, "podcast"})
+        return self._request_paged(
+            "/v1/media/show/preview/all",
+            50,
+            sortby=sortby,
+            only=only,
+            workers=workers,
+            record="mediaShowPreviewResponse",
+        )
+
+    async def get_show_preview(self, show_id: int) -> mediaShowPreviewResponse:
+        """Returns reduced information about the given show."""
+
+        return await self._request_single(f"/v1/media/show/preview/{show_id}", record="mediaShowPreviewResponse")
+
+    async def get_shows_mini(
+        self, sortby: str = "LastEpisode", only: Optional[str] = None
+    ) -> List[mediaShowPreviewMiniResponse]:
+        """Returns minimal information about all shows."""
+
+        assert_choice("sortby", sortby, {"LastEpisode"})
+        assert_choice("only", only, {None, "podcast"})
+        return await self._request_single(
+            "/v1/media/show/preview/mini/all", sortby=sortby, only=only, record="mediaShowPreviewMiniResponse"
+        )
+
+    # Event
+
+    async def get_current_event(self) -> Optional[IRBTVEvent]:  # bad docs
+        """Returns Information about the current active RBTV Event."""
+
+        return await self._request_single("/v1/rbtvevent/active")
+
+    async def get_current_event_team(self, team_id: int) -> IRBTVEventTeam:
+        """Returns RBTV Event Team Information, restricted to active Events."""
+
+        return await self._request_single(f"/v1/rbtvevent/team/{team_id}")
+
+    @oauth_required("user.rbtvevent.read")
+    async def get_current_event_joined_team(self, event_id: int) -> IRBTVEventTeam:
+        """Gets the joined Team for the given RBTV Event
+        (which must be active in order to request these information).
+        """
+
+        return await self._request_single(f"/v1/rbtvevent/{event_id}/team")
+
+    @oauth_required("user.rbtvevent.manage")
+    async def current_event_join_team(self, event_id: int, team_id: int) -> IRBTVEventTeam:
+        """Joins the given Team for the given Event (the event must be active)."""
+
+        return await self._request_single(f"/v1/rbtvevent/{event_id}/team/{team_id}/join")  # POST
+
+    # Schedule
+
+    async def get_schedule(self, startDay: datetime, endDay: datetime) -> List[schedule]:
+        """Returns the program schedule. Each day starts with the first schedule item of type 'live' or 'premiere'.
+        Most of the time this will be "MoinMoin" at 10:30 CEST,
+        except on weekends or when there are 'live'/'premiere' items at 0:00 CEST.
+        """
+
+        assert endDay - startDay <= timedelta(days=14)
+        return await self._request_single(
+            "/v1/schedule/normalized",
+            startDay=startDay.timestamp(),
+            endDay=endDay.timestamp(),
+        )
+
+    async def get_schedule_range(self, start: datetime, end: datetime, workers: Optional[int] = None) -> List[schedule]:
+        """Returns the program schedule of every calendar day from `start` to `end` (inclusive).
+        See `rbtv.API.get_schedule_range`.
+        """
+
+        days = day_starts(start, end)
+        found, missing = self._schedule_cached(days)
+        windows = schedule_windows(missing)
+
+        if windows:
+            semaphore = asyncio.Semaphore(workers or self.page_workers)
+
+            async def fetch(window: List[datetime]) -> List[schedule]:
+                async with semaphore:
+                    return await self.get_schedule(window[0], window[-1] + timedelta(days=1))
+
+            results = await asyncio.gather(*map(fetch, windows))
+
+            for window, res in zip(windows, results):
+                self._schedule_store(window, res, found)
+
+        return [item for day in days for item in found[day.date()]]
+
+    # Shop
+
+    async def get_products(self) -> simpleShopItem:  # fixme: currently not working
+        """Returns information about all shop products."""
+
+        return await self._request_single("/v1/simpleshop/product/all")
+
+    # StreamCount
+
+    async def get_viewer_count(self, refresh: bool = False) -> streamCount:
+        """Returns information about the current viewers.
+        Contains separate numbers for Youtube, Twitch, and combined.
+        If `refresh` is true, the cached count is not used.
+        """
+
+        return await self._request_single("/v1/streamcount", refresh=refresh)
+
+    # Subscription
+
+    @oauth_required("user.subscriptions.manage")
+    async def subcribe(self, type_id: int, entity_id: int) -> subscriptionResponse:
+        return await self._request_single(f"/v1/subscription/{type_id}/{entity_id}", method="POST")
+
+    @oauth_required("user.subscriptions.manage")
+    async def unsubscribe(self, type_id: int, entity_id: int) -> subscriptionResponse:
+        return await self._request_single(f"/v1/subscription/{type_id}/{entity_id}", method="DELETE")
+
+    @oauth_required("user.subscriptions.read")
+    async def get_subscriptions(self) -> subscriptionListResponse:
+        """Returns all subscriptions for the current user."""
+
+        return await self._request_single("/v1/subscription/mysubscriptions")
+
+    @oauth_required("user.subscriptions.read")
+    async def get_subscription(self, type_id: int, entity_id: int) -> subscriptionResponse:
+        """Returns notification settings for the given subscription."""
+
+        return await self._request_single(f"/v1/subscription/{type_id}/{entity_id}")
+
+    @oauth_required("user.subscriptions.manage")
+    async def modify_subscription(
+        self,
+        type_id: int,
+        entity_id: int,
+        subscribed: Optional[bool] = None,
+        flags: Any = None,
+    ) -> subscriptionResponse:
+        """Returns subscriptionResponse, requires subscriptionResponse in body."""
+
+        subscriptionResponse = {
+            "type": type_id,
+            "id": entity_id,
+            "subscribed": subscribed,
+            "flags": flags,
+        }
+
+        return await self._patch_request(f"/v1/subscription/{type_id}/{entity_id}", subscriptionResponse)
+
+    @oauth_required("user.subscriptions.manage")
+    async def modify_subscription_defaults(self, type_id: int, flags: Any = None) -> subscriptionDefaultResponse:
+        """Returns default notification flags for the given type.
+        Requires subscriptionDefaultResponse in body.
+        """
+
+        subscriptionDefaultResponse = {
+            "type": type_id,
+            "flags": flags,
+        }
+
+        return await self._patch_request(f"/v1/subscription/mydefault/{type_id}", subscriptionDefaultResponse)
+
+    # User
+
+    @oauth_required("user.info")
+    async def get_user_info(self) -> entityUserResponse:
+        """Returns information about the current user,
+        amount of Information depends on requested Scopes.
+        """
+
+        return await self._request_single("/v1/user/self")
+
+
+class AsyncRBTVAPI(AsyncAPI):
+    def __init__(
+        self, *args: Any, name_index_ttl: float = 3600, search_index: Optional[SearchIndex] = None, **kwargs: Any
+    ) -> None:
+        """See `rbtv.RBTVAPI` and `AsyncAPI`."""
+
+        super().__init__(*args, **kwargs)
+        self._show_names = NameIndex("title", "id", "show", name_index_ttl)
+        self._bohne_names = NameIndex("name", "mgmtid", "Bohne", name_index_ttl)
+        self._fuzzy_indices: Dict[str, Tuple[TrigramIndex, float]] = {}
+        self.name_index_ttl = name_index_ttl
+        self.seasons = SeasonIndex()
+        self._seasons_scanned = 0.0
+        self.search_index = search_index
+
+    def _store_ingest(self, path: str, res: Any) -> None:
+        super()._store_ingest(path, res)
+        if self.search_index is not None and isinstance(res, dict):
+            self.search_index.ingest(path, res.get("data"))
+
+    async def _index_shows(self, shows: AsyncIterator[mediaShowResponse]) -> AsyncIterator[mediaShowResponse]:
+        async for show in shows:
+            self.seasons.add_shows([show])
+            yield show
+
+    async def _index_bulk(self, results: AsyncIterator[BulkResult]) -> AsyncIterator[BulkResult]:
+        async for r in results:
+            if r.result is not None:
+                self.seasons.add_shows([r.result])
+            yield r
+
+    def get_shows(
+        self, sortby: str = "LastEpisode", only: Optional[str] = None, workers: Optional[int] = None
+    ) -> AsyncIterator[mediaShowResponse]:
+        return self._index_shows(super().get_shows(sortby, only, workers))
+
+    async def get_show(self, show_id: int) -> mediaShowResponse:
+        show = await super().get_show(show_id)
+        self.seasons.add_shows([show])
+        return show
+
+    def get_shows_by_id(
+        self, show_ids: Iterable[int], workers: int = 8, ordered: bool = True
+    ) -> AsyncIterator[BulkResult]:
+        return self._index_bulk(super().get_shows_by_id(show_ids, workers, ordered))
+
+    async def get_season(self, show_id: int, season_id: int) -> mediaSeasonResponse:
+        """See `rbtv.RBTVAPI.get_season`."""
+
+        if self.seasons.show_id(season_id) != show_id:
+            await self.get_show(show_id)
+
+        season = self.seasons.get(season_id)
+        if season is None or self.seasons.show_id(season_id) != show_id:
+            raise KeyError(f"Season id not found: show={show_id} season={season_id}")
+        return season
+
+    async def get_season_by_id(self, season_id: int) -> mediaSeasonResponse:
+        """See `rbtv.RBTVAPI.get_season_by_id`."""
+
+        season = self.seasons.get(season_id)
+        if season is None and time() >= self._seasons_scanned + self.name_index_ttl:
+            self._seasons_scanned = time()
+            async for _ in self.get_shows():
+                pass
+            season = self.seasons.get(season_id)
+
+        if season is None:
+            raise KeyError(f"Season id not found: season={season_id}")
+        return season
+
+    async def season_to_show_id(self, season_id: int) -> int:
+        """See `rbtv.RBTVAPI.season_to_show_id`."""
+
+        await self.get_season_by_id(season_id)
+        show_id = self.seasons.show_id(season_id)
+        assert show_id is not None
+        return show_id
+
+    async def _show_index(self) -> NameIndex:
+        if self._show_names.expired():
+            self._show_names.update(await self.get_shows_mini())
+        return self._show_names
+
+    async def _bohne_index(self) -> NameIndex:
+        if self._bohne_names.expired():
+            self._bohne_names.update(await self.get_bohnen_portraits())
+        return self._bohne_names
+
+    async def show_name_to_id(self, show_name: str) -> int:
+        return (await self._show_index()).lookup(show_name)
+
+    async def show_names_to_ids(self, show_names: Iterable[str]) -> List[int]:
+        return (await self._show_index()).names_to_ids(show_names)
+
+    async def bohne_name_to_id(self, bohne_name: str) -> int:
+        return (await self._bohne_index()).lookup(bohne_name)
+
+    async def bohne_names_to_ids(self, bohne_names: Iterable[str]) -> List[int]:
+        return (await self._bohne_index()).names_to_ids(bohne_names)
+
+    async def _fuzzy_index(self, kind: str) -> TrigramIndex:
+        index, expires = self._fuzzy_indices.get(kind, (None, 0.0))
+        if index is None or time() >= expires:
+            if kind == "show":
+                items: Iterable[Dict[str, Any]] = await self.get_shows_mini()
+            elif kind == "bohne":
+                items = await self.get_bohnen_portraits()
+            else:
+                items = [show async for show in self.get_shows()]
+            index = fill_fuzzy_index(TrigramIndex(alphastring), kind, items)
+            self._fuzzy_indices[kind] = (index, time() + self.name_index_ttl)
+        return index
+
+    async def fuzzy_match(
+        self, name: str, k: int = 5, kinds: Sequence[str] = ("show", "bohne"), min_score: float = 0.3
+    ) -> List[NameMatch]:
+        """See `rbtv.RBTVAPI.fuzzy_match`."""
+
+        for kind in kinds:
+            assert_choice("kind", kind, {"show", "bohne", "season"})
+
+        matches = []
+        for kind in kinds:
+            for score, (_kind, _id, _name) in (await self._fuzzy_index(kind)).search(name, k, min_score):
+                matches.append(NameMatch(score, _kind, _id, _name))
+
+        matches.sort(key=lambda m: -m.score)
+        return matches[:k]
+
+    async def bohne_id_to_name(self, bohne_id: int) -> str:
+        return (await self.get_bohne_portrait(bohne_id))["name"]
+
+    async def search(self, s: str) -> Dict[str, Any]:
+        """Undocumented search endpoint used by the RBTV Mediathek webpage."""
+
+        return await self._request_single("/v1/search/" + quote(s))
+
+    def search_local(self, s: str, k: int = 10) -> searchResultResonse:
+        """See `rbtv.RBTVAPI.search_local`."""
+
+        if self.search_index is None:
+            raise RuntimeError("search_local requires a client created with a search_index")
+        return self.search_index.search(s, k)  # type: ignore[return-value]
@@ -0,0 +1,54 @@
+"""Compares the JSON decoders supported by `rbtv.decoders` on episode pages.
+
+Usage: python -m rbtv.benchmarks.decode [recorded-page.json ...]
+
+Without arguments, synthetic `mediaEpisodeCombinedResponse` pages are used.
+"""
+
+import json
+import sys
+import timeit
+from typing import Callable, List
+
+from ..decoders import get_decoder
+from .fixtures import episode_page
+
+
+def requests_style(data: bytes) -> object:
+    # what `requests.Response.json()` does: decode to str first, then parse with stdlib json
+    return json.loads(data.decode("utf-8"))
+
+
+def bench(func: Callable[[bytes], object], pages: List[bytes], number: int) -> float:
+    return min(timeit.repeat(lambda: [func(page) for page in pages], number=number, repeat=5)) / number
+
+
+def main(paths: List[str]) -> None:
+    if paths:
+        pages = []
+        for path in paths:
+            with open(path, "rb") as fr:
+                pages.append(fr.read())
+    else:
+        pages = [json.dumps(episode_page(1, offset, 50, 500)).encode("utf-8") for offset in range(0, 500, 50)]
+
+    size = sum(map(len, pages))
+    print(f"{len(pages)} pages, {size / 1024 / 1024:.1f} MiB")
+
+    baseline = bench(requests_style, pages, 5)
+    print(f"{'requests .json()':<18} {baseline * 1000:8.2f} ms  {size / baseline / 1024 / 1024:8.1f} MiB/s  1.00x")
+
+    for name in ("json", "orjson", "msgspec"):
+        try:
+            decoder = get_decoder(name)
+        except ImportError:
+            print(f"{name:<18} not installed")
+            continue
+        seconds = bench(decoder, pages, 5)
+        print(
+            f"{name:<18} {seconds * 1000:8.2f} ms  {size / seconds / 1024 / 1024:8.1f} MiB/s  {baseline / seconds:.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
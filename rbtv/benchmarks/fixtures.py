@@ -0,0 +1,155 @@
+"""Synthetic API responses with the shapes documented in `rbtv.types`.
+They are used by the benchmarks when no recorded responses are available.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+EPOCH = datetime(2015, 1, 15, tzinfo=timezone.utc)
+
+
+def _date(days: float) -> str:
+    return (EPOCH + timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _images(name: str, rnd: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {
+            "url": f"https://cdn.example/{name}/{w}x{h}/{rnd.getrandbits(64):016x}.jpg",
+            "name": name,
+            "width": w,
+            "height": h,
+        }
+        for w, h in ((1920, 1080), (1280, 720), (640, 360), (320, 180))
+    ]
+
+
+def _text(rnd: random.Random, words: int) -> str:
+    vocab = ["Bohnen", "Rocket", "Beans", "Gaming", "Talk", "Show", "Pen", "Paper", "Daily", "Almost", "und", "die"]
+    return " ".join(rnd.choice(vocab) for _ in range(words))
+
+
+def bohne_portrait(mgmtid: int) -> Dict[str, Any]:
+    rnd = random.Random(mgmtid)
+    return {
+        "mgmtid": mgmtid,
+        "name": f"Bohne {mgmtid}",
+        "role": rnd.choice(["onair", "offair", "external"]),
+        "episodeCount": rnd.randrange(1000),
+        "images": _images("portrait", rnd),
+    }
+
+
+def episode(episode_id: int, show_id: int, season_id: int) -> Dict[str, Any]:
+    rnd = random.Random(episode_id)
+    return {
+        "id": episode_id,
+        "showId": show_id,
+        "showName": f"Show {show_id}",
+        "seasonId": season_id,
+        "episode": episode_id % 100,
+        "title": _text(rnd, 6),
+        "description": _text(rnd, 80),
+        "thumbnail": _images("thumb", rnd),
+        "links": [{"type": "url", "target": f"https://example.com/{episode_id}", "label": None}],
+        "hosts": rnd.sample(range(1, 60), 3),
+        "tokens": [
+            {
+                "id": episode_id * 2,
+                "mediaEpisodeId": episode_id,
+                "token": f"{rnd.getrandbits(44):011x}",
+                "type": "youtube",
+                "length": 3600,
+            },
+        ],
+        "distributionPublishingDate": _date(episode_id / 3),
+        "firstBroadcastdate": _date(episode_id / 3 - 1),
+        "duration": rnd.randrange(600, 14400),
+        "prev": None,
+        "next": None,
+        "isAvailable": True,
+    }
+
+
+def show(show_id: int, num_seasons: int = 3) -> Dict[str, Any]:
+    rnd = random.Random(show_id)
+    return {
+        "id": show_id,
+        "title": f"Show {show_id} {_text(rnd, 2)}",
+        "description": _text(rnd, 40),
+        "genre": "Talk",
+        "duration": 3600,
+        "isExternal": False,
+        "isTruePodcast": False,
+        "thumbnail": _images("show", rnd),
+        "backgroundImage": None,
+        "slideshowImages": [],
+        "links": [],
+        "hosts": [bohne_portrait(h) for h in rnd.sample(range(1, 60), 2)],
+        "seasons": [
+            {"id": show_id * 100 + n, "showId": show_id, "name": "", "numeric": n, "thumbnail": [], "podcastId": 0}
+            for n in range(1, num_seasons + 1)
+        ],
+        "hasUnsortedEpisodes": False,
+        "lastEpisode": {"bohnen": {}, "episodes": [episode(show_id * 10000, show_id, show_id * 100 + 1)]},
+        "podcast": {"feedUrl": None, "soundcloudId": None, "itunesUrl": None, "spotifyUrl": None, "podigeeUrl": None},
+        "statusPublicNote": None,
+        "isSubscribed": None,
+    }
+
+
+def episode_page(show_id: int, offset: int, limit: int, total: int) -> Dict[str, Any]:
+    """A page of `/v1/media/episode/byshow/{show_id}` (`mediaEpisodeCombinedResponse`)."""
+
+    episodes = [
+        episode(show_id * 10000 + i, show_id, show_id * 100 + 1 + i % 3)
+        for i in range(offset, min(offset + limit, total))
+    ]
+    hosts = sorted({host for e in episodes for host in e["hosts"]})
+    return {
+        "success": True,
+        "data": {"bohnen": {str(h): bohne_portrait(h) for h in hosts}, "episodes": episodes, "progress": None},
+        "pagination": {"offset": offset, "limit": limit, "total": total},
+    }
+
+
+def show_mini(show_id: int) -> Dict[str, Any]:
+    """A `mediaShowPreviewMiniResponse` with the same title as `show(show_id)`."""
+
+    return {"id": show_id, "title": show(show_id, 0)["title"]}
+
+
+def schedule_day(day: datetime, items: int = 8) -> Dict[str, Any]:
+    """A `schedule` day starting at `day` with `items` elements."""
+
+    rnd = random.Random(int(day.timestamp()))
+    elements = []
+    for i in range(items):
+        start = day + timedelta(hours=10.5 + i * 1.5)
+        show_id = rnd.randrange(1, 100)
+        elements.append(
+            {
+                "id": int(start.timestamp()),
+                "title": f"Show {show_id}",
+                "topic": _text(rnd, 4),
+                "game": "",
+                "showId": show_id,
+                "episodeId": show_id * 10000 + i,
+                "episodeImage": "",
+                "episodeImages": [],
+                "bohnen": [],
+                "timeStart": start.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                "timeEnd": (start + timedelta(hours=1.5)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                "publishingDate": None,
+                "duration": 5400,
+                "durationClass": 0,
+                "streamExclusive": False,
+                "isSubscribed": None,
+                "type": rnd.choice(["live", "premiere", "rerun"]),
+                "links": [],
+                "channelGroups": [],
+                "openEnd": False,
+            }
+        )
+    return {"date": day.strftime("%Y-%m-%dT%H:%M:%S.000Z"), "elements": elements}
@@ -0,0 +1,65 @@
+"""Measures how long `import rbtv` takes in a fresh interpreter and which modules it loads.
+
+Usage: python -m rbtv.benchmarks.import_time [repeat]
+"""
+
+import subprocess  # nosec
+import sys
+from statistics import median
+from typing import Dict, List, Tuple
+
+# optional modules which `import rbtv` must not load
+LAZY_MODULES = (
+    "rbtv.types",
+    "asyncio",
+    "aiohttp",
+    "rbtv.aio",
+    "rbtv.cassette",
+    "rbtv.fuzzy",
+    "rbtv.records",
+    "rbtv.searchindex",
+    "rbtv.store",
+)
+
+
+def import_times(module: str) -> Tuple[int, Dict[str, int]]:
+    """Returns the total import time of `module` and the cumulative times of all modules loaded by it,
+    in microseconds, as reported by `python -X importtime`.
+    """
+
+    proc = subprocess.run(  # nosec
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    cumulative: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line[len("import time:") :].split("|")
+        try:
+            cumulative[name.strip()] = int(cum)
+        except ValueError:  # header line
+            pass
+
+    return cumulative[module], cumulative
+
+
+def main(repeat: int) -> None:
+    totals: List[int] = []
+    for _ in range(repeat):
+        total, cumulative = import_times("rbtv")
+        totals.append(total)
+
+    print(f"import rbtv: {median(totals) / 1000:.1f} ms (median of {repeat})")
+    loaded = [name for name in LAZY_MODULES if name in cumulative]
+    print("optional modules loaded:", ", ".join(loaded) or "none")
+    print("slowest top-level imports:")
+    for name, us in sorted(cumulative.items(), key=lambda x: -x[1])[:10]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,52 @@
+"""Compares the memory needed to hold episodes as dicts and as `rbtv.records` objects.
+
+Usage: python -m rbtv.benchmarks.records [number-of-episodes]
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+from typing import Any, Callable, List
+
+from ..records import record_class
+from .fixtures import episode
+
+
+def retained(make: Callable[[], List[Any]]) -> int:
+    """Returns the number of bytes still allocated by the result of `make()`."""
+
+    gc.collect()
+    tracemalloc.start()
+    objs = make()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return size
+
+
+def main(num: int) -> None:
+    # decoded from JSON so that strings aren't shared between the episodes
+    data = json.dumps([episode(i, i % 300, i % 900) for i in range(num)]).encode("utf-8")
+    cls = record_class("mediaEpisode")
+
+    def dicts() -> List[Any]:
+        return json.loads(data)
+
+    def records() -> List[Any]:
+        return [cls(e) for e in json.loads(data)]
+
+    def records_lazy() -> List[Any]:
+        return [cls(e, lazy=True) for e in json.loads(data)]
+
+    baseline = retained(dicts)
+    print(f"{num} episodes")
+    print(f"{'dicts':<28} {baseline / num:8.0f} bytes/episode  1.00x")
+    for name, make in (("records", records), ("records (lazy, not accessed)", records_lazy)):
+        size = retained(make)
+        print(f"{name:<28} {size / num:8.0f} bytes/episode  {size / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
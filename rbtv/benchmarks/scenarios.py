@@ -0,0 +1,183 @@
+"""End-to-end client benchmarks against the local mock server (`rbtv.benchmarks.server`).
+
+Usage: python -m rbtv.benchmarks.scenarios [--latency SECONDS] [--shows N] [--episodes N] [--json] [scenario ...]
+
+Every scenario runs with a new client (cold cache) and reports the number of HTTP requests,
+requests per second, the p50/p99 latency of the HTTP requests and the peak memory allocated
+by Python during the scenario (measured in a second run, because tracing slows down the first).
+"""
+
+import argparse
+import json
+import threading
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from math import ceil
+from time import perf_counter
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from ..rbtv import API, RBTVAPI
+from .server import MockServer
+
+Scenario = Callable[[RBTVAPI, MockServer], Any]
+
+
+class Result(NamedTuple):
+    name: str
+    requests: int
+    seconds: float
+    p50: float
+    p99: float
+    peak: int
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, `q` in [0, 100]."""
+
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, ceil(q / 100 * len(values)) - 1)]
+
+
+def _shows(api: RBTVAPI, server: MockServer) -> Any:
+    return sum(1 for _ in api.get_shows())
+
+
+def _shows_parallel(api: RBTVAPI, server: MockServer) -> Any:
+    return sum(1 for _ in api.get_shows(workers=4))
+
+
+def _episodes(api: RBTVAPI, server: MockServer) -> Any:
+    return sum(
+        len(page["episodes"]) for show_id in server.show_ids()[:10] for page in api.get_episodes_by_show(show_id)
+    )
+
+
+def _episodes_parallel(api: RBTVAPI, server: MockServer) -> Any:
+    return sum(
+        len(page["episodes"])
+        for show_id in server.show_ids()[:10]
+        for page in api.get_episodes_by_show(show_id, workers=4)
+    )
+
+
+def _names(api: RBTVAPI, server: MockServer) -> Any:
+    names = [show["title"] for show in api.get_shows_mini()]
+    for _ in range(10):
+        api.show_names_to_ids(names)
+    api.bohne_names_to_ids([f"Bohne {i}" for i in range(1, server.num_bohnen + 1)])
+    return len(api.fuzzy_match("Show 12 Pen")) + len(api.fuzzy_match("bohne 3"))
+
+
+def _schedule(api: RBTVAPI, server: MockServer) -> Any:
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    days = api.get_schedule_range(start, start + timedelta(days=89))
+    # overlapping range, only the last 30 days are requested
+    days += api.get_schedule_range(start + timedelta(days=30), start + timedelta(days=119))
+    return len(days)
+
+
+def _shows_cached(api: RBTVAPI, server: MockServer) -> Any:
+    return sum(1 for _ in range(5) for _ in api.get_shows())
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "shows": _shows,
+    "shows-parallel": _shows_parallel,
+    "episodes": _episodes,
+    "episodes-parallel": _episodes_parallel,
+    "names": _names,
+    "schedule": _schedule,
+    "shows-cached": _shows_cached,
+}
+
+
+class _TimedSession:
+    """Records the duration of every `session.get` call of a client."""
+
+    def __init__(self, api: API) -> None:
+        self.latencies: List[float] = []
+        self._lock = threading.Lock()
+        self._get = api.session.get
+        api.session.get = self.get  # type: ignore[assignment]
+
+    def get(self, *args: Any, **kwargs: Any) -> Any:
+        start = perf_counter()
+        try:
+            return self._get(*args, **kwargs)
+        finally:
+            delta = perf_counter() - start
+            with self._lock:
+                self.latencies.append(delta)
+
+
+def _client(server: MockServer) -> RBTVAPI:
+    api = RBTVAPI(scheme="http", pool_maxsize=8)
+    api.netloc = server.netloc
+    return api
+
+
+def run(name: str, scenario: Scenario, server: MockServer) -> Result:
+    with _client(server) as api:
+        timed = _TimedSession(api)
+        start = perf_counter()
+        scenario(api, server)
+        seconds = perf_counter() - start
+
+    with _client(server) as api:
+        tracemalloc.start()
+        scenario(api, server)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    latencies = timed.latencies
+    return Result(name, len(latencies), seconds, percentile(latencies, 50), percentile(latencies, 99), peak)
+
+
+def main(names: List[str], latency: float, num_shows: int, episodes: int, as_json: bool) -> None:
+    unknown = set(names) - SCENARIOS.keys()
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    with MockServer(latency, num_shows, episodes) as server:
+        # render all responses once, so that the first scenario isn't slower than the others
+        for scenario in SCENARIOS.values():
+            with _client(server) as api:
+                scenario(api, server)
+
+        if not as_json:
+            print(f"latency {latency * 1000:.0f} ms, {num_shows} shows, {episodes} episodes per show")
+            print(
+                f"{'scenario':<18} {'requests':>8} {'seconds':>8} {'req/s':>8} {'p50 ms':>8} "
+                f"{'p99 ms':>8} {'peak MiB':>9}"
+            )
+
+        for name in names or SCENARIOS:
+            r = run(name, SCENARIOS[name], server)
+            if as_json:
+                print(json.dumps({**r._asdict(), "rate": r.rate}))
+            else:
+                print(
+                    f"{r.name:<18} {r.requests:>8} {r.seconds:>8.3f} {r.rate:>8.1f} {r.p50 * 1000:>8.2f} "
+                    f"{r.p99 * 1000:>8.2f} {r.peak / 1024 / 1024:>9.2f}"
+                )
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario", help=f"One of {', '.join(SCENARIOS)}")
+    parser.add_argument("--latency", type=float, default=0.01, help="Server latency per request in seconds")
+    parser.add_argument("--shows", type=int, default=100, help="Number of shows")
+    parser.add_argument("--episodes", type=int, default=200, help="Number of episodes per show")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per scenario")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(args.scenarios, args.latency, args.shows, args.episodes, args.json)
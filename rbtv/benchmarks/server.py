@@ -0,0 +1,220 @@
+"""Local stand-in for the RBTV API which serves synthetic or recorded responses.
+
+Synthetic responses come from `rbtv.benchmarks.fixtures` and are paginated like the real API.
+If `fixtures_dir` is given, a recorded response for the path `/v1/foo/bar` is read from
+`<fixtures_dir>/v1/foo/bar.json` and takes precedence over the synthetic data.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from . import fixtures
+
+Route = Callable[["MockServer", Dict[str, str], Tuple[str, ...]], Any]
+
+
+def _page(items: List[Any], params: Dict[str, str]) -> Dict[str, Any]:
+    offset = int(params.get("offset", 0))
+    limit = int(params.get("limit", 50))
+    return {
+        "success": True,
+        "data": items[offset : offset + limit],
+        "pagination": {"offset": offset, "limit": limit, "total": len(items)},
+    }
+
+
+@lru_cache(maxsize=4)
+def _show_list(num_shows: int) -> List[Dict[str, Any]]:
+    return [fixtures.show(show_id) for show_id in range(1, num_shows + 1)]
+
+
+def _shows(server: "MockServer", params: Dict[str, str], args: Tuple[str, ...]) -> Any:
+    return _page(_show_list(server.num_shows), params)
+
+
+def _shows_mini(server: "MockServer", params: Dict[str, str], args: Tuple[str, ...]) -> Any:
+    return {"success": True, "data": [fixtures.show_mini(show_id) for show_id in server.show_ids()]}
+
+
+def _episodes_by_show(server: "MockServer", params: Dict[str, str], args: Tuple[str, ...]) -> Any:
+    offset = int(params.get("offset", 0))
+    limit = int(params.get("limit", 50))
+    return fixtures.episode_page(int(args[0]), offset, limit, server.episodes_per_show)
+
+
+def _bohnen(server: "MockServer", params: Dict[str, str], args: Tuple[str, ...]) -> Any:
+    return {"success": True, "data": [fixtures.bohne_portrait(mgmtid) for mgmtid in range(1, server.num_bohnen + 1)]}
+
+
+def _schedule(server: "MockServer", params: Dict[str, str], args: Tuple[str, ...]) -> Any:
+    day = datetime.fromtimestamp(float(params["startDay"]), timezone.utc)
+    end = datetime.fromtimestamp(float(params["endDay"]), timezone.utc)
+    days = []
+    while day <= end:
+        days.append(fixtures.schedule_day(day))
+        day += timedelta(days=1)
+    return {"success": True, "data": days}
+
+
+def _streamcount(server: "MockServer", params: Dict[str, str], args: Tuple[str, ...]) -> Any:
+    return {"success": True, "data": {"youtube": 1000, "twitch": 2000, "total": 3000, "external": []}}
+
+
+ROUTES: List[Tuple[Pattern[str], Route]] = [
+    (re.compile(r"/v1/media/show/all"), _shows),
+    (re.compile(r"/v1/media/show/preview/mini/all"), _shows_mini),
+    (re.compile(r"/v1/media/episode/byshow/(\d+)"), _episodes_by_show),
+    (re.compile(r"/v1/bohne/portrait/all"), _bohnen),
+    (re.compile(r"/v1/schedule/normalized"), _schedule),
+    (re.compile(r"/v1/streamcount"), _streamcount),
+]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_HTTPServer"
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self) -> None:
+        mock = self.server.mock
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+
+        if mock.latency:
+            time.sleep(mock.latency)
+
+        status = mock.failure(url.path)
+        body = None if status else mock.response(url.path, params)
+        etag = None
+        if body is None:
+            status = status or 404
+            body = b'{"success": false}'
+        else:
+            status = 200
+            etag = f'"{zlib.crc32(body):08x}"'
+            if self.headers.get("If-None-Match") == etag:
+                status = 304
+                body = b""
+
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockServer"
+
+
+class MockServer:
+    """Serves the API on `127.0.0.1` (on a free port by default) in a background thread.
+    Every request is delayed by `latency` seconds. The number of shows, episodes per show
+    and Bohnen determine the number of pages of the paginated endpoints.
+    Rendered responses are kept in memory, so the server adds little overhead to the measurements.
+    Successful responses have an `ETag` and conditional requests are answered with `304 Not Modified`.
+    The next requests to a path can be made to fail using `fail()`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        num_shows: int = 100,
+        episodes_per_show: int = 200,
+        num_bohnen: int = 60,
+        fixtures_dir: Optional[str] = None,
+        port: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.num_shows = num_shows
+        self.episodes_per_show = episodes_per_show
+        self.num_bohnen = num_bohnen
+        self.fixtures_dir = fixtures_dir
+        self.requests = 0
+
+        self._lock = threading.Lock()
+        self._failures: Dict[str, List[int]] = {}
+        self._rendered: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Optional[bytes]] = {}
+        self._httpd = _HTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def netloc(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"{host}:{port}"
+
+    def show_ids(self) -> range:
+        return range(1, self.num_shows + 1)
+
+    def _render(self, path: str, params: Dict[str, str]) -> Optional[bytes]:
+        if self.fixtures_dir is not None:
+            recorded = os.path.join(self.fixtures_dir, *path.strip("/").split("/")) + ".json"
+            if os.path.isfile(recorded):
+                with open(recorded, "rb") as fr:
+                    return fr.read()
+
+        for pattern, route in ROUTES:
+            m = pattern.fullmatch(path)
+            if m:
+                return json.dumps(route(self, params, m.groups())).encode("utf-8")
+        return None
+
+    def fail(self, path: str, *statuses: int) -> None:
+        """Answers the next requests to `path` with the error `statuses`, one per request."""
+
+        with self._lock:
+            self._failures.setdefault(path, []).extend(statuses)
+
+    def failure(self, path: str) -> Optional[int]:
+        with self._lock:
+            statuses = self._failures.get(path)
+            if not statuses:
+                return None
+            self.requests += 1
+            return statuses.pop(0)
+
+    def response(self, path: str, params: Dict[str, str]) -> Optional[bytes]:
+        key = (path, tuple(sorted(params.items())))
+        with self._lock:
+            self.requests += 1
+            try:
+                return self._rendered[key]
+            except KeyError:
+                pass
+        body = self._render(path, params)
+        with self._lock:
+            self._rendered[key] = body
+        return body
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="MockServer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "MockServer":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
@@ -0,0 +1,9 @@
+from typing import Any, NamedTuple, Optional
+
+
+class BulkResult(NamedTuple):
+    """Result of a single id of a bulk request. Either `result` or `error` is set."""
+
+    id: int
+    result: Any
+    error: Optional[BaseException] = None
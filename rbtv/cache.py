@@ -0,0 +1,183 @@
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from time import time
+from typing import Any, Dict, NamedTuple, Optional
+
+DEFAULT_TTLS = {
+    "/v1/streamcount": 10,
+    "/v1/rbtvevent/active": 60,
+    "/v1/frontend/init": 60,
+    "/v1/schedule/": 300,
+    "/v1/media/episode/preview/newest": 60,
+    "/v1/media/episode/": 600,
+    "/v1/media/show/preview/mini/all": 6 * 3600,
+    "/v1/media/show/": 3600,
+    "/v1/bohne/": 6 * 3600,
+    "/v1/cms/": 3600,
+    "/v1/blog/": 600,
+}
+
+
+def copy_json(obj: Any) -> Any:
+    """Fast deep copy for objects consisting only of JSON types."""
+
+    if isinstance(obj, dict):
+        return {k: copy_json(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [copy_json(v) for v in obj]
+    else:
+        return obj
+
+
+class CacheEntry(NamedTuple):
+    data: Any
+    expires: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time()) < self.expires
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Returns the headers needed to revalidate this entry with a conditional request."""
+
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class BaseCache(ABC):
+    """Interface of response caches. Keys are canonical request URLs.
+    `get` also returns expired entries, it's up to the caller to decide what to do with them.
+    If `returns_copies` is true, `get` creates new objects on every call
+    and callers don't need to copy them to protect the cache from mutation.
+    """
+
+    returns_copies = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def invalidate(self, prefix: str = "") -> int:
+        """Removes all entries whose key starts with `prefix` and returns their number."""
+
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryCache(BaseCache):
+    """Thread-safe in-memory LRU cache which holds at most `maxsize` entries."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return None
+            return self._entries[key]
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix: str = "") -> int:
+        with self._lock:
+            if not prefix:
+                num = len(self._entries)
+                self._entries.clear()
+                return num
+
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+
+class SqliteCache(BaseCache):
+    """Persistent cache stored in a SQLite database at `path`.
+    Entries survive process restarts, expired entries are kept for revalidation.
+    """
+
+    returns_copies = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(url TEXT PRIMARY KEY, body TEXT NOT NULL, expires REAL NOT NULL, etag TEXT, last_modified TEXT)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            (num,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return num
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires, etag, last_modified FROM responses WHERE url=?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, expires, etag, last_modified = row
+        return CacheEntry(json.loads(body), expires, etag, last_modified)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        body = json.dumps(entry.data, ensure_ascii=False, separators=(",", ":"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, body, entry.expires, entry.etag, entry.last_modified),
+            )
+
+    def invalidate(self, prefix: str = "") -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM responses WHERE substr(url, 1, ?) = ?", (len(prefix), prefix))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def ttl_for_path(ttls: Dict[str, float], path: str, default: float) -> float:
+    """Returns the TTL of the longest prefix in `ttls` which matches `path`."""
+
+    best = ""
+    ttl = default
+    for prefix, value in ttls.items():
+        if len(prefix) > len(best) and path.startswith(prefix):
+            best = prefix
+            ttl = value
+    return ttl
@@ -0,0 +1,198 @@
+"""Record/replay transport for deterministic offline runs.
+
+A `Cassette` stores HTTP interactions in a (compressed) JSON file. Mounted on a `requests.Session`
+using `CassetteAdapter`, it records real responses once and replays them afterwards without network access:
+
+    cassette = Cassette("tests/api.json.gz", mode="replay", strict=True)
+    with API(cassette=cassette) as api:
+        api.get_shows_mini()
+
+Interactions are keyed on the method, the path, the sorted query parameters and the request body,
+so the host and the order of parameters don't matter. Multiple responses for the same key
+(for example when polling) are replayed in the recorded order, the last one is repeated.
+"""
+
+import base64
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import threading
+from typing import IO, Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.exceptions import RequestException
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+Key = Tuple[str, str, str, str]
+
+_openers: Dict[str, Callable[..., IO[bytes]]] = {".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+
+# the stored body is already decoded, so these don't apply anymore
+_dropped_headers = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class CassetteMiss(RequestException):
+    """Raised in strict replay mode if a request was not recorded."""
+
+
+def request_key(method: str, url: str, body: Any = None) -> Key:
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    if isinstance(body, bytes):
+        body = body.decode("utf-8")
+    return (method.upper(), parts.path, query, body or "")
+
+
+def _opener(path: str) -> Callable[..., IO[bytes]]:
+    _, ext = os.path.splitext(path)
+    return _openers.get(ext, open)
+
+
+class Cassette:
+    """Collection of recorded interactions, stored in `path`. The file is compressed according to
+    its extension (`.gz`, `.xz` or `.bz2`).
+
+    In `replay` mode, recorded responses are returned and requests which were not recorded
+    are sent to the network and recorded, or raise `CassetteMiss` if `strict` is true.
+    In `record` mode, every request is sent and its responses replace the ones recorded for the same key,
+    the interactions which are not requested again are kept.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", strict: bool = False) -> None:
+        if mode not in {"replay", "record"}:
+            raise ValueError(f"Invalid mode: {mode}")
+
+        self.path = path
+        self.mode = mode
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._interactions: Dict[Key, List[Dict[str, Any]]] = {}
+        self._played: Dict[Key, int] = {}
+        self._rerecorded: Set[Key] = set()
+        self._dirty = False
+
+        if os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return sum(map(len, self._interactions.values()))
+
+    def load(self) -> None:
+        with _opener(self.path)(self.path, "rb") as fr:
+            data = json.load(fr)
+        for interaction in data["interactions"]:
+            req = interaction["request"]
+            key = request_key(req["method"], req["url"], req.get("body"))
+            self._interactions.setdefault(key, []).append(interaction["response"])
+
+    def save(self) -> None:
+        """Writes the cassette to disk if anything was recorded."""
+
+        with self._lock:
+            if not self._dirty:
+                return
+            interactions = [
+                {
+                    "request": {"method": method, "url": f"{path}?{query}" if query else path, "body": body or None},
+                    "response": response,
+                }
+                for (method, path, query, body), responses in self._interactions.items()
+                for response in responses
+            ]
+            tmppath = f"{self.path}.tmp"
+            with _opener(self.path)(tmppath, "wb") as fw:
+                fw.write(json.dumps({"version": 1, "interactions": interactions}, ensure_ascii=False).encode("utf-8"))
+            os.replace(tmppath, self.path)
+            self._dirty = False
+
+    def play(self, key: Key) -> Optional[Dict[str, Any]]:
+        """Returns the next recorded response for `key`, or None if there is none."""
+
+        with self._lock:
+            responses = self._interactions.get(key)
+            if not responses:
+                return None
+            i = self._played.get(key, 0)
+            self._played[key] = i + 1
+            return responses[min(i, len(responses) - 1)]
+
+    def record(self, key: Key, response: Dict[str, Any]) -> None:
+        with self._lock:
+            if self.mode == "record" and key not in self._rerecorded:
+                # responses recorded by earlier runs are replaced
+                self._rerecorded.add(key)
+                self._interactions[key] = []
+            self._interactions.setdefault(key, []).append(response)
+            self._dirty = True
+
+
+def _serialize(r: requests.Response) -> Dict[str, Any]:
+    content = r.content
+    response: Dict[str, Any] = {
+        "status": r.status_code,
+        "reason": r.reason,
+        "headers": {k: v for k, v in r.headers.items() if k.lower() not in _dropped_headers},
+    }
+    try:
+        response["body"] = content.decode("utf-8")
+    except UnicodeDecodeError:
+        response["body_base64"] = base64.b64encode(content).decode("ascii")
+    return response
+
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter which serves requests from `cassette`, and sends them using `adapter`
+    (usually a `requests.adapters.HTTPAdapter`) when they need to be recorded.
+    """
+
+    def __init__(self, cassette: Cassette, adapter: Optional[BaseAdapter] = None) -> None:
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def _build_response(self, request: requests.PreparedRequest, data: Mapping[str, Any]) -> requests.Response:
+        if "body_base64" in data:
+            content = base64.b64decode(data["body_base64"])
+        else:
+            content = data["body"].encode("utf-8")
+
+        r = requests.Response()
+        r.status_code = data["status"]
+        r.reason = data.get("reason")
+        r.headers = CaseInsensitiveDict(data["headers"])
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.raw = io.BytesIO(content)
+        r.url = request.url or ""
+        r.request = request
+        r.connection = self
+        return r
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        key = request_key(request.method or "GET", request.url or "", request.body)
+        cassette = self.cassette
+
+        if cassette.mode == "replay":
+            data = cassette.play(key)
+            if data is not None:
+                return self._build_response(request, data)
+            if cassette.strict:
+                raise CassetteMiss(f"No recorded response for {key[0]} {request.url}", request=request)
+
+        if self.adapter is None:
+            raise CassetteMiss(f"Cannot record {key[0]} {request.url} without a transport adapter", request=request)
+
+        kwargs["stream"] = False
+        data = _serialize(self.adapter.send(request, **kwargs))
+        cassette.record(key, data)
+        return self._build_response(request, data)
+
+    def close(self) -> None:
+        self.cassette.save()
+        if self.adapter is not None:
+            self.adapter.close()
@@ -0,0 +1,161 @@
+"""Columnar export of episodes for vectorised analytics.
+
+The builders consume the paged episode iterators (for example `API.get_episodes_by_show`
+or `API.get_episodes_by_bohne`) page by page, so the episode dicts never need to be held in memory
+at the same time. Requires `numpy`, the Arrow and Parquet output also requires `pyarrow`.
+"""
+
+from array import array
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from .rbtv import batch_iter
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+EpisodePages = Iterable[Dict[str, Any]]
+
+
+def parse_dates(dates: List[Optional[str]]) -> np.ndarray:
+    """Parses ISO 8601 UTC timestamps like `2020-05-04T10:30:00.000Z` to `datetime64[ms]`.
+    Missing dates become `NaT`.
+    """
+
+    values = []
+    for date in dates:
+        if not date:
+            values.append("NaT")
+        elif date.endswith("Z"):
+            values.append(date[:-1])
+        else:  # explicit offset, numpy doesn't support them
+            dt = datetime.fromisoformat(date)
+            if dt.utcoffset() is not None:
+                dt = (dt - dt.utcoffset()).replace(tzinfo=None)
+            values.append(dt.isoformat())
+    return np.array(values, dtype="datetime64[ms]")
+
+
+class EpisodeColumns:
+    """Accumulates `mediaEpisode` objects in compact typed buffers.
+
+    Columns: `id`, `showId` and `seasonId` (-1 if missing), `duration` (seconds),
+    `distributionPublishingDate` (`datetime64[ms]`) and the hosts in CSR format:
+    the hosts of episode `i` are `hosts_values[hosts_offsets[i]:hosts_offsets[i + 1]]`.
+    If `strings` is true, `title` and `showName` are included as object arrays.
+    """
+
+    def __init__(self, strings: bool = False) -> None:
+        self.strings = strings
+        self.clear()
+
+    def clear(self) -> None:
+        self._id = array("q")
+        self._show_id = array("q")
+        self._season_id = array("q")
+        self._duration = array("q")
+        self._dates: List[Optional[str]] = []
+        self._hosts_offsets = array("q", [0])
+        self._hosts_values = array("q")
+        self._title: List[str] = []
+        self._show_name: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._id)
+
+    def add(self, episode: Dict[str, Any]) -> None:
+        self._id.append(episode["id"])
+        show_id = episode.get("showId")
+        self._show_id.append(-1 if show_id is None else show_id)
+        season_id = episode.get("seasonId")
+        self._season_id.append(-1 if season_id is None else season_id)
+        self._duration.append(episode.get("duration") or 0)
+        self._dates.append(episode.get("distributionPublishingDate"))
+        self._hosts_values.extend(episode.get("hosts") or ())
+        self._hosts_offsets.append(len(self._hosts_values))
+        if self.strings:
+            self._title.append(episode.get("title"))
+            self._show_name.append(episode.get("showName"))
+
+    def extend(self, episodes: Iterable[Dict[str, Any]]) -> "EpisodeColumns":
+        for episode in episodes:
+            self.add(episode)
+        return self
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        columns = {
+            "id": np.frombuffer(self._id, dtype=np.int64).copy(),
+            "showId": np.frombuffer(self._show_id, dtype=np.int64).copy(),
+            "seasonId": np.frombuffer(self._season_id, dtype=np.int64).copy(),
+            "duration": np.frombuffer(self._duration, dtype=np.int64).copy(),
+            "distributionPublishingDate": parse_dates(self._dates),
+            "hosts_offsets": np.frombuffer(self._hosts_offsets, dtype=np.int64).copy(),
+            "hosts_values": np.frombuffer(self._hosts_values, dtype=np.int64).copy(),
+        }
+        if self.strings:
+            columns["title"] = np.array(self._title, dtype=object)
+            columns["showName"] = np.array(self._show_name, dtype=object)
+        return columns
+
+
+def numpy_to_arrow(columns: Dict[str, np.ndarray]) -> "pa.Table":
+    """Converts the output of `EpisodeColumns.to_numpy` to an Arrow table with a `hosts` list column."""
+
+    import pyarrow as pa
+
+    data = {name: values for name, values in columns.items() if not name.startswith("hosts_")}
+    data["hosts"] = pa.LargeListArray.from_arrays(
+        pa.array(columns["hosts_offsets"], pa.int64()), pa.array(columns["hosts_values"], pa.int64())
+    )
+    return pa.table(data)
+
+
+def episodes_to_numpy(pages: EpisodePages, strings: bool = False) -> Dict[str, np.ndarray]:
+    """Collects all episodes of the `mediaEpisodeCombinedResponse` pages in `pages` into NumPy arrays."""
+
+    return EpisodeColumns(strings).extend(batch_iter(pages, "episodes")).to_numpy()
+
+
+def episodes_to_arrow(pages: EpisodePages, strings: bool = False) -> "pa.Table":
+    """Collects all episodes of the `mediaEpisodeCombinedResponse` pages in `pages` into an Arrow table."""
+
+    return numpy_to_arrow(episodes_to_numpy(pages, strings))
+
+
+def _batches(pages: EpisodePages, strings: bool, batch_size: int) -> Iterator[Dict[str, np.ndarray]]:
+    columns = EpisodeColumns(strings)
+    for episode in batch_iter(pages, "episodes"):
+        columns.add(episode)
+        if len(columns) >= batch_size:
+            yield columns.to_numpy()
+            columns.clear()
+    if len(columns):
+        yield columns.to_numpy()
+
+
+def write_parquet(pages: EpisodePages, path: str, strings: bool = False, batch_size: int = 100000) -> int:
+    """Streams the episodes of `pages` into a Parquet file, writing a row group every `batch_size` episodes.
+    Returns the number of episodes written.
+    """
+
+    import pyarrow.parquet as pq
+
+    num = 0
+    writer = None
+    try:
+        for batch in _batches(pages, strings, batch_size):
+            table = numpy_to_arrow(batch)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            num += table.num_rows
+        if writer is None:  # no episodes, still write a valid file
+            table = numpy_to_arrow(EpisodeColumns(strings).to_numpy())
+            pq.write_table(table, path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return num
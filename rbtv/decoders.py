@@ -0,0 +1,48 @@
+import json
+from typing import Any, Callable, Dict
+
+Decoder = Callable[[bytes], Any]
+
+
+def _load_orjson() -> Decoder:
+    import orjson
+
+    return orjson.loads
+
+
+def _load_msgspec() -> Decoder:
+    import msgspec
+
+    return msgspec.json.Decoder().decode
+
+
+def _load_json() -> Decoder:
+    return json.loads
+
+
+_loaders: Dict[str, Callable[[], Decoder]] = {
+    "orjson": _load_orjson,
+    "msgspec": _load_msgspec,
+    "json": _load_json,
+}
+
+
+def get_decoder(name: str = "auto") -> Decoder:
+    """Returns a function which decodes a JSON document given as UTF-8 bytes.
+    `name` is one of `orjson`, `msgspec`, `json` (stdlib) or `auto`,
+    which picks the fastest installed one.
+    """
+
+    if name == "auto":
+        for loader in (_load_orjson, _load_msgspec):
+            try:
+                return loader()
+            except ImportError:
+                pass
+        return _load_json()
+
+    try:
+        loader = _loaders[name]
+    except KeyError:
+        raise ValueError(f"Invalid decoder: {name}")
+    return loader()
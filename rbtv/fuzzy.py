@@ -0,0 +1,62 @@
+from collections import defaultdict
+from heapq import nlargest
+from typing import Callable, DefaultDict, Generic, List, NamedTuple, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def trigrams(s: str) -> Set[str]:
+    """Returns the set of character trigrams of `s`, padded so that the beginning and end
+    of the string (and very short strings) are represented as well.
+    """
+
+    s = f"$${s}$"
+    return {s[i : i + 3] for i in range(len(s) - 2)}
+
+
+class NameMatch(NamedTuple):
+    score: float
+    kind: str
+    id: int
+    name: str
+
+
+class TrigramIndex(Generic[T]):
+    """Inverted index from character trigrams to values for typo tolerant lookups.
+    Names are normalized with `normalize` before indexing and querying.
+    Candidates are ranked by the Dice coefficient of their trigram sets.
+    """
+
+    def __init__(self, normalize: Callable[[str], str]) -> None:
+        self.normalize = normalize
+        self._values: List[T] = []
+        self._sizes: List[int] = []
+        self._postings: DefaultDict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, name: str, value: T) -> None:
+        grams = trigrams(self.normalize(name))
+        pos = len(self._values)
+        self._values.append(value)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings[gram].append(pos)
+
+    def search(self, query: str, k: int = 5, min_score: float = 0.0) -> List[Tuple[float, T]]:
+        """Returns up to `k` `(score, value)` pairs with the highest similarity to `query`,
+        best match first. Scores range from 0 (nothing in common) to 1 (identical trigrams).
+        """
+
+        grams = trigrams(self.normalize(query))
+        counts: DefaultDict[int, int] = defaultdict(int)
+        for gram in grams:
+            for pos in self._postings.get(gram, ()):
+                counts[pos] += 1
+
+        size = len(grams)
+        sizes = self._sizes
+        scored = nlargest(k, ((2 * common / (size + sizes[pos]), -pos) for pos, common in counts.items()))
+
+        return [(score, self._values[-neg_pos]) for score, neg_pos in scored if score >= min_score]
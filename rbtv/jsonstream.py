@@ -0,0 +1,307 @@
+import codecs
+import re
+from json import JSONDecodeError, JSONDecoder
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_ws = re.compile(r"[ \t\n\r]*")
+_string_special = re.compile(r'["\\]')
+_structural = re.compile(r'["{}\[\]]')
+_scalar = re.compile(r"[^,}\] \t\n\r]*")
+
+# parser states
+_START = 0
+_KEY = 1
+_COLON = 2
+_VALUE = 3
+_AFTER_VALUE = 4
+_ITEM = 5
+_AFTER_ITEM = 6
+_END = 7
+
+Event = Tuple[Optional[str], Any]
+
+
+class ObjectStreamParser:
+    """Incremental parser for a JSON object whose member `stream_key` is a (large) array.
+    `stream_key` can be a dotted path like `data.episodes` to stream an array in a nested object.
+
+    Bytes are pushed using `feed()`, which returns the events which could be completed so far:
+    `(key, value)` for every other member of the objects along the path (with dotted keys like
+    `data.bohnen` for nested members) and `(None, item)` for every item of the `stream_key` array.
+    Only the item currently being parsed is kept in memory, not the whole document.
+    The end of a value is found by scanning every chunk once (tracking the nesting depth and strings),
+    so the JSON decoder only runs once per value, however many chunks it spans.
+    """
+
+    def __init__(self, stream_key: str = "data", encoding: str = "utf-8") -> None:
+        self.stream_key = stream_key
+        self._path = tuple(stream_key.split("."))
+        self._depth = 0  # number of objects along `_path` the parser is in, besides the top-level one
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._json = JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._state = _START
+        self._key = ""
+
+        # scan of the value at `_pos`, see `_scan()`
+        self._parts: List[str] = []  # text of an incomplete value from previous chunks
+        self._end: Optional[int] = None  # end of the value in `_buf` once it's known
+        self._nest = 0
+        self._in_string = False
+        self._escape = False
+        self._scalar = False
+
+    def _skip_ws(self) -> Optional[str]:
+        self._pos = _ws.match(self._buf, self._pos).end()
+        if self._pos < len(self._buf):
+            return self._buf[self._pos]
+        return None
+
+    def _scan(self, text: str, i: int) -> int:
+        """Continues scanning an array, object or string from `text[i]`.
+        Returns the index after its end, or -1 if it doesn't end in `text`.
+        """
+
+        while True:
+            if self._in_string:
+                m = _string_special.search(text, i)
+                if m is None:
+                    return -1
+                i = m.end()
+                if m.group() == "\\":
+                    if i == len(text):
+                        self._escape = True
+                        return -1
+                    i += 1
+                    continue
+                self._in_string = False
+                if self._nest == 0:
+                    return i
+            else:
+                m = _structural.search(text, i)
+                if m is None:
+                    return -1
+                i = m.end()
+                c = m.group()
+                if c == '"':
+                    self._in_string = True
+                elif c in "{[":
+                    self._nest += 1
+                else:
+                    self._nest -= 1
+                    if self._nest == 0:
+                        return i
+
+    def _scan_start(self) -> int:
+        """Starts scanning the value at `_pos`. Returns the index after its end, or -1 if it's incomplete.
+        Numbers and literals are incomplete until a delimiter follows, because they might continue in the next chunk.
+        """
+
+        self._scalar = self._buf[self._pos] not in '{["'
+        if self._scalar:
+            end = _scalar.match(self._buf, self._pos).end()
+            return end if end < len(self._buf) else -1
+        self._nest = 0
+        self._in_string = False
+        self._escape = False
+        return self._scan(self._buf, self._pos)
+
+    def _scan_resume(self, text: str) -> int:
+        """Continues scanning the incomplete value in the next chunk `text`, see `_scan_start()`."""
+
+        if self._scalar:
+            end = _scalar.match(text).end()
+            return end if end < len(text) else -1
+        i = 0
+        if self._escape:
+            if not text:
+                return -1
+            self._escape = False
+            i = 1
+        return self._scan(text, i)
+
+    def _decode(self, final: bool) -> Tuple[bool, Any]:
+        """Decodes the value at the current position once it's complete. Incomplete values are moved
+        to `_parts` and completed by the next `feed()`.
+        """
+
+        if self._end is None:
+            end = self._scan_start()
+            if end < 0 and not final:
+                self._parts.append(self._buf[self._pos :])
+                self._buf = ""
+                self._pos = 0
+                return False, None
+        self._end = None
+
+        # raises for malformed or (if `final` is true) truncated values
+        value, self._pos = self._json.raw_decode(self._buf, self._pos)
+        return True, value
+
+    def _error(self, expected: str) -> JSONDecodeError:
+        return JSONDecodeError(f"Expecting {expected}", self._buf, self._pos)
+
+    def _close_object(self) -> None:
+        if self._depth > 0:
+            self._depth -= 1
+            self._state = _AFTER_VALUE
+        else:
+            self._state = _END
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Event]:
+        text = self._decoder.decode(chunk, final)
+        events: List[Event] = []
+
+        if self._parts:
+            end = self._scan_resume(text)
+            self._parts.append(text)
+            if end < 0 and not final:
+                return events
+            # the value is joined only once it's complete
+            self._buf = "".join(self._parts)
+            self._parts = []
+            if end >= 0:
+                self._end = len(self._buf) - len(text) + end
+        else:
+            # everything before `_pos` was consumed, an incomplete value would be in `_parts`
+            self._buf = text
+        self._pos = 0
+
+        while True:
+            c = self._skip_ws()
+            if c is None:
+                if final and self._state != _END:
+                    raise self._error("more data")
+                return events
+
+            if self._state == _START:
+                if c != "{":
+                    raise self._error("'{'")
+                self._pos += 1
+                self._state = _KEY
+            elif self._state == _KEY:
+                if c == "}":
+                    self._pos += 1
+                    self._close_object()
+                    continue
+                if c != '"':
+                    raise self._error("property name enclosed in double quotes")
+                ok, self._key = self._decode(final)
+                if not ok:
+                    return events
+                self._state = _COLON
+            elif self._state == _COLON:
+                if c != ":":
+                    raise self._error("':' delimiter")
+                self._pos += 1
+                self._state = _VALUE
+            elif self._state == _VALUE:
+                depth = self._depth
+                if depth < len(self._path) and self._key == self._path[depth]:
+                    if depth == len(self._path) - 1 and c == "[":
+                        self._pos += 1
+                        self._state = _ITEM
+                        if self._skip_ws() == "]":
+                            self._pos += 1
+                            self._state = _AFTER_VALUE
+                        continue
+                    if depth < len(self._path) - 1 and c == "{":
+                        self._pos += 1
+                        self._depth += 1
+                        self._state = _KEY
+                        continue
+                ok, value = self._decode(final)
+                if not ok:
+                    return events
+                events.append((".".join(self._path[:depth] + (self._key,)), value))
+                self._state = _AFTER_VALUE
+            elif self._state == _AFTER_VALUE:
+                if c == ",":
+                    self._state = _KEY
+                    self._pos += 1
+                elif c == "}":
+                    self._pos += 1
+                    self._close_object()
+                else:
+                    raise self._error("',' delimiter")
+            elif self._state == _ITEM:
+                ok, value = self._decode(final)
+                if not ok:
+                    return events
+                events.append((None, value))
+                self._state = _AFTER_ITEM
+            elif self._state == _AFTER_ITEM:
+                if c == ",":
+                    self._state = _ITEM
+                elif c == "]":
+                    self._state = _AFTER_VALUE
+                else:
+                    raise self._error("',' delimiter")
+                self._pos += 1
+            else:
+                raise JSONDecodeError("Extra data", self._buf, self._pos)
+
+
+def iter_object(chunks: Iterable[bytes], stream_key: str = "data") -> Iterator[Event]:
+    """Parses the JSON object given as an iterable of byte chunks and yields the events
+    described in `ObjectStreamParser` as soon as they are complete.
+    """
+
+    parser = ObjectStreamParser(stream_key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.feed(b"", final=True)
+
+
+def check_stream_event(key: Optional[str], stream_key: str, path: str) -> None:
+    """Raises a ValueError if the streamed member (or one of the objects containing it) wasn't of the expected type."""
+
+    if key is not None and (key == stream_key or stream_key.startswith(key + ".")):
+        raise ValueError(f"Cannot stream {stream_key} of {path}: expected an array in an object")
+
+
+class EpisodeSplitter:
+    """Splits streamed `mediaEpisodeCombinedResponse` (or preview) pages into one response per episode,
+    with the `bohnen` of its hosts. Episodes are emitted as soon as they are parsed if the page
+    contains `bohnen` before `episodes`, otherwise at the end of the page.
+    """
+
+    def __init__(self) -> None:
+        self._bohnen: Optional[Dict[str, Any]] = None
+        self._extra: Dict[str, Any] = {}
+        self._pending: List[Dict[str, Any]] = []
+
+    def _split(self, episode: Dict[str, Any]) -> Dict[str, Any]:
+        bohnen = self._bohnen or {}
+        hosts = episode.get("hosts") or []
+        return {
+            **self._extra,
+            "bohnen": {mgmtid: bohnen[mgmtid] for mgmtid in map(str, hosts) if mgmtid in bohnen},
+            "episodes": [episode],
+        }
+
+    def feed(self, key: Optional[str], value: Any) -> List[Dict[str, Any]]:
+        """Takes the events of `rbtv.jsonstream.iter_object` for the stream key `data.episodes`."""
+
+        if key is None:
+            if self._bohnen is None:
+                self._pending.append(value)
+                return []
+            return [self._split(value)]
+
+        if key == "data.bohnen":
+            self._bohnen = value or {}
+            out = [self._split(episode) for episode in self._pending]
+            self._pending.clear()
+            return out
+        elif key.startswith("data."):
+            self._extra[key[len("data.") :]] = value
+        return []
+
+    def end_page(self) -> List[Dict[str, Any]]:
+        out = [self._split(episode) for episode in self._pending]
+        self._pending.clear()
+        self._bohnen = None
+        self._extra = {}
+        return out
@@ -0,0 +1,208 @@
+"""Per-request instrumentation and metrics.
+
+Every API call creates a `RequestEvent` which is passed to the pre-request hooks before the request
+and to the post-request hooks after it finished. `Metrics` aggregates the events into per-endpoint counters
+and latency histograms which can be exported in the Prometheus text format.
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# same as the default buckets of the Prometheus client libraries
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_numeric = re.compile(r"(?<=/)\d+(?=/|$)")
+_search = re.compile(r"^/v1/search/.+$")
+
+
+def endpoint_template(path: str) -> str:
+    """Replaces the variable parts of `path` by placeholders,
+    for example `/v1/media/episode/byshow/5` becomes `/v1/media/episode/byshow/{id}`.
+    """
+
+    if _search.match(path):
+        return "/v1/search/{query}"
+    return _numeric.sub("{id}", path)
+
+
+class RequestEvent:
+    """Information about a single API request.
+
+    `cache` is one of `hit` (served from the response cache), `coalesced` (shared the response of a
+    concurrent identical request), `store` (assembled from the entity store), `miss`,
+    `revalidated` (the server confirmed the cached response), `stream` (streamed, bypasses the cache)
+    or `bypass` (not cacheable, for example PATCH).
+    `status`, `bytes`, `latency` and `retries` are only meaningful after the request finished.
+    For streamed responses, `latency` is the time until the response headers were received.
+    """
+
+    __slots__ = ("method", "endpoint", "url", "status", "bytes", "latency", "cache", "retries", "error", "start")
+
+    def __init__(self, method: str, endpoint: str, url: str) -> None:
+        self.method = method
+        self.endpoint = endpoint
+        self.url = url
+        self.status: Optional[int] = None
+        self.bytes = 0
+        self.latency: Optional[float] = None
+        self.cache = "miss"
+        self.retries = 0
+        self.error: Optional[str] = None
+        self.start = perf_counter()
+
+    @property
+    def network(self) -> bool:
+        """True if the request was sent to the server."""
+
+        return self.cache not in ("hit", "coalesced", "store")
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if name != "start")
+        return f"RequestEvent({args})"
+
+
+PreRequestHook = Callable[[RequestEvent], None]
+PostRequestHook = Callable[[RequestEvent], None]
+
+
+def count_bytes(chunks: Iterable[bytes], event: RequestEvent) -> Iterator[bytes]:
+    """Passes through `chunks` and adds their size to `event.bytes`."""
+
+    for chunk in chunks:
+        event.bytes += len(chunk)
+        yield chunk
+
+
+class EndpointStats(NamedTuple):
+    endpoint: str
+    requests: int
+    network: int
+    errors: int
+    bytes: int
+    retries: int
+    latency_sum: float
+
+    @property
+    def mean_latency(self) -> float:
+        return self.latency_sum / self.network if self.network else 0.0
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, num_buckets: int) -> None:
+        self.counts = [0] * (num_buckets + 1)  # last bucket is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metrics:
+    """Thread-safe per-endpoint request counters and latency histograms.
+    Use `observe` as post-request hook (the API clients do this automatically for `api.metrics`).
+    Latencies are only recorded for requests which were sent to the server.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, str, str], int] = {}  # (endpoint, method, status, cache)
+        self._bytes: Dict[str, int] = {}
+        self._retries: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._histograms: Dict[str, _Histogram] = {}
+
+    def observe(self, event: RequestEvent) -> None:
+        endpoint = event.endpoint
+        key = (endpoint, event.method, "" if event.status is None else str(event.status), event.cache)
+
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._bytes[endpoint] = self._bytes.get(endpoint, 0) + event.bytes
+            self._retries[endpoint] = self._retries.get(endpoint, 0) + event.retries
+            if event.error is not None:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+            if event.network and event.latency is not None:
+                try:
+                    hist = self._histograms[endpoint]
+                except KeyError:
+                    hist = self._histograms[endpoint] = _Histogram(len(self.buckets))
+                hist.counts[bisect_left(self.buckets, event.latency)] += 1
+                hist.sum += event.latency
+                hist.count += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._requests.clear()
+            self._bytes.clear()
+            self._retries.clear()
+            self._errors.clear()
+            self._histograms.clear()
+
+    def stats(self) -> List[EndpointStats]:
+        """Returns the statistics of every endpoint, the ones with the highest total latency first."""
+
+        with self._lock:
+            requests: Dict[str, int] = {}
+            for (endpoint, _, _, _), num in self._requests.items():
+                requests[endpoint] = requests.get(endpoint, 0) + num
+            stats = [
+                EndpointStats(
+                    endpoint,
+                    num,
+                    self._histograms[endpoint].count if endpoint in self._histograms else 0,
+                    self._errors.get(endpoint, 0),
+                    self._bytes.get(endpoint, 0),
+                    self._retries.get(endpoint, 0),
+                    self._histograms[endpoint].sum if endpoint in self._histograms else 0.0,
+                )
+                for endpoint, num in requests.items()
+            ]
+        stats.sort(key=lambda s: s.latency_sum, reverse=True)
+        return stats
+
+    def to_prometheus(self, prefix: str = "rbtv") -> str:
+        """Exports the metrics in the Prometheus text exposition format."""
+
+        lines: List[str] = []
+
+        with self._lock:
+            lines.append(f"# HELP {prefix}_requests_total Number of API requests.")
+            lines.append(f"# TYPE {prefix}_requests_total counter")
+            for (endpoint, method, status, cache), num in sorted(self._requests.items()):
+                labels = _labels([("endpoint", endpoint), ("method", method), ("status", status), ("cache", cache)])
+                lines.append(f"{prefix}_requests_total{labels} {num}")
+
+            for name, description, values in (
+                ("response_bytes_total", "Bytes received.", self._bytes),
+                ("retries_total", "Number of retried requests.", self._retries),
+                ("errors_total", "Number of failed requests.", self._errors),
+            ):
+                lines.append(f"# HELP {prefix}_{name} {description}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for endpoint, num in sorted(values.items()):
+                    lines.append(f"{prefix}_{name}{_labels([('endpoint', endpoint)])} {num}")
+
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# HELP {name} Latency of requests sent to the server.")
+            lines.append(f"# TYPE {name} histogram")
+            for endpoint, hist in sorted(self._histograms.items()):
+                cumulative = 0
+                for le, num in zip((*map(repr, self.buckets), "+Inf"), hist.counts):
+                    cumulative += num
+                    lines.append(f"{name}_bucket{_labels([('endpoint', endpoint), ('le', le)])} {cumulative}")
+                lines.append(f"{name}_sum{_labels([('endpoint', endpoint)])} {hist.sum}")
+                lines.append(f"{name}_count{_labels([('endpoint', endpoint)])} {hist.count}")
+
+        return "\n".join(lines) + "\n"
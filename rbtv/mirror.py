@@ -0,0 +1,198 @@
+import json
+import logging
+import sqlite3
+from math import ceil
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from .rbtv import RBTVAPI
+from .records import to_json
+
+PAGE_SIZE = 50
+
+
+class SyncReport(NamedTuple):
+    requests: int
+    requests_saved: int
+    shows_updated: int
+    shows_unchanged: int
+    episodes_added: int
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=to_json)
+
+
+def _last_episode_key(show: Dict[str, Any]) -> Optional[str]:
+    """Returns a string which changes whenever a new episode of `show` is published."""
+
+    try:
+        episode = show["lastEpisode"]["episodes"][0]
+    except (KeyError, IndexError, TypeError):
+        return None
+    return f"{episode['id']}/{episode.get('distributionPublishingDate')}"
+
+
+class Mirror:
+    """Local SQLite copy of the Mediathek (shows, seasons, episodes and Bohnen).
+
+    The first `sync()` downloads everything. Later runs only fetch the episodes of shows
+    whose `lastEpisode` changed, newest first, and stop as soon as they reach an episode
+    which is already stored.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        with self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS shows (id INTEGER PRIMARY KEY, last_episode TEXT, data TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS seasons (
+                    id INTEGER PRIMARY KEY,
+                    show_id INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS episodes (
+                    id INTEGER PRIMARY KEY,
+                    show_id INTEGER NOT NULL,
+                    season_id INTEGER,
+                    published TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS episodes_show ON episodes (show_id, published);
+                CREATE TABLE IF NOT EXISTS bohnen (id INTEGER PRIMARY KEY, data TEXT NOT NULL);
+                """
+            )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "Mirror":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    # reading
+
+    def _iter(self, sql: str, params: Tuple = ()) -> Iterator[Dict[str, Any]]:
+        for (data,) in self._conn.execute(sql, params):
+            yield json.loads(data)
+
+    def shows(self) -> Iterator[Dict[str, Any]]:
+        return self._iter("SELECT data FROM shows ORDER BY id")
+
+    def seasons(self, show_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        if show_id is None:
+            return self._iter("SELECT data FROM seasons ORDER BY id")
+        return self._iter("SELECT data FROM seasons WHERE show_id=? ORDER BY id", (show_id,))
+
+    def episodes(self, show_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        if show_id is None:
+            return self._iter("SELECT data FROM episodes ORDER BY published, id")
+        return self._iter("SELECT data FROM episodes WHERE show_id=? ORDER BY published, id", (show_id,))
+
+    def bohnen(self) -> Iterator[Dict[str, Any]]:
+        return self._iter("SELECT data FROM bohnen ORDER BY id")
+
+    def count(self, table: str) -> int:
+        if table not in {"shows", "seasons", "episodes", "bohnen"}:
+            raise ValueError(f"Invalid table: {table}")
+        (num,) = self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()  # nosec
+        return num
+
+    # syncing
+
+    def _sync_episodes(self, api: RBTVAPI, show_id: int) -> Tuple[int, int]:
+        """Fetches episodes of the given show newest first until an already stored episode is reached.
+        Returns the number of requests and the number of new episodes.
+        """
+
+        known = {_id for (_id,) in self._conn.execute("SELECT id FROM episodes WHERE show_id=?", (show_id,))}
+
+        requests = 0
+        added = 0
+        pages = api.get_episodes_by_show(show_id, order="DESC", workers=1)
+        try:
+            for page in pages:
+                requests += 1
+                reached_known = False
+                for episode in page["episodes"]:
+                    if episode["id"] in known:
+                        reached_known = True
+                        continue
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?)",
+                        (
+                            episode["id"],
+                            show_id,
+                            episode.get("seasonId"),
+                            episode.get("distributionPublishingDate"),
+                            _dumps(episode),
+                        ),
+                    )
+                    added += 1
+                if reached_known:
+                    break
+        finally:
+            pages.close()
+
+        return requests, added
+
+    def sync(self, api: RBTVAPI) -> SyncReport:
+        """Brings the mirror up to date and returns statistics about the run.
+        `requests_saved` is the number of requests a full recrawl would have needed in addition.
+        """
+
+        # the mirror needs current data, not whatever is left in the response cache
+        for path in ("/v1/bohne/portrait/all", "/v1/media/show/all", "/v1/media/episode/byshow/"):
+            api.invalidate(path)
+
+        requests = 0
+        full_crawl = 0
+        updated = 0
+        unchanged = 0
+        added = 0
+
+        with self._conn:
+            bohnen = api.get_bohnen_portraits()
+            requests += 1
+            full_crawl += 1
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO bohnen VALUES (?, ?)", ((bohne["mgmtid"], _dumps(bohne)) for bohne in bohnen)
+            )
+
+        stored = dict(self._conn.execute("SELECT id, last_episode FROM shows"))
+        num_shows = 0
+
+        for show in api.get_shows(workers=1):
+            num_shows += 1
+            show_id = show["id"]
+            last_episode = _last_episode_key(show)
+
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO shows VALUES (?, ?, ?)", (show_id, last_episode, _dumps(show))
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO seasons VALUES (?, ?, ?)",
+                    ((season["id"], show_id, _dumps(season)) for season in show.get("seasons") or ()),
+                )
+
+                if show_id in stored and stored[show_id] == last_episode:
+                    unchanged += 1
+                else:
+                    logging.debug("Syncing episodes of show %s", show_id)
+                    num_requests, num_added = self._sync_episodes(api, show_id)
+                    requests += num_requests
+                    added += num_added
+                    updated += 1
+
+            (num_episodes,) = self._conn.execute("SELECT COUNT(*) FROM episodes WHERE show_id=?", (show_id,)).fetchone()
+            full_crawl += max(1, ceil(num_episodes / PAGE_SIZE))
+
+        pages = max(1, ceil(num_shows / PAGE_SIZE))
+        requests += pages
+        full_crawl += pages
+
+        return SyncReport(requests, full_crawl - requests, updated, unchanged, added)
@@ -0,0 +1,100 @@
+"""Name lookups for shows, Bohnen and seasons."""
+
+from __future__ import annotations
+
+from time import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
+
+from .text import alphastring
+
+if TYPE_CHECKING:
+    from .fuzzy import TrigramIndex
+
+synonyms = {
+    "eddy": "etienne",
+}
+
+
+def name_of_season(season: Dict[str, Any], tpl: str = "Season {}", default: str = "") -> str:
+    if season["name"]:
+        return season["name"]
+    elif season["numeric"]:
+        return tpl.format(season["numeric"])
+    else:
+        return default
+
+
+class NameIndex:
+    """Maps normalized names to ids for O(1) lookups.
+    The index is (re)built using `update()` and considered expired `ttl` seconds afterwards.
+    Lookups also accept the aliases from `synonyms`.
+    """
+
+    def __init__(self, name_key: str, id_key: str, kind: str, ttl: float = 3600, synonyms: Dict[str, str] = synonyms):
+        self.name_key = name_key
+        self.id_key = id_key
+        self.kind = kind
+        self.ttl = ttl
+        self.synonyms = synonyms
+        self._index: Dict[str, int] = {}
+        self._expires = 0.0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def expired(self) -> bool:
+        return time() >= self._expires
+
+    def update(self, items: Iterable[Dict[str, Any]]) -> None:
+        index = {alphastring(item[self.name_key]): int(item[self.id_key]) for item in items}
+        for alias, name in self.synonyms.items():
+            if name in index:
+                index.setdefault(alias, index[name])
+        self._index = index  # swap atomically so concurrent lookups never see a partial index
+        self._expires = time() + self.ttl
+
+    def lookup(self, name: str) -> int:
+        try:
+            return self._index[alphastring(name)]
+        except KeyError:
+            raise ValueError(f"Could not find {self.kind} {name!r}")
+
+    def names_to_ids(self, names: Iterable[str]) -> List[int]:
+        """Resolves all `names` in a single pass. Raises a ValueError listing all unknown names."""
+
+        index = self._index
+        ids = []
+        missing = []
+        for name in names:
+            _id = index.get(alphastring(name))
+            if _id is None:
+                missing.append(name)
+            else:
+                ids.append(_id)
+
+        if missing:
+            raise ValueError(f"Could not find {self.kind} {', '.join(map(repr, missing))}")
+
+        return ids
+
+
+def fill_fuzzy_index(index: TrigramIndex, kind: str, items: Iterable[Dict[str, Any]]) -> TrigramIndex:
+    """Adds shows (`mediaShowPreviewMiniResponse` or richer), Bohnen (`bohnePortrait`)
+    or the seasons of shows (`mediaShowResponse`) to `index`.
+    """
+
+    if kind == "show":
+        for show in items:
+            index.add(show["title"], (kind, int(show["id"]), show["title"]))
+    elif kind == "bohne":
+        for bohne in items:
+            index.add(bohne["name"], (kind, int(bohne["mgmtid"]), bohne["name"]))
+    elif kind == "season":
+        for show in items:
+            for season in show["seasons"]:
+                name = f"{show['title']} {name_of_season(season)}"
+                index.add(name, (kind, int(season["id"]), name))
+    else:
+        raise ValueError(f"Invalid kind: {kind}")
+
+    return index
@@ -0,0 +1,110 @@
+"""Client-side rate limiting and retry delays for throttled requests."""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUS = frozenset({429, 503})
+
+
+class RateLimiter:
+    """Thread-safe token bucket which adapts its rate to the server.
+
+    Requests are allowed at `rate` per second on average, with bursts of up to `burst` requests.
+    `throttled()` multiplies the rate by `decrease` (down to `min_rate`),
+    every `succeeded()` raises it by `increase` (up to `max_rate`), so the rate settles
+    just below the point where the server starts throttling.
+    One limiter can be shared by several clients.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: int = 10,
+        min_rate: float = 0.2,
+        max_rate: float = 50.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError("rate must be between min_rate and max_rate")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def reserve(self) -> float:
+        """Takes a token and returns the number of seconds the caller has to wait before sending the request."""
+
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = max(0.0, -self._tokens / self.rate)
+            return max(wait, self._paused_until - now)
+
+    def acquire(self) -> None:
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        import asyncio  # only needed by the asyncio client, keeps `import rbtv` fast
+
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def throttled(self, pause: float = 0.0) -> None:
+        """Lowers the rate and makes all callers wait for at least `pause` seconds."""
+
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            self._paused_until = max(self._paused_until, self.clock() + pause)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Parses a `Retry-After` header (seconds or an HTTP date) to the number of seconds to wait."""
+
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date is None:
+        return None
+    return max(0.0, date.timestamp() - (time.time() if now is None else now))
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the zero-based `attempt`."""
+
+    return random.uniform(0, min(cap, base * 2**attempt))  # nosec
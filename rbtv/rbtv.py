@@ -1,66 +1,80 @@
+from __future__ import annotations
+
 import logging
-import re
-from datetime import datetime, timedelta
-from functools import lru_cache
-from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from functools import partial
+from itertools import islice
+from time import perf_counter, sleep, time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 from urllib.parse import quote, urlencode, urlunsplit
 
 import requests
+import requests.adapters
 from genutility.exceptions import assert_choice
 from requests.exceptions import HTTPError  # noqa: F401
 
-from .types import (
-    IRBTVEvent,
-    IRBTVEventTeam,
-    blogPreviewResponse,
-    blogResponse,
-    bohnePortrait,
-    bohneResponse,
-    cmsPageResponse,
-    cmsRouteResponse,
-    entityUserResponse,
-    frontendInitResponse,
-    mediaEpisodeCombinedResponse,
-    mediaEpisodePreviewCombinedResponse,
-    mediaSeasonResponse,
-    mediaShowPreviewMiniResponse,
-    mediaShowPreviewResponse,
-    mediaShowResponse,
-    schedule,
-    simpleShopItem,
-    streamCount,
-    subscriptionDefaultResponse,
-    subscriptionListResponse,
-    subscriptionResponse,
-)
+from .bulk import BulkResult
+from .cache import DEFAULT_TTLS, BaseCache, CacheEntry, MemoryCache, copy_json, ttl_for_path
+from .decoders import get_decoder
+from .jsonstream import EpisodeSplitter, check_stream_event, iter_object
+from .metrics import Metrics, PostRequestHook, PreRequestHook, RequestEvent, count_bytes, endpoint_template
+from .names import NameIndex, fill_fuzzy_index, name_of_season, synonyms  # noqa: F401
+from .ratelimit import RETRY_STATUS, THROTTLE_STATUS, RateLimiter, backoff_delay, parse_retry_after
+from .schedule import day_starts, schedule_date, schedule_windows
+from .seasons import SeasonIndex
+from .singleflight import SingleFlight
+from .text import alphastring
+
+if TYPE_CHECKING:
+    from .cassette import Cassette
+    from .fuzzy import NameMatch, TrigramIndex
+    from .searchindex import SearchIndex
+    from .store import EntityStore
+    from .types import (
+        IRBTVEvent,
+        IRBTVEventTeam,
+        blogPreviewResponse,
+        blogResponse,
+        bohnePortrait,
+        bohneResponse,
+        cmsPageResponse,
+        cmsRouteResponse,
+        entityUserResponse,
+        frontendInitResponse,
+        mediaEpisodeCombinedResponse,
+        mediaEpisodePreviewCombinedResponse,
+        mediaSeasonResponse,
+        mediaShowPreviewMiniResponse,
+        mediaShowPreviewResponse,
+        mediaShowResponse,
+        schedule,
+        searchResultResonse,
+        simpleShopItem,
+        streamCount,
+        subscriptionDefaultResponse,
+        subscriptionListResponse,
+        subscriptionResponse,
+    )
 
 T = TypeVar("T")
 
-alpha = re.compile("[^a-z]+")
-try:
-    from unidecode import unidecode
-
-    def alphastring(s: str) -> str:
-        return alpha.sub("", unidecode(s).lower())
-
-except ImportError:
-    from unicodedata import normalize
-
-    def alphastring(s: str) -> str:
-        return alpha.sub(
-            "",
-            normalize("NFKD", s).casefold().encode("ascii", "ignore").decode("ascii"),
-        )
-
-
-def name_of_season(season: Dict[str, Any], tpl: str = "Season {}", default: str = "") -> str:
-    if season["name"]:
-        return season["name"]
-    elif season["numeric"]:
-        return tpl.format(season["numeric"])
-    else:
-        return default
-
 
 def oauth_required(scope=None):
     def decorator(func: Callable):
@@ -77,11 +91,6 @@ def batch_iter(batchit: Iterable[Dict[str, Iterable[T]]], key: str) -> Iterator[
         yield from batch[key]
 
 
-synonyms = {
-    "eddy": "etienne",
-}
-
-
 def bohne_name_to_id(bohnen: Iterable[Dict[str, Any]], bohne_name: str) -> int:
     pp_name = alphastring(bohne_name)
     d = {alphastring(bohne["name"]): int(bohne["mgmtid"]) for bohne in bohnen}
@@ -100,56 +109,606 @@ def show_name_to_id(shows: Iterable[Dict[str, Any]], show_name: str) -> int:
         raise ValueError(f"Could not find show {show_name!r}")
 
 
-class API:
+def _identity(x: T) -> T:
+    return x
+
+
+class BaseAPI:
+    """Configuration and helpers shared by the blocking and the asyncio client."""
+
     netloc = "api.rocketbeans.tv"
 
-    def __init__(self, timeout: int = 60, scheme: str = "https") -> None:
+    def __init__(
+        self,
+        timeout: int = 60,
+        scheme: str = "https",
+        cache: Optional[BaseCache] = None,
+        cache_size: int = 1024,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 300,
+        decoder: str = "auto",
+        records: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        metrics: Optional[Metrics] = None,
+        store: Optional[EntityStore] = None,
+    ) -> None:
+        """Response bodies are decoded from bytes using `decoder` (see `rbtv.decoders.get_decoder`).
+        If `records` is true, episodes, shows and seasons are returned as immutable `rbtv.records`
+        objects instead of dicts, which need much less memory.
+        Responses of GET requests are cached in `cache` (by default an in-memory LRU cache
+        with `cache_size` entries, use `rbtv.cache.SqliteCache` for a persistent cache).
+        The time-to-live of an entry is looked up by the longest matching path prefix in `ttls`
+        (which is merged with `rbtv.cache.DEFAULT_TTLS`), or `default_ttl` if there is none.
+        A TTL of 0 disables caching for that path. Expired entries are revalidated with a conditional
+        request if the server sent an `ETag` or `Last-Modified` header.
+        GET requests which fail with 429 or 5xx are retried up to `retries` times, waiting as long as
+        the `Retry-After` header says or using exponential backoff with jitter (`backoff` * 2^attempt
+        seconds at most, capped at `max_backoff`). If a `rbtv.ratelimit.RateLimiter` is given,
+        all requests wait for it and it adapts its rate to the responses.
+        Every request is recorded in `metrics` (a new `rbtv.metrics.Metrics` by default) and passed to the
+        callables in `pre_request_hooks` and `post_request_hooks` as `rbtv.metrics.RequestEvent`.
+        If a `rbtv.store.EntityStore` is given, all received shows, episodes, Bohnen and routes are merged
+        into it and single-item requests are answered from it when it holds the same or richer data.
+        """
+
         self.timeout = timeout
         self.scheme = scheme
-
-    @lru_cache(maxsize=128)
-    def _request(self, path: str, **params: Any) -> Dict[str, Any]:
-        query = urlencode(params)
+        self.cache = MemoryCache(cache_size) if cache is None else cache
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self._loads = get_decoder(decoder)
+        self.records = records
+        self.rate_limiter = rate_limiter
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.metrics = Metrics() if metrics is None else metrics
+        self.store = store
+        self.pre_request_hooks: List[PreRequestHook] = []
+        self.post_request_hooks: List[PostRequestHook] = []
+
+    def _url(self, path: str, params: Optional[Dict[str, Any]] = None) -> str:
+        query = urlencode(sorted(params.items())) if params else ""
         parts = (self.scheme, self.netloc, path, query, "")
-        url = urlunsplit(parts)
+        return urlunsplit(parts)
 
-        logging.debug("GET %s", url)
-        r = requests.get(url, timeout=self.timeout)
-        r.raise_for_status()
-        return r.json()
+    def _record_converter(self, record: Optional[str]) -> Callable[[Any], Any]:
+        if self.records and record is not None:
+            from .records import to_record
 
-    def _patch_request(self, path: str, body: Dict[str, Any]) -> Any:
-        parts = (self.scheme, self.netloc, path, "", "")
-        url = urlunsplit(parts)
+            return partial(to_record, name=record)
+        return _identity
+
+    def _cache_get(self, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[CacheEntry]]:
+        """Returns the cached data if the entry is fresh, otherwise the (possibly stale) cache entry,
+        which can be revalidated using `entry.conditional_headers()`.
+        """
+
+        entry = self.cache.get(url)
+        if entry is None:
+            return None, None
+        if not entry.fresh():
+            return None, entry
+        return self._cache_copy(entry.data), entry
+
+    def _cache_copy(self, data: Any) -> Any:
+        return data if self.cache.returns_copies else copy_json(data)
+
+    def _cache_set(
+        self, url: str, path: str, data: Dict[str, Any], etag: Optional[str] = None, last_modified: Optional[str] = None
+    ) -> None:
+        ttl = ttl_for_path(self.ttls, path, self.default_ttl)
+        if ttl > 0:
+            self.cache.set(url, CacheEntry(copy_json(data), time() + ttl, etag, last_modified))
+
+    def _cache_revalidated(self, url: str, path: str, entry: CacheEntry) -> Dict[str, Any]:
+        """Extends the lifetime of a stale `entry` after the server confirmed it's still valid."""
+
+        ttl = ttl_for_path(self.ttls, path, self.default_ttl)
+        self.cache.set(url, entry._replace(expires=time() + ttl))
+        return self._cache_copy(entry.data)
+
+    def _store_ingest(self, path: str, res: Any) -> None:
+        if self.store is not None and isinstance(res, dict):
+            self.store.ingest(path, res.get("data"))
+
+    def _store_serve(self, path: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.store is None or any(value is not None for value in params.values()):
+            return None
+        data = self.store.serve(path, ttl_for_path(self.ttls, path, self.default_ttl))
+        return None if data is None else {"success": True, "data": data}
+
+    def _start_event(self, method: str, path: str, url: str) -> RequestEvent:
+        event = RequestEvent(method, endpoint_template(path), url)
+        for hook in self.pre_request_hooks:
+            hook(event)
+        return event
+
+    def _finish_event(self, event: RequestEvent) -> None:
+        if event.latency is None:
+            event.latency = perf_counter() - event.start
+        self.metrics.observe(event)
+        for hook in self.post_request_hooks:
+            hook(event)
+
+    def _retry_delay(self, attempt: int, status: int, headers: Mapping[str, str]) -> Optional[float]:
+        """Returns the number of seconds to wait before retrying a request which returned `status`,
+        or None if it shouldn't be retried. Updates the rate limiter.
+        """
+
+        limiter = self.rate_limiter
+        if status not in RETRY_STATUS:
+            if limiter is not None and status < 400:
+                limiter.succeeded()
+            return None
+
+        delay = parse_retry_after(headers.get("Retry-After"))
+        if delay is None:
+            delay = backoff_delay(attempt, self.backoff, self.max_backoff)
+        if limiter is not None and status in THROTTLE_STATUS:
+            limiter.throttled(delay)
+
+        if attempt >= self.retries:
+            return None
+        return delay
+
+    def _schedule_url(self, day: datetime) -> str:
+        return self._url("/v1/schedule/normalized/day", {"startDay": day.timestamp()})
+
+    def _schedule_cached(self, days: List[datetime]) -> Tuple[Dict[date, List[schedule]], List[datetime]]:
+        """Returns the cached schedule days and the days which are missing from the cache."""
+
+        found: Dict[date, List[schedule]] = {}
+        missing: List[datetime] = []
+        for day in days:
+            data, _ = self._cache_get(self._schedule_url(day))
+            if data is None:
+                missing.append(day)
+            else:
+                found[day.date()] = data
+        return found, missing
+
+    def _schedule_store(self, window: List[datetime], res: List[schedule], found: Dict[date, List[schedule]]) -> None:
+        """Assigns the schedule days of the response `res` to the days of `window` and caches each day.
+        Days outside of the window (the API may include the days at the boundaries) and repeated days are dropped.
+        If several API days fall on the same calendar day (the API's day boundaries don't have to match
+        the timezone of `window`), all of them are kept.
+        """
+
+        tzinfo = window[0].tzinfo
+        buckets: Dict[date, List[schedule]] = {day.date(): [] for day in window}
+        for item in res:
+            bucket = buckets.get(schedule_date(item, tzinfo))
+            if bucket is None or any(other["date"] == item["date"] for other in bucket):
+                continue
+            if bucket:
+                logging.warning(
+                    "Schedule days %s and %s fall on the same calendar day", bucket[-1]["date"], item["date"]
+                )
+            bucket.append(item)
+
+        for day in window:
+            data = buckets[day.date()]
+            self._cache_set(self._schedule_url(day), "/v1/schedule/normalized", data)
+            found[day.date()] = data
+
+    def _cached(self, path: str, params: Optional[Dict[str, Any]] = None) -> bool:
+        """Returns True if there is a fresh cached response for `path`."""
+
+        entry = self.cache.get(self._url(path, params))
+        return entry is not None and entry.fresh()
+
+    def invalidate(self, path: str = "") -> int:
+        """Removes all cached responses for paths starting with `path`
+        (or all cached responses if `path` is empty). Returns the number of removed entries.
+        The entities of `store` which could be served for these paths are removed as well.
+        """
+
+        if self.store is not None:
+            self.store.invalidate(path)
+        return self.cache.invalidate(self._url(path) if path else "")
+
+
+class API(BaseAPI):
+    def __init__(
+        self,
+        timeout: int = 60,
+        scheme: str = "https",
+        pool_connections: int = 1,
+        pool_maxsize: int = 10,
+        keep_alive: bool = True,
+        page_workers: int = 1,
+        stream: bool = False,
+        cache: Optional[BaseCache] = None,
+        cache_size: int = 1024,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 300,
+        decoder: str = "auto",
+        records: bool = False,
+        rate_limiter: Optional[RateLimiter] = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        metrics: Optional[Metrics] = None,
+        cassette: Optional[Cassette] = None,
+        store: Optional[EntityStore] = None,
+    ) -> None:
+        """`pool_connections` is the number of hosts to keep connection pools for,
+        `pool_maxsize` the maximum number of connections kept open per host.
+        The pool is shared by all endpoint methods. Use `close()` or a `with` block
+        to release the connections when the client is not needed anymore.
+        `page_workers` is the default number of pages of paginated endpoints which are requested
+        concurrently. It can be overridden per call using the `workers` argument.
+        If `stream` is true, the items of paginated endpoints are parsed incrementally
+        while the response is received, so memory usage doesn't depend on the page size.
+        Paged episode endpoints then yield one page per episode (see `_request_paged`).
+        See `BaseAPI` for the cache, decoder, records, rate limiting, retry, metrics and store arguments.
+        Concurrent identical GET requests are coalesced into a single HTTP request.
+        If a `rbtv.cassette.Cassette` is given, responses are recorded to or replayed from it.
+        """
+
+        super().__init__(
+            timeout,
+            scheme,
+            cache,
+            cache_size,
+            ttls,
+            default_ttl,
+            decoder,
+            records,
+            rate_limiter,
+            retries,
+            backoff,
+            max_backoff,
+            metrics,
+            store,
+        )
+        self.page_workers = page_workers
+        self.stream = stream
+        self.stream_chunk_size = 64 * 1024
+        self._flights: SingleFlight[Dict[str, Any]] = SingleFlight()
+
+        self.session = requests.Session()
+        adapter: requests.adapters.BaseAdapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        if cassette is not None:
+            from .cassette import CassetteAdapter
+
+            adapter = CassetteAdapter(cassette, adapter)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def close(self) -> None:
+        """Closes all pooled connections."""
+
+        self.session.close()
+        self.cache.close()
+
+    def __enter__(self) -> "API":
+        return self
 
-        logging.debug("PATCH %s", url)
-        r = requests.patch(url, json=body, timeout=self.timeout)
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _request(self, path: str, refresh: bool = False, **params: Any) -> Dict[str, Any]:
+        """Sends a GET request to `path`, unless it can be answered from the response cache or the entity store.
+        If `refresh` is true, the request is sent even then (conditionally, if a cached response exists)
+        and its response replaces the cached one.
+        """
+
+        url = self._url(path, params)
+        event = self._start_event("GET", path, url)
+
+        try:
+            if not refresh:
+                res, entry = self._cache_get(url)
+                if res is not None:
+                    event.cache = "hit"
+                    return res
+
+                res = self._store_serve(path, params)
+                if res is not None:
+                    event.cache = "store"
+                    return res
+
+            def fetch() -> Dict[str, Any]:
+                event.cache = "miss"
+                return self._fetch(url, path, event, refresh)
+
+            # concurrent requests for the same url wait for the first one instead of sending their own.
+            # `fetch` only runs for the first one, the others are reported as "coalesced".
+            # refreshing requests don't join normal ones, which might be answered from the cache
+            event.cache = "coalesced"
+            res, shared = self._flights.do((url, refresh), fetch)
+            if shared:
+                # every caller of a shared result gets its own copy, including the one which fetched it
+                return copy_json(res)
+            return res
+        except Exception as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            self._finish_event(event)
+
+    def _fetch(self, url: str, path: str, event: RequestEvent, refresh: bool = False) -> Dict[str, Any]:
+        if refresh:
+            entry = self.cache.get(url)
+        else:
+            res, entry = self._cache_get(url)
+            if res is not None:
+                event.cache = "hit"
+                return res
+
+        headers = entry.conditional_headers() if entry is not None else None
+        r = self._get(url, event, headers=headers)
+        if r.status_code == 304 and entry is not None:
+            event.cache = "revalidated"
+            res = self._cache_revalidated(url, path, entry)
+            self._store_ingest(path, res)
+            return res
         r.raise_for_status()
-        res = r.json()
+        event.bytes = len(r.content)
+        res = self._loads(r.content)
+        self._cache_set(url, path, res, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        self._store_ingest(path, res)
+        return res
+
+    def _get(self, url: str, event: RequestEvent, **kwargs: Any) -> requests.Response:
+        """Sends a GET request, waiting for the rate limiter and retrying throttled or failed requests."""
+
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            logging.debug("GET %s", url)
+            r = self.session.get(url, timeout=self.timeout, **kwargs)
+            event.status = r.status_code
+            delay = self._retry_delay(event.retries, r.status_code, r.headers)
+            if delay is None:
+                return r
+            r.close()
+            logging.warning("GET %s failed with status %d, retrying in %.1f seconds", url, r.status_code, delay)
+            sleep(delay)
+            event.retries += 1
+
+    def _patch_request(self, path: str, body: Dict[str, Any]) -> Any:
+        url = self._url(path)
+        event = self._start_event("PATCH", path, url)
+        event.cache = "bypass"
+
+        try:
+            logging.debug("PATCH %s", url)
+            r = self.session.patch(url, json=body, timeout=self.timeout)
+            event.status = r.status_code
+            r.raise_for_status()
+            event.bytes = len(r.content)
+            res = self._loads(r.content)
+        except Exception as e:
+            event.error = type(e).__name__
+            raise
+        finally:
+            self._finish_event(event)
 
         assert res["success"]
         return res["data"]
 
-    def _request_paged(self, path: str, limit: int, flat: bool = True, **params: Any) -> Iterator[Any]:
+    def _pages_serial(self, path: str, limit: int, params: Dict[str, Any], refresh: bool = False) -> Iterator[Any]:
         offset = 0
         total = limit
 
         while offset < total:
-            res = self._request(path, offset=offset, limit=limit, **params)
+            res = self._request(path, refresh=refresh, offset=offset, limit=limit, **params)
             total = res["pagination"]["total"]
             assert res["success"]
+            yield res["data"]
+            offset += limit
+
+    def _events_streamed(self, path: str, limit: int, params: Dict[str, Any], stream_key: str) -> Iterator[Any]:
+        """Like `_pages_serial`, but yields the `rbtv.jsonstream.iter_object` events of each page
+        while the response body is still being received, and `("", None)` after each page.
+        Streamed responses bypass the cache, because caching them would keep the whole page in memory.
+        """
+
+        offset = 0
+        total = limit
+
+        while offset < total:
+            url = self._url(path, {**params, "offset": offset, "limit": limit})
+            event = self._start_event("GET", path, url)
+            event.cache = "stream"
+            success = False
+
+            try:
+                with self._get(url, event, stream=True) as r:
+                    event.latency = perf_counter() - event.start
+                    r.raise_for_status()
+                    chunks = count_bytes(r.iter_content(self.stream_chunk_size), event)
+                    for key, value in iter_object(chunks, stream_key):
+                        if key == "pagination":
+                            total = value["total"]
+                        elif key == "success":
+                            success = value
+                        else:
+                            check_stream_event(key, stream_key, path)
+                            yield key, value
+            except Exception as e:
+                event.error = type(e).__name__
+                raise
+            finally:
+                self._finish_event(event)
+
+            assert success
+            yield "", None
+            offset += limit
+
+    def _items_streamed(self, path: str, limit: int, params: Dict[str, Any]) -> Iterator[Any]:
+        """Yields the items of the `data` array of each page while it's being received.
+        Every item is passed to `_store_ingest` like a page with a single item.
+        """
+
+        for key, value in self._events_streamed(path, limit, params, "data"):
+            if key is None:
+                self._store_ingest(path, {"data": [value]})
+                yield value
+
+    def _episodes_streamed(self, path: str, limit: int, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yields one combined response per episode of each page while it's being received.
+        Every one is passed to `_store_ingest` like a page.
+        """
+
+        splitter = EpisodeSplitter()
+        for key, value in self._events_streamed(path, limit, params, "data.episodes"):
+            for page in splitter.end_page() if key == "" else splitter.feed(key, value):
+                self._store_ingest(path, {"data": page})
+                yield page
+
+    def _pages_parallel(
+        self, path: str, limit: int, workers: int, params: Dict[str, Any], refresh: bool = False
+    ) -> Iterator[Any]:
+        """Requests the first page to learn the total and then keeps up to `workers` of the
+        remaining pages in flight. Pages are yielded in offset order.
+        """
 
+        res = self._request(path, refresh=refresh, offset=0, limit=limit, **params)
+        total = res["pagination"]["total"]
+        assert res["success"]
+        yield res["data"]
+
+        offsets = iter(range(limit, total, limit))
+        pending: Deque[Future] = deque()
+
+        with ThreadPoolExecutor(workers) as executor:
+
+            def submit(n: int) -> None:
+                for offset in islice(offsets, n):
+                    pending.append(
+                        executor.submit(self._request, path, refresh=refresh, offset=offset, limit=limit, **params)
+                    )
+
+            try:
+                submit(workers)
+                while pending:
+                    res = pending.popleft().result()
+                    assert res["success"]
+                    submit(1)
+                    yield res["data"]
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _request_paged(
+        self,
+        path: str,
+        limit: int,
+        flat: bool = True,
+        workers: Optional[int] = None,
+        stream: Optional[bool] = None,
+        record: Optional[str] = None,
+        refresh: bool = False,
+        **params: Any,
+    ) -> Iterator[Any]:
+        """Yields all items (`flat=True`) or pages (`flat=False`) of a paginated endpoint.
+        If `workers` (or the client-wide `page_workers`) is larger than 1,
+        pages after the first one are fetched concurrently.
+        If `stream` (or the client-wide `stream`) is true, items are parsed and yielded one by one
+        while the page is downloading. They bypass the response cache, but are written to the entity store
+        and search index. For `flat=False` the pages must be `mediaEpisodeCombinedResponse` (or preview) objects.
+        Streaming changes the shape of the yielded pages: each page is split into one page per episode
+        (see `rbtv.jsonstream.EpisodeSplitter`), because yielding whole pages would require parsing them
+        completely first.
+        If the client was created with `records=True`, items (or pages) are converted
+        to records of the TypedDict named `record`.
+        If `refresh` is true, cached pages are not used (see `_request`).
+        """
+
+        convert = self._record_converter(record)
+
+        if self.stream if stream is None else stream:
             if flat:
-                yield from res["data"]
+                yield from map(convert, self._items_streamed(path, limit, params))
             else:
-                yield res["data"]
+                yield from map(convert, self._episodes_streamed(path, limit, params))
+            return
 
-            offset += limit
+        workers = workers or self.page_workers
+        if workers > 1:
+            pages = self._pages_parallel(path, limit, workers, params, refresh)
+        else:
+            pages = self._pages_serial(path, limit, params, refresh)
 
-    def _request_single(self, path: str, **params: Any) -> Any:
+        for data in pages:
+            if flat:
+                yield from map(convert, data)
+            else:
+                yield convert(data)
+
+    def _request_single(self, path: str, record: Optional[str] = None, **params: Any) -> Any:
         res = self._request(path, **params)
         assert res["success"]
-        return res["data"]
+        return self._record_converter(record)(res["data"])
+
+    def _bulk_result(self, path: str, _id: int, record: Optional[str]) -> BulkResult:
+        try:
+            return BulkResult(_id, self._request_single(path.format(_id), record))
+        except Exception as e:
+            return BulkResult(_id, None, e)
+
+    def _request_bulk(
+        self, path: str, ids: Iterable[int], workers: int, ordered: bool, record: Optional[str] = None
+    ) -> Iterator[BulkResult]:
+        """Requests `path` (with `{}` replaced by the id) for all `ids`, keeping up to `workers` requests in flight.
+        Ids whose responses are cached are answered without using a worker, duplicate ids are skipped.
+        Results are yielded in the order of `ids` if `ordered` is true, otherwise as soon as they complete.
+        """
+
+        it = iter(ids)
+        seen: Set[int] = set()
+        pending: Deque[Tuple[Future, bool]] = deque()  # (future, sent to the server)
+        in_flight = 0
+
+        with ThreadPoolExecutor(workers) as executor:
+            try:
+                while True:
+                    for _id in it if in_flight < workers else ():
+                        if _id in seen:
+                            continue
+                        seen.add(_id)
+
+                        if self._cached(path.format(_id)):
+                            res = self._bulk_result(path, _id, record)
+                            if ordered and pending:
+                                future: Future = Future()
+                                future.set_result(res)
+                                pending.append((future, False))
+                            else:
+                                yield res
+                        else:
+                            pending.append((executor.submit(self._bulk_result, path, _id, record), True))
+                            in_flight += 1
+                            if in_flight >= workers:
+                                break
+
+                    if not pending:
+                        break
+
+                    if ordered:
+                        future, network = pending.popleft()
+                    else:
+                        done = next(as_completed(f for f, _ in pending))
+                        future, network = next(item for item in pending if item[0] is done)
+                        pending.remove((future, network))
+
+                    if network:
+                        in_flight -= 1
+                    yield future.result()
+            finally:
+                for future, _ in pending:
+                    future.cancel()
 
     # Blog
 
@@ -183,6 +742,13 @@ class API:
 
         return self._request_single(f"/v1/bohne/{mgmtid}")
 
+    def get_bohnen(self, mgmtids: Iterable[int], workers: int = 8, ordered: bool = True) -> Iterator[BulkResult]:
+        """Returns information about the given team members, requesting up to `workers` at the same time.
+        See `get_episodes` for details.
+        """
+
+        return self._request_bulk("/v1/bohne/{}", mgmtids, workers, ordered)
+
     def get_bohne_portrait(self, mgmtid: int) -> bohnePortrait:
         """Returns reduced information about a given team member."""
 
@@ -211,32 +777,84 @@ class API:
 
     # Mediathek Episode
 
-    def get_episodes_by_bohne(self, bohne_id: int, order: str = "ASC") -> Iterator[mediaEpisodeCombinedResponse]:
+    def get_episodes_by_bohne(
+        self, bohne_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> Iterator[mediaEpisodeCombinedResponse]:
         """Returns information about all episodes for the given Bohne."""
 
         assert_choice("order", order, {"ASC", "DESC"})
-        return self._request_paged(f"/v1/media/episode/bybohne/{bohne_id}", 50, False, order=order)
+        return self._request_paged(
+            f"/v1/media/episode/bybohne/{bohne_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodeCombinedResponse",
+        )
 
     def get_episode(self, episode_id: int) -> mediaEpisodeCombinedResponse:
         """Returns information about a single episode."""
 
-        return self._request_single(f"/v1/media/episode/{episode_id}")
+        return self._request_single(f"/v1/media/episode/{episode_id}", record="mediaEpisodeCombinedResponse")
 
-    def get_episodes_by_season(self, season_id: int, order: str = "ASC") -> Iterator[mediaEpisodeCombinedResponse]:
+    def get_episodes(self, episode_ids: Iterable[int], workers: int = 8, ordered: bool = True) -> Iterator[BulkResult]:
+        """Returns information about the given episodes, requesting up to `workers` at the same time.
+        Yields a `BulkResult` per id (duplicates are skipped), in the order of `episode_ids` if `ordered`
+        is true, otherwise as soon as they are available. If a request fails, the exception is returned
+        in `BulkResult.error` and the remaining ids are still requested. Cached responses don't need a worker.
+        """
+
+        return self._request_bulk(
+            "/v1/media/episode/{}", episode_ids, workers, ordered, record="mediaEpisodeCombinedResponse"
+        )
+
+    def get_episodes_by_season(
+        self, season_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> Iterator[mediaEpisodeCombinedResponse]:
         """Returns information about all episodes of a given season."""
 
         assert_choice("order", order, {"ASC", "DESC"})
-        return self._request_paged(f"/v1/media/episode/byseason/{season_id}", 50, False, order=order)
+        return self._request_paged(
+            f"/v1/media/episode/byseason/{season_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodeCombinedResponse",
+        )
 
-    def get_episodes_by_show(self, show_id: int, order: str = "ASC") -> Iterator[mediaEpisodeCombinedResponse]:
+    def get_episodes_by_show(
+        self, show_id: int, order: str = "ASC", workers: Optional[int] = None
+    ) -> Iterator[mediaEpisodeCombinedResponse]:
         """Returns information about all episodes for the given show."""
 
         assert_choice("order", order, {"ASC", "DESC"})
-        return self._request_paged(f"/v1/media/episode/byshow/{show_id}", 50, False, order=order)
+        return self._request_paged(
+            f"/v1/media/episode/byshow/{show_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodeCombinedResponse",
+        )
+
+    def get_newest_episodes_preview(
+        self, order: str = "ASC", workers: Optional[int] = None, refresh: bool = False
+    ) -> Iterator[mediaEpisodePreviewCombinedResponse]:
+        """Returns previews of all episodes ordered by publishing date.
+        If `refresh` is true, cached pages are not used.
+        """
 
-    def get_newest_episodes_preview(self, order: str = "ASC") -> Iterator[mediaEpisodePreviewCombinedResponse]:
         assert_choice("order", order, {"ASC", "DESC"})
-        return self._request_paged("/v1/media/episode/preview/newest", 50, False, order=order)
+        return self._request_paged(
+            "/v1/media/episode/preview/newest",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+            refresh=refresh,
+        )
 
     @oauth_required()
     def get_abobox_content_for_self(self) -> Iterator[mediaEpisodePreviewCombinedResponse]:
@@ -245,42 +863,67 @@ class API:
         return self._request_paged("/v1/media/abobox/self", 50, False)
 
     def get_unsorted_episodes_by_show(
-        self, show_id: int, order: str = "ASC"
+        self, show_id: int, order: str = "ASC", workers: Optional[int] = None
     ) -> Iterator[mediaEpisodePreviewCombinedResponse]:
         """Returns reduced information about all episodes of a given season."""
 
         assert_choice("order", order, {"ASC", "DESC"})
-        return self._request_paged(f"/v1/media/episode/byshow/unsorted/{show_id}", 50, False, order=order)
+        return self._request_paged(
+            f"/v1/media/episode/byshow/unsorted/{show_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+        )
 
     def get_episodes_by_bohne_preview(self, bohne_id: int, order: str = "ASC") -> mediaEpisodePreviewCombinedResponse:
         """Returns reduced information about all episodes for the given Bohne."""
 
         assert_choice("order", order, {"ASC", "DESC"})
-        return self._request_single(f"/v1/media/episode/bybohne/preview/{bohne_id}")
+        return self._request_single(
+            f"/v1/media/episode/bybohne/preview/{bohne_id}", record="mediaEpisodePreviewCombinedResponse"
+        )
 
     def get_episode_preview(self, episode_id: int) -> mediaEpisodePreviewCombinedResponse:
         """Returns reduced information about a single episode."""
 
-        return self._request_single(f"/v1/media/episode/preview/{episode_id}")
+        return self._request_single(
+            f"/v1/media/episode/preview/{episode_id}", record="mediaEpisodePreviewCombinedResponse"
+        )
 
     def get_episodes_by_season_preview(
-        self, season_id: int, order: str = "ASC"
+        self, season_id: int, order: str = "ASC", workers: Optional[int] = None
     ) -> Iterator[mediaEpisodePreviewCombinedResponse]:
         """Returns reduced information about all episodes of a given season."""
 
         assert_choice("order", order, {"ASC", "DESC"})
-        return self._request_paged(f"/v1/media/episode/byseason/preview/{season_id}", 50, False, order=order)
+        return self._request_paged(
+            f"/v1/media/episode/byseason/preview/{season_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+        )
 
     def get_episodes_by_show_preview(
-        self, show_id: int, order: str = "ASC"
+        self, show_id: int, order: str = "ASC", workers: Optional[int] = None
     ) -> Iterator[mediaEpisodePreviewCombinedResponse]:
         """Returns reduced information about all episodes for the given show."""
 
         assert_choice("order", order, {"ASC", "DESC"})
-        return self._request_paged(f"/v1/media/episode/byshow/preview/{show_id}", 50, False, order=order)
+        return self._request_paged(
+            f"/v1/media/episode/byshow/preview/{show_id}",
+            50,
+            False,
+            order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
+        )
 
     def get_unsorted_episodes_by_show_preview(
-        self, show_id: int, order: str = "ASC"
+        self, show_id: int, order: str = "ASC", workers: Optional[int] = None
     ) -> Iterator[mediaEpisodePreviewCombinedResponse]:
         """Returns reduced information about all unsorted (no season set)
         episodes for the given show.
@@ -292,36 +935,56 @@ class API:
             50,
             False,
             order=order,
+            workers=workers,
+            record="mediaEpisodePreviewCombinedResponse",
         )
 
     # Mediathek Show
 
-    def get_shows(self, sortby: str = "LastEpisode", only: Optional[str] = None) -> Iterator[mediaShowResponse]:
+    def get_shows(
+        self, sortby: str = "LastEpisode", only: Optional[str] = None, workers: Optional[int] = None
+    ) -> Iterator[mediaShowResponse]:
         assert_choice("sortby", sortby, {"LastEpisode"})
         assert_choice("only", only, {None, "podcast"})
-        return self._request_paged("/v1/media/show/all", 50, sortby=sortby, only=only)
+        return self._request_paged(
+            "/v1/media/show/all", 50, sortby=sortby, only=only, workers=workers, record="mediaShowResponse"
+        )
 
     def get_show(self, show_id: int) -> mediaShowResponse:
         """Returns information about the given show."""
 
-        return self._request_single(f"/v1/media/show/{show_id}")
+        return self._request_single(f"/v1/media/show/{show_id}", record="mediaShowResponse")
+
+    def get_shows_by_id(self, show_ids: Iterable[int], workers: int = 8, ordered: bool = True) -> Iterator[BulkResult]:
+        """Returns information about the given shows, requesting up to `workers` at the same time.
+        See `get_episodes` for details.
+        """
+
+        return self._request_bulk("/v1/media/show/{}", show_ids, workers, ordered, record="mediaShowResponse")
 
     def get_featured_shows_preview(self) -> List[mediaShowPreviewResponse]:
-        return self._request_single("/v1/media/show/preview/featured")
+        return self._request_single("/v1/media/show/preview/featured", record="mediaShowPreviewResponse")
 
     def get_shows_preview(
-        self, sortby: str = "LastEpisode", only: Optional[str] = None
+        self, sortby: str = "LastEpisode", only: Optional[str] = None, workers: Optional[int] = None
     ) -> Iterator[mediaShowPreviewResponse]:
         """Returns paginated, reduced information about all shows."""
 
         assert_choice("sortby", sortby, {"LastEpisode"})
         assert_choice("only", only, {None, "podcast"})
-        return self._request_paged("/v1/media/show/preview/all", 50, sortby=sortby, only=only)
+        return self._request_paged(
+            "/v1/media/show/preview/all",
+            50,
+            sortby=sortby,
+            only=only,
+            workers=workers,
+            record="mediaShowPreviewResponse",
+        )
 
     def get_show_preview(self, show_id: int) -> mediaShowPreviewResponse:
         """Returns reduced information about the given show."""
 
-        return self._request_single(f"/v1/media/show/preview/{show_id}")
+        return self._request_single(f"/v1/media/show/preview/{show_id}", record="mediaShowPreviewResponse")
 
     def get_shows_mini(
         self, sortby: str = "LastEpisode", only: Optional[str] = None
@@ -330,7 +993,9 @@ class API:
 
         assert_choice("sortby", sortby, {"LastEpisode"})
         assert_choice("only", only, {None, "podcast"})
-        return self._request_single("/v1/media/show/preview/mini/all", sortby=sortby, only=only)
+        return self._request_single(
+            "/v1/media/show/preview/mini/all", sortby=sortby, only=only, record="mediaShowPreviewMiniResponse"
+        )
 
     # Event
 
@@ -373,6 +1038,31 @@ class API:
             endDay=endDay.timestamp(),
         )
 
+    def get_schedule_range(self, start: datetime, end: datetime, workers: Optional[int] = None) -> List[schedule]:
+        """Returns the program schedule of every calendar day from `start` to `end` (inclusive),
+        with days in the timezone of `start`. The range can be arbitrarily long.
+        Each day is cached separately, so only the days missing from the cache are requested,
+        in windows of up to 14 days of which up to `workers` (the client's `page_workers` by default)
+        are fetched concurrently.
+        """
+
+        days = day_starts(start, end)
+        found, missing = self._schedule_cached(days)
+        windows = schedule_windows(missing)
+
+        if windows:
+
+            def fetch(window: List[datetime]) -> List[schedule]:
+                return self.get_schedule(window[0], window[-1] + timedelta(days=1))
+
+            with ThreadPoolExecutor(min(workers or self.page_workers, len(windows))) as executor:
+                results = list(executor.map(fetch, windows))
+
+            for window, res in zip(windows, results):
+                self._schedule_store(window, res, found)
+
+        return [item for day in days for item in found[day.date()]]
+
     # Shop
 
     def get_products(self) -> simpleShopItem:  # fixme: currently not working
@@ -383,12 +1073,13 @@ class API:
 
     # StreamCount
 
-    def get_viewer_count(self) -> streamCount:
+    def get_viewer_count(self, refresh: bool = False) -> streamCount:
         """Returns information about the current viewers.
         Contains separate numbers for Youtube, Twitch, and combined.
+        If `refresh` is true, the cached count is not used.
         """
 
-        return self._request_single("/v1/streamcount")
+        return self._request_single("/v1/streamcount", refresh=refresh)
 
     # Subscription
 
@@ -456,26 +1147,152 @@ class API:
 
 
 class RBTVAPI(API):
+    def __init__(
+        self, *args: Any, name_index_ttl: float = 3600, search_index: Optional[SearchIndex] = None, **kwargs: Any
+    ) -> None:
+        """`name_index_ttl` is the number of seconds after which the show and Bohne name indices
+        used by the `*_name_to_id` methods are rebuilt. If a `rbtv.searchindex.SearchIndex` is given,
+        all received shows, episodes and blog posts are added to it for `search_local`.
+        See `API` for the other arguments.
+        """
+
+        super().__init__(*args, **kwargs)
+        self._show_names = NameIndex("title", "id", "show", name_index_ttl)
+        self._bohne_names = NameIndex("name", "mgmtid", "Bohne", name_index_ttl)
+        self._fuzzy_indices: Dict[str, Tuple[TrigramIndex, float]] = {}
+        self.name_index_ttl = name_index_ttl
+        self.seasons = SeasonIndex()
+        self._seasons_scanned = 0.0
+        self.search_index = search_index
+
+    def _store_ingest(self, path: str, res: Any) -> None:
+        super()._store_ingest(path, res)
+        if self.search_index is not None and isinstance(res, dict):
+            self.search_index.ingest(path, res.get("data"))
+
+    def _index_shows(self, shows: Iterable[mediaShowResponse]) -> Iterator[mediaShowResponse]:
+        for show in shows:
+            self.seasons.add_shows([show])
+            yield show
+
+    def _index_bulk(self, results: Iterable[BulkResult]) -> Iterator[BulkResult]:
+        for r in results:
+            if r.result is not None:
+                self.seasons.add_shows([r.result])
+            yield r
+
+    def get_shows(
+        self, sortby: str = "LastEpisode", only: Optional[str] = None, workers: Optional[int] = None
+    ) -> Iterator[mediaShowResponse]:
+        return self._index_shows(super().get_shows(sortby, only, workers))
+
+    def get_show(self, show_id: int) -> mediaShowResponse:
+        show = super().get_show(show_id)
+        self.seasons.add_shows([show])
+        return show
+
+    def get_shows_by_id(self, show_ids: Iterable[int], workers: int = 8, ordered: bool = True) -> Iterator[BulkResult]:
+        return self._index_bulk(super().get_shows_by_id(show_ids, workers, ordered))
+
     def get_season(self, show_id: int, season_id: int) -> mediaSeasonResponse:
-        show = self.get_show(show_id)
+        """Returns the season of the given show. Seasons of all shows returned by `get_show`,
+        `get_shows` and `get_shows_by_id` are indexed, so this only requests the show if it wasn't seen before.
+        """
 
-        for season in show["seasons"]:
-            if season["id"] == season_id:
-                return season
+        if self.seasons.show_id(season_id) != show_id:
+            self.get_show(show_id)
+
+        season = self.seasons.get(season_id)
+        if season is None or self.seasons.show_id(season_id) != show_id:
+            raise KeyError(f"Season id not found: show={show_id} season={season_id}")
+        return season
+
+    def get_season_by_id(self, season_id: int) -> mediaSeasonResponse:
+        """Returns the season without knowing its show. If the season wasn't seen before,
+        all shows are downloaded to fill the season index, at most once per `name_index_ttl`.
+        """
 
-        raise KeyError(f"Season id not found: show={show_id} season={season_id}")
+        season = self.seasons.get(season_id)
+        if season is None and time() >= self._seasons_scanned + self.name_index_ttl:
+            self._seasons_scanned = time()
+            for _ in self.get_shows():
+                pass
+            season = self.seasons.get(season_id)
+
+        if season is None:
+            raise KeyError(f"Season id not found: season={season_id}")
+        return season
+
+    def season_to_show_id(self, season_id: int) -> int:
+        """Returns the id of the show the season belongs to. See `get_season_by_id`."""
+
+        self.get_season_by_id(season_id)
+        show_id = self.seasons.show_id(season_id)
+        assert show_id is not None
+        return show_id
 
     @staticmethod
     def _preprocess(name: str) -> str:
         return alphastring(name)
 
+    def _show_index(self) -> NameIndex:
+        if self._show_names.expired():
+            self._show_names.update(self.get_shows_mini())
+        return self._show_names
+
+    def _bohne_index(self) -> NameIndex:
+        if self._bohne_names.expired():
+            self._bohne_names.update(self.get_bohnen_portraits())
+        return self._bohne_names
+
     def show_name_to_id(self, show_name: str) -> int:
-        shows = self.get_shows_mini()
-        return show_name_to_id(shows, show_name)
+        return self._show_index().lookup(show_name)
+
+    def show_names_to_ids(self, show_names: Iterable[str]) -> List[int]:
+        return self._show_index().names_to_ids(show_names)
 
     def bohne_name_to_id(self, bohne_name: str) -> int:
-        bohnen = self.get_bohnen_portraits()
-        return bohne_name_to_id(bohnen, bohne_name)
+        return self._bohne_index().lookup(bohne_name)
+
+    def bohne_names_to_ids(self, bohne_names: Iterable[str]) -> List[int]:
+        return self._bohne_index().names_to_ids(bohne_names)
+
+    def _fuzzy_index(self, kind: str) -> TrigramIndex:
+        index, expires = self._fuzzy_indices.get(kind, (None, 0.0))
+        if index is None or time() >= expires:
+            if kind == "show":
+                items: Iterable[Dict[str, Any]] = self.get_shows_mini()
+            elif kind == "bohne":
+                items = self.get_bohnen_portraits()
+            else:
+                items = self.get_shows()
+            from .fuzzy import TrigramIndex
+
+            index = fill_fuzzy_index(TrigramIndex(alphastring), kind, items)
+            self._fuzzy_indices[kind] = (index, time() + self.name_index_ttl)
+        return index
+
+    def fuzzy_match(
+        self, name: str, k: int = 5, kinds: Sequence[str] = ("show", "bohne"), min_score: float = 0.3
+    ) -> List[NameMatch]:
+        """Returns up to `k` shows, Bohnen and/or seasons whose names are similar to `name`, best match first.
+        This tolerates typos and different spellings. Matching is done locally using trigram indices
+        which are built on first use and refreshed like the exact name indices.
+        Note that the season index (`kinds=("season",)`) requires downloading all shows.
+        """
+
+        for kind in kinds:
+            assert_choice("kind", kind, {"show", "bohne", "season"})
+
+        from .fuzzy import NameMatch
+
+        matches = []
+        for kind in kinds:
+            for score, (_kind, _id, _name) in self._fuzzy_index(kind).search(name, k, min_score):
+                matches.append(NameMatch(score, _kind, _id, _name))
+
+        matches.sort(key=lambda m: -m.score)
+        return matches[:k]
 
     def bohne_id_to_name(self, bohne_id: int) -> str:
         return self.get_bohne_portrait(bohne_id)["name"]
@@ -485,10 +1302,18 @@ class RBTVAPI(API):
 
         return self._request_single("/v1/search/" + quote(s))
 
+    def search_local(self, s: str, k: int = 10) -> searchResultResonse:
+        """Searches the shows, episodes and blog posts this client received so far, without a request.
+        Returns up to `k` results per kind in the same shape as `search`. Requires a `search_index`.
+        """
+
+        if self.search_index is None:
+            raise RuntimeError("search_local requires a client created with a search_index")
+        return self.search_index.search(s, k)  # type: ignore[return-value]
+
 
 if __name__ == "__main__":
     from datetime import timezone
-    from itertools import islice
 
     api = RBTVAPI()
 
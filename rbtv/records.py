@@ -0,0 +1,211 @@
+"""Compact, immutable record objects for API responses.
+
+`record_class(name)` creates a class with `__slots__` for the TypedDict `name` from `rbtv.types`,
+with the same field names. Nested TypedDicts (for example `thumbnail: List[Image]`) are converted
+to records as well, converted lists become tuples and converted dicts of records become read-only mappings.
+With `lazy=True`, nested fields are kept as the decoded JSON and only converted when the field is accessed
+for the first time. This is faster to create, but the decoded JSON uses almost as much memory as a dict.
+Records also support read-only item access (`record["title"]`, `record.get("title")`),
+so code written for the dict representation keeps working.
+"""
+
+from threading import RLock
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Union, get_type_hints
+
+try:
+    from typing import get_args, get_origin
+except ImportError:  # Python 3.7
+
+    def get_args(tp: Any) -> Tuple[Any, ...]:
+        return getattr(tp, "__args__", ())
+
+    def get_origin(tp: Any) -> Any:
+        return getattr(tp, "__origin__", None)
+
+
+Converter = Callable[[Any], Any]
+
+_classes: Dict[str, type] = {}
+_building: Set[str] = set()
+_lock = RLock()
+
+
+def _is_typeddict(tp: Any) -> bool:
+    return isinstance(tp, type) and issubclass(tp, dict) and hasattr(tp, "__annotations__")
+
+
+def _converter(tp: Any) -> Optional[Converter]:
+    """Returns a function which converts decoded JSON of type `tp` to records,
+    or None if `tp` doesn't contain any TypedDicts.
+    """
+
+    if _is_typeddict(tp):
+        name = tp.__name__
+        _record_class(tp)
+        # looked up at call time, so that recursive types work
+        return lambda value: _classes[name](value) if isinstance(value, dict) else value
+
+    origin = get_origin(tp)
+    args = get_args(tp)
+
+    if origin is Union:
+        for arg in args:  # Optional[X] and Union[List[Image], str]
+            conv = _converter(arg)
+            if conv is not None:
+                return conv
+        return None
+
+    if origin is list and args:
+        item = _converter(args[0])
+        if item is not None:
+            return lambda value: tuple(map(item, value)) if isinstance(value, list) else value
+        return None
+
+    if origin is dict and len(args) == 2:
+        item = _converter(args[1])
+        if item is not None:
+            return lambda value: (
+                MappingProxyType({k: item(v) for k, v in value.items()}) if isinstance(value, dict) else value
+            )
+        return None
+
+    return None
+
+
+class Record:
+    """Base class of all record classes."""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _targets: Tuple[Tuple[str, str], ...] = ()  # (field name, slot name)
+    _converters: Tuple[Tuple[str, Converter], ...] = ()  # (slot name, converter) of nested fields
+
+    def __init__(self, data: Dict[str, Any], lazy: bool = False) -> None:
+        get = data.get
+        for field, slot in self._targets:
+            object.__setattr__(self, slot, get(field))
+        if not lazy:
+            for slot, convert in self._converters:
+                value = getattr(self, slot)
+                if isinstance(value, (list, dict)):
+                    object.__setattr__(self, slot, convert(value))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self._fields:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fields
+
+    def __eq__(self, other: Any) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{field}={getattr(self, field)!r}" for field in self._fields)
+        return f"{type(self).__name__}({args})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converts the record back to the dict representation."""
+
+        return {field: to_json(getattr(self, field)) for field in self._fields}
+
+
+def to_json(value: Any) -> Any:
+    """Converts records (and the containers created for nested records) back to JSON types."""
+
+    if isinstance(value, Record):
+        return value.to_dict()
+    elif isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    elif isinstance(value, (dict, MappingProxyType)):
+        return {k: to_json(v) for k, v in value.items()}
+    else:
+        return value
+
+
+def _lazy_property(slot: str, convert: Converter) -> property:
+    def getter(self: Record) -> Any:
+        value = getattr(self, slot)
+        if isinstance(value, (list, dict)):  # still decoded JSON
+            value = convert(value)
+            object.__setattr__(self, slot, value)
+        return value
+
+    return property(getter)
+
+
+def _record_class(td: type) -> None:
+    name = td.__name__
+    if name in _classes or name in _building:
+        return
+
+    _building.add(name)
+    try:
+        hints = get_type_hints(td)
+        converters = {field: _converter(tp) for field, tp in hints.items()}
+    finally:
+        _building.discard(name)
+
+    targets = tuple((field, field if convert is None else f"_{field}") for field, convert in converters.items())
+    namespace: Dict[str, Any] = {
+        "__module__": __name__,
+        "__doc__": f"Record version of `rbtv.types.{name}`.",
+        "__slots__": tuple(slot for field, slot in targets),
+        "_fields": tuple(hints),
+        "_targets": targets,
+        "_converters": tuple((f"_{field}", convert) for field, convert in converters.items() if convert is not None),
+    }
+    for field, convert in converters.items():
+        if convert is not None:
+            namespace[field] = _lazy_property(f"_{field}", convert)
+
+    _classes[name] = type(name, (Record,), namespace)
+
+
+def record_class(name: str) -> type:
+    """Returns the record class for the TypedDict `name` in `rbtv.types`."""
+
+    with _lock:
+        try:
+            return _classes[name]
+        except KeyError:
+            pass
+
+        from . import types
+
+        td = getattr(types, name)
+        if not _is_typeddict(td):
+            raise ValueError(f"{name} is not a TypedDict")
+        _record_class(td)
+        return _classes[name]
+
+
+def to_record(data: Any, name: str, lazy: bool = False) -> Any:
+    """Converts the decoded JSON `data` of type `rbtv.types.<name>` to a record.
+    Lists of such objects are converted to tuples of records.
+    If `lazy` is true, nested fields are only converted when they are accessed.
+    """
+
+    cls = record_class(name)
+    if isinstance(data, list):
+        return tuple(cls(item, lazy) for item in data)
+    if data is None:
+        return None
+    return cls(data, lazy)
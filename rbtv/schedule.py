@@ -0,0 +1,39 @@
+"""Helpers to split schedule ranges into the windows requested from the API and to assign the days."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Any, Iterable, List
+
+if TYPE_CHECKING:
+    from .types import schedule
+
+
+def day_starts(start: datetime, end: datetime) -> List[datetime]:
+    """Returns midnight of every calendar day from `start` to `end` (inclusive) in the timezone of `start`."""
+
+    if start.tzinfo is not None:
+        end = end.astimezone(start.tzinfo)
+    first = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return [first + timedelta(days=i) for i in range((end.date() - start.date()).days + 1)]
+
+
+def schedule_windows(days: Iterable[datetime], max_days: int = 14) -> List[List[datetime]]:
+    """Groups consecutive `days` into windows of at most `max_days` days."""
+
+    windows: List[List[datetime]] = []
+    for day in days:
+        if windows and len(windows[-1]) < max_days and (day.date() - windows[-1][-1].date()).days == 1:
+            windows[-1].append(day)
+        else:
+            windows.append([day])
+    return windows
+
+
+def schedule_date(day: schedule, tzinfo: Any = None) -> date:
+    """Returns the calendar date of a schedule day in the timezone `tzinfo` (local time if None)."""
+
+    dt = datetime.fromisoformat(day["date"].replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        return dt.date()
+    return dt.astimezone(tzinfo).date()
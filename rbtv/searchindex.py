@@ -0,0 +1,270 @@
+"""Local full-text search over shows, episodes and blog posts.
+
+`SearchIndex` is an inverted index which is filled incrementally from API responses
+(see `ingest()`) and answers queries in the `searchResultResonse` shape of the remote
+`/v1/search/{query}` endpoint. Documents are ranked using BM25, with title terms weighted
+higher than description terms. The last query term also matches all indexed terms it is a prefix of,
+so incomplete input like `"pen pap"` works for autocompletion.
+"""
+
+import re
+import threading
+from bisect import bisect_left, insort
+from heapq import nlargest
+from math import log
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .cache import copy_json
+from .text import asciifold
+
+Key = Tuple[str, int]
+
+# result list in `searchResultResonse` of every kind
+KINDS = {"show": "shows", "episode": "episodes", "blog": "blog"}
+
+_token = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits `text` into lowercase ASCII words, transliterated like the names in `rbtv.text.alphastring`."""
+
+    return _token.findall(asciifold(text))
+
+
+class _Doc:
+    __slots__ = ("result", "title", "text", "terms", "length")
+
+    def __init__(self) -> None:
+        self.result: Dict[str, Any] = {}
+        self.title = ""
+        self.text = ""
+        self.terms: Dict[str, float] = {}
+        self.length = 0.0
+
+
+class SearchIndex:
+    """Thread-safe inverted index with BM25 ranking and prefix matching.
+
+    `k1` and `b` are the usual BM25 parameters, `title_weight` is the term frequency of a title term
+    relative to a description term. Prefix matches score `prefix_penalty` times an exact match
+    and only the `max_expansions` most frequent completions of the last query term are considered.
+    """
+
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        title_weight: float = 3.0,
+        prefix_penalty: float = 0.8,
+        max_expansions: int = 50,
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self.prefix_penalty = prefix_penalty
+        self.max_expansions = max_expansions
+
+        self._lock = threading.Lock()
+        self._docs: Dict[Key, _Doc] = {}
+        self._postings: Dict[str, Dict[Key, float]] = {}  # term -> {doc: weighted term frequency}
+        self._terms: List[str] = []  # sorted, for prefix lookups
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, key: Key) -> bool:
+        return key in self._docs
+
+    # updating
+
+    def _unindex(self, key: Key, doc: _Doc) -> None:
+        for term in doc.terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+        self._total_length -= doc.length
+
+    def _index(self, key: Key, doc: _Doc) -> None:
+        terms: Dict[str, float] = {}
+        for term in tokenize(doc.title):
+            terms[term] = terms.get(term, 0.0) + self.title_weight
+        for term in tokenize(doc.text):
+            terms[term] = terms.get(term, 0.0) + 1.0
+
+        for term, tf in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings[key] = tf
+
+        doc.terms = terms
+        doc.length = sum(terms.values())
+        self._total_length += doc.length
+
+    def add(
+        self, kind: str, _id: int, result: Dict[str, Any], title: Optional[str] = None, text: Optional[str] = None
+    ) -> None:
+        """Adds or updates a document. `result` is merged into the search result of the document,
+        `title` and `text` replace the indexed text unless they are None.
+        """
+
+        if kind not in KINDS:
+            raise ValueError(f"Invalid kind: {kind}")
+
+        key = (kind, _id)
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is None:
+                doc = self._docs[key] = _Doc()
+            else:
+                self._unindex(key, doc)
+            doc.result.update(copy_json(result))
+            if title is not None:
+                doc.title = title
+            if text is not None:
+                doc.text = text
+            self._index(key, doc)
+
+    def remove(self, kind: str, _id: int) -> bool:
+        key = (kind, _id)
+        with self._lock:
+            doc = self._docs.pop(key, None)
+            if doc is None:
+                return False
+            self._unindex(key, doc)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._terms.clear()
+            self._total_length = 0.0
+
+    def _add_shows(self, shows: Iterable[Dict[str, Any]]) -> None:
+        for show in shows:
+            result = {name: show[name] for name in ("id", "title", "thumbnail") if name in show}
+            self.add("show", int(show["id"]), result, show.get("title"), show.get("description"))
+
+    def _add_episodes(self, episodes: Iterable[Dict[str, Any]]) -> None:
+        for episode in episodes:
+            result = {name: episode[name] for name in ("id", "title", "showName", "thumbnail") if name in episode}
+            # sic, `searchResultEpisode` uses a different spelling
+            if "distributionPublishingDate" in episode:
+                result["distibutionPublishingDate"] = episode["distributionPublishingDate"]
+            elif "distibutionPublishingDate" in episode:
+                result["distibutionPublishingDate"] = episode["distibutionPublishingDate"]
+            if "firstBroadcastdate" in episode:
+                result["firstBroadcastdate"] = episode["firstBroadcastdate"]
+
+            description = episode.get("description")
+            text = None if description is None else f"{episode.get('showName') or ''} {description}"
+            self.add("episode", int(episode["id"]), result, episode.get("title"), text)
+
+    def _add_blog_posts(self, posts: Iterable[Dict[str, Any]]) -> None:
+        for post in posts:
+            result = {name: post[name] for name in ("id", "title", "publishDate") if name in post}
+            if "thumbnail" in post:
+                result["thumbnail"] = post["thumbnail"]
+            elif isinstance(post.get("thumbImage"), list):
+                result["thumbnail"] = post["thumbImage"]
+            self.add("blog", int(post["id"]), result, post.get("title"), post.get("subtitle"))
+
+    def ingest(self, path: str, data: Any) -> None:
+        """Indexes the shows, episodes and blog posts in the response `data` of the GET request to `path`."""
+
+        if data is None:
+            return
+
+        items = data if isinstance(data, list) else [data]
+        if path.startswith("/v1/media/show/"):
+            self._add_shows(items)
+            for show in items:
+                if show.get("lastEpisode"):
+                    self._add_episodes(show["lastEpisode"].get("episodes") or [])
+        elif path.startswith("/v1/media/episode/") or path.startswith("/v1/media/abobox/"):
+            for combined in items:
+                self._add_episodes(combined.get("episodes") or [])
+        elif path.startswith("/v1/blog/"):
+            self._add_blog_posts(items)
+        elif path.startswith("/v1/search/"):
+            self._add_shows(data.get("shows") or [])
+            self._add_episodes(data.get("episodes") or [])
+            self._add_blog_posts(data.get("blog") or [])
+
+    # querying
+
+    def _expand(self, token: str) -> List[str]:
+        terms = self._terms
+        start = bisect_left(terms, token)
+        end = start
+        while end < len(terms) and terms[end].startswith(token):
+            end += 1
+        expansions = terms[start:end]
+        if len(expansions) > self.max_expansions:
+            expansions = nlargest(self.max_expansions, expansions, key=lambda term: len(self._postings[term]))
+        return expansions
+
+    def _scores(self, terms: Iterable[Tuple[str, float]]) -> Dict[Key, float]:
+        """Returns the best BM25 score of each document containing any of the `(term, weight)` pairs."""
+
+        num_docs = len(self._docs)
+        avg_length = self._total_length / num_docs if num_docs else 1.0
+        k1 = self.k1
+        b = self.b
+        docs = self._docs
+
+        scores: Dict[Key, float] = {}
+        for term, weight in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = log(1 + (num_docs - df + 0.5) / (df + 0.5))
+            for key, tf in postings.items():
+                norm = k1 * (1 - b + b * docs[key].length / avg_length)
+                score = weight * idf * tf * (k1 + 1) / (tf + norm)
+                if score > scores.get(key, 0.0):
+                    scores[key] = score
+        return scores
+
+    def search(self, query: str, k: int = 10, prefix: bool = True) -> Dict[str, List[Dict[str, Any]]]:
+        """Returns up to `k` results per kind for documents which contain all terms of `query`,
+        best match first, as `searchResultResonse`. If `prefix` is true, the last term
+        also matches longer terms.
+        """
+
+        out: Dict[str, List[Dict[str, Any]]] = {name: [] for name in KINDS.values()}
+        tokens = tokenize(query)
+        if not tokens:
+            return out
+
+        with self._lock:
+            total: Optional[Dict[Key, float]] = None
+            for i, token in enumerate(tokens):
+                if prefix and i == len(tokens) - 1:
+                    terms = [(term, 1.0 if term == token else self.prefix_penalty) for term in self._expand(token)]
+                else:
+                    terms = [(token, 1.0)]
+                scores = self._scores(terms)
+                if total is None:
+                    total = scores
+                else:
+                    total = {key: score + scores[key] for key, score in total.items() if key in scores}
+                if not total:
+                    return out
+
+            assert total is not None
+            by_kind: Dict[str, List[Tuple[float, Key]]] = {kind: [] for kind in KINDS}
+            for key, score in total.items():
+                by_kind[key[0]].append((score, key))
+
+            for kind, scored in by_kind.items():
+                best = nlargest(k, scored, key=lambda pair: (pair[0], -pair[1][1]))
+                out[KINDS[kind]] = [copy_json(self._docs[key].result) for _, key in best]
+
+        return out
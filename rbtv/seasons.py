@@ -0,0 +1,53 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from .cache import copy_json
+
+
+class SeasonIndex:
+    """Maps season ids to seasons and to the ids of their shows.
+    The index is filled from show responses (`mediaShowResponse`) using `add_shows()`.
+    Adding a show again replaces all of its seasons.
+    Seasons are copied when they are added and when they are returned, so the index isn't affected
+    by callers modifying the shows or seasons they received.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seasons: Dict[int, Any] = {}
+        self._show_ids: Dict[int, int] = {}
+        self._by_show: Dict[int, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._seasons)
+
+    def __contains__(self, season_id: int) -> bool:
+        return season_id in self._seasons
+
+    def add_shows(self, shows: Iterable[Any]) -> None:
+        with self._lock:
+            for show in shows:
+                show_id = int(show["id"])
+                for season_id in self._by_show.pop(show_id, []):
+                    self._seasons.pop(season_id, None)
+                    self._show_ids.pop(season_id, None)
+
+                season_ids = []
+                for season in show.get("seasons") or []:
+                    season_id = int(season["id"])
+                    self._seasons[season_id] = copy_json(season)
+                    self._show_ids[season_id] = show_id
+                    season_ids.append(season_id)
+                self._by_show[show_id] = season_ids
+
+    def get(self, season_id: int) -> Optional[Any]:
+        return copy_json(self._seasons.get(season_id))
+
+    def show_id(self, season_id: int) -> Optional[int]:
+        return self._show_ids.get(season_id)
+
+    def season_ids(self, show_id: int) -> Optional[List[int]]:
+        """Returns the season ids of the show, or None if the show wasn't added."""
+
+        season_ids = self._by_show.get(show_id)
+        return None if season_ids is None else list(season_ids)
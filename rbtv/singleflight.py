@@ -0,0 +1,64 @@
+"""Request coalescing: concurrent calls with the same key share the result of a single call.
+The asyncio version is `rbtv.aio.AsyncSingleFlight`.
+"""
+
+import threading
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[T]):
+    """Thread-safe. While a call for `key` is in flight, further calls for the same key
+    wait for it to finish instead of calling `func` again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> Tuple[T, bool]:
+        """Returns the result of `func()` and whether it is shared with other callers.
+        All callers of a shared result get the same object, so they must copy it before modifying it.
+        Exceptions are raised in all waiting callers.
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True  # type: ignore[return-value]
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        # no caller can join after the call was removed, so `waiters` is final
+        return call.result, call.waiters > 0
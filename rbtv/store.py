@@ -0,0 +1,315 @@
+"""Normalized in-memory store of the entities contained in API responses.
+
+The same show, episode or Bohne is returned in different shapes by different endpoints,
+for example a show as `mediaShowPreviewMiniResponse`, `mediaShowPreviewResponse` or `mediaShowResponse`.
+`EntityStore` merges all shapes of an entity into a single record keyed by `(kind, id)`
+and remembers when each shape was seen. A shape can be served from the store if the same shape
+or a richer one which contains all of its fields (see `COVERS`) was seen recently enough.
+"""
+
+import re
+import threading
+from functools import lru_cache
+from time import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .cache import copy_json
+
+Key = Tuple[str, Any]
+
+# TypedDict in `rbtv.types` of every (kind, shape)
+SHAPES = {
+    ("show", "mini"): "mediaShowPreviewMiniResponse",
+    ("show", "search"): "searchResultShow",
+    ("show", "preview"): "mediaShowPreviewResponse",
+    ("show", "full"): "mediaShowResponse",
+    ("episode", "search"): "searchResultEpisode",
+    ("episode", "preview"): "mediaEpisodePreview",
+    ("episode", "full"): "mediaEpisode",
+    ("bohne", "portrait"): "bohnePortrait",
+    ("bohne", "full"): "bohneResponse",
+    ("route", "route"): "cmsRouteResponse",
+}
+
+# shapes which contain all fields of the requested shape
+COVERS = {
+    ("show", "mini"): ("mini", "search", "preview", "full"),
+    ("show", "preview"): ("preview", "full"),
+    ("show", "full"): ("full",),
+    ("episode", "preview"): ("preview", "full"),
+    ("episode", "full"): ("full",),
+    ("bohne", "portrait"): ("portrait",),
+    ("bohne", "full"): ("full",),
+    ("route", "route"): ("route",),
+}
+
+
+def _has_podcast(fields: Dict[str, Any]) -> bool:
+    podcast = fields.get("podcast")
+    return bool(podcast) and any(podcast.values())
+
+
+# fields of a shape which richer shapes don't contain, but which can be derived from them
+DERIVED: Dict[Tuple[str, str], Dict[str, Callable[[Dict[str, Any]], Any]]] = {
+    ("show", "preview"): {"hasPodcast": _has_podcast},
+}
+
+
+@lru_cache(maxsize=None)
+def shape_fields(kind: str, shape: str) -> Tuple[str, ...]:
+    from . import types
+
+    return tuple(getattr(types, SHAPES[(kind, shape)]).__annotations__)
+
+
+class _Entity:
+    __slots__ = ("fields", "seen")
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Any] = {}
+        self.seen: Dict[str, float] = {}  # shape -> time
+
+
+class EntityStore:
+    """Thread-safe store of shows, episodes, Bohnen and CMS routes.
+
+    Use it as `store` argument of the API clients: every response received from the server
+    is written into the store using `ingest()`, and single-item requests which can be answered
+    from the stored data (see `serve()`) don't send a request. Stored shapes are only served
+    while they are younger than the cache TTL of the requested path.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time) -> None:
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entities: Dict[Key, _Entity] = {}
+        self._collections: Dict[str, Tuple[float, List[Any]]] = {}  # kind -> (time, ids)
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entities.clear()
+            self._collections.clear()
+
+    # writing
+
+    def _put(self, kind: str, _id: Any, shape: str, fields: Dict[str, Any], now: float) -> None:
+        key = (kind, _id)
+        entity = self._entities.get(key)
+        if entity is None:
+            entity = self._entities[key] = _Entity()
+        entity.fields.update(copy_json(fields))
+        entity.seen[shape] = now
+
+    def put(self, kind: str, _id: Any, shape: str, fields: Dict[str, Any]) -> None:
+        """Merges `fields` into the entity, newer values replace older ones."""
+
+        with self._lock:
+            self._put(kind, _id, shape, fields, self.clock())
+
+    def _put_shows(self, shows: Iterable[Dict[str, Any]], shape: str, now: float) -> None:
+        for show in shows:
+            self._put("show", int(show["id"]), shape, show, now)
+            if shape == "full":
+                self._put_bohnen((show.get("hosts") or []), now)
+                if show.get("lastEpisode"):
+                    self._put_episodes(show["lastEpisode"], "full", now)
+
+    def _put_bohnen(self, portraits: Iterable[Dict[str, Any]], now: float) -> List[int]:
+        ids = []
+        for portrait in portraits:
+            _id = int(portrait["mgmtid"])
+            self._put("bohne", _id, "portrait", portrait, now)
+            ids.append(_id)
+        return ids
+
+    def _put_episodes(self, data: Any, shape: str, now: float) -> None:
+        """`data` is a `mediaEpisodeCombinedResponse` or `mediaEpisodePreviewCombinedResponse` or a list of them."""
+
+        for combined in data if isinstance(data, list) else [data]:
+            self._put_bohnen((combined.get("bohnen") or {}).values(), now)
+            for episode in combined.get("episodes") or []:
+                self._put("episode", int(episode["id"]), shape, episode, now)
+                for neighbour in (episode.get("prev"), episode.get("next")):
+                    if neighbour:
+                        self._put("episode", int(neighbour["id"]), "preview", neighbour, now)
+
+    def _put_routes(self, routes: List[Dict[str, Any]], now: float) -> None:
+        for route in routes:
+            self._put("route", route["route"], "route", route, now)
+        self._collections["route"] = (now, [route["route"] for route in routes])
+
+    def ingest(self, path: str, data: Any) -> None:
+        """Writes the entities contained in the response `data` of the GET request to `path` into the store."""
+
+        if data is None:
+            return
+
+        with self._lock:
+            now = self.clock()
+            if path.startswith("/v1/media/episode/") or path.startswith("/v1/media/abobox/"):
+                shape = "preview" if "/preview" in path or path.startswith("/v1/media/abobox/") else "full"
+                self._put_episodes(data, shape, now)
+            elif path.startswith("/v1/media/show/"):
+                if path.startswith("/v1/media/show/preview/mini/"):
+                    shape = "mini"
+                elif path.startswith("/v1/media/show/preview/"):
+                    shape = "preview"
+                else:
+                    shape = "full"
+                self._put_shows(data if isinstance(data, list) else [data], shape, now)
+            elif path.startswith("/v1/bohne/portrait/"):
+                ids = self._put_bohnen(data if isinstance(data, list) else [data], now)
+                if path == "/v1/bohne/portrait/all":
+                    self._collections["bohne"] = (now, ids)
+            elif path.startswith("/v1/bohne/"):
+                self._put("bohne", int(data["mgmtid"]), "full", data, now)
+            elif path == "/v1/cms/route/all":
+                self._put_routes(data, now)
+            elif path == "/v1/frontend/init":
+                if data.get("routes") is not None:
+                    self._put_routes(data["routes"], now)
+            elif path.startswith("/v1/search/"):
+                self._put_shows(data.get("shows") or [], "search", now)
+                for episode in data.get("episodes") or []:
+                    self._put("episode", int(episode["id"]), "search", episode, now)
+
+    def invalidate(self, path: str = "") -> int:
+        """Removes the entities and collections which could be served for paths starting with `path`
+        (or everything if `path` is empty), like `rbtv.cache.BaseCache.invalidate` does for URLs.
+        Returns the number of removed entities and collections.
+        """
+
+        with self._lock:
+            if not path:
+                removed = len(self._entities) + len(self._collections)
+                self._entities.clear()
+                self._collections.clear()
+                return removed
+
+            keys = set()
+            for kind, prefix in _entity_paths:
+                if prefix.startswith(path):
+                    keys.update(key for key in self._entities if key[0] == kind)
+                elif path.startswith(prefix):
+                    # `path` selects the ids which start with the remaining digits
+                    digits = path[len(prefix) :]
+                    if digits.isdigit():
+                        keys.update(key for key in self._entities if key[0] == kind and str(key[1]).startswith(digits))
+
+            for key in keys:
+                del self._entities[key]
+            collections = [
+                kind
+                for kind, served in _collection_paths.items()
+                if served.startswith(path) and kind in self._collections
+            ]
+            for kind in collections:
+                del self._collections[kind]
+            return len(keys) + len(collections)
+
+    # reading
+
+    def _get(self, kind: str, _id: Any, shape: str, max_age: float, now: float) -> Optional[Dict[str, Any]]:
+        entity = self._entities.get((kind, _id))
+        if entity is None:
+            return None
+
+        seen = max((entity.seen.get(covering, -1.0) for covering in COVERS[(kind, shape)]), default=-1.0)
+        if seen < 0 or now - seen >= max_age:
+            return None
+
+        fields = entity.fields
+        out = {name: copy_json(fields[name]) for name in shape_fields(kind, shape) if name in fields}
+        if shape not in entity.seen:
+            for name, derive in DERIVED.get((kind, shape), {}).items():
+                out.setdefault(name, derive(fields))
+        return out
+
+    def get(self, kind: str, _id: Any, shape: str, max_age: float = float("inf")) -> Optional[Dict[str, Any]]:
+        """Returns a copy of the entity in the given shape, or None if neither the shape
+        nor a richer one was seen during the last `max_age` seconds.
+        """
+
+        with self._lock:
+            return self._get(kind, _id, shape, max_age, self.clock())
+
+    def _get_collection(self, kind: str, shape: str, max_age: float, now: float) -> Optional[List[Dict[str, Any]]]:
+        try:
+            seen, ids = self._collections[kind]
+        except KeyError:
+            return None
+        if now - seen >= max_age:
+            return None
+
+        items = []
+        for _id in ids:
+            item = self._get(kind, _id, shape, max_age, now)
+            if item is None:
+                return None
+            items.append(item)
+        return items
+
+    def _get_combined(self, episode_id: int, shape: str, max_age: float, now: float) -> Optional[Dict[str, Any]]:
+        episode = self._get("episode", episode_id, shape, max_age, now)
+        if episode is None:
+            return None
+
+        bohnen = {}
+        for mgmtid in episode.get("hosts") or []:
+            portrait = self._get("bohne", mgmtid, "portrait", max_age, now)
+            if portrait is None:
+                return None
+            bohnen[str(mgmtid)] = portrait
+        return {"bohnen": bohnen, "episodes": [episode]}
+
+    def serve(self, path: str, max_age: float) -> Optional[Any]:
+        """Returns the response data of the GET request to `path` (without query parameters)
+        if it can be assembled from entities seen during the last `max_age` seconds, otherwise None.
+        """
+
+        if max_age <= 0:
+            return None
+
+        for pattern, serve in _routes:
+            m = pattern.fullmatch(path)
+            if m:
+                with self._lock:
+                    return serve(self, m, max_age, self.clock())
+        return None
+
+
+Route = Callable[[EntityStore, "re.Match[str]", float, float], Optional[Any]]
+
+_routes: List[Tuple["re.Pattern[str]", Route]] = [
+    (re.compile(r"/v1/media/show/(\d+)"), lambda s, m, age, now: s._get("show", int(m[1]), "full", age, now)),
+    (
+        re.compile(r"/v1/media/show/preview/(\d+)"),
+        lambda s, m, age, now: s._get("show", int(m[1]), "preview", age, now),
+    ),
+    (re.compile(r"/v1/media/episode/(\d+)"), lambda s, m, age, now: s._get_combined(int(m[1]), "full", age, now)),
+    (
+        re.compile(r"/v1/media/episode/preview/(\d+)"),
+        lambda s, m, age, now: s._get_combined(int(m[1]), "preview", age, now),
+    ),
+    (re.compile(r"/v1/bohne/(\d+)"), lambda s, m, age, now: s._get("bohne", int(m[1]), "full", age, now)),
+    (
+        re.compile(r"/v1/bohne/portrait/(\d+)"),
+        lambda s, m, age, now: s._get("bohne", int(m[1]), "portrait", age, now),
+    ),
+    (re.compile(r"/v1/bohne/portrait/all"), lambda s, m, age, now: s._get_collection("bohne", "portrait", age, now)),
+    (re.compile(r"/v1/cms/route/all"), lambda s, m, age, now: s._get_collection("route", "route", age, now)),
+]
+
+# path prefixes of the `_routes` above which serve a single entity followed by its id, and of the collections
+_entity_paths = [
+    ("show", "/v1/media/show/"),
+    ("show", "/v1/media/show/preview/"),
+    ("episode", "/v1/media/episode/"),
+    ("episode", "/v1/media/episode/preview/"),
+    ("bohne", "/v1/bohne/"),
+    ("bohne", "/v1/bohne/portrait/"),
+]
+_collection_paths = {"bohne": "/v1/bohne/portrait/all", "route": "/v1/cms/route/all"}
@@ -1,22 +1,44 @@
+import os
 from inspect import isgenerator
 from itertools import islice
+from typing import get_type_hints
 from unittest import TestCase
 
 from typeguard import check_type
 
 from rbtv import API, types
+from rbtv.cassette import Cassette
+
+# these don't request an endpoint, calling `close()` would close the session of the following tests
+LIFECYCLE_METHODS = {"close", "__enter__", "__exit__"}
 
 
 class ApiTest(TestCase):
     @classmethod
     def setUpClass(cls):
-        cls.api = API()
+        # RBTV_CASSETTE=tests.json.gz records the responses on the first run and replays them afterwards.
+        # With RBTV_CASSETTE_STRICT=1 requests which were not recorded fail instead of using the network.
+        path = os.environ.get("RBTV_CASSETTE")
+        if path:
+            strict = os.environ.get("RBTV_CASSETTE_STRICT") == "1"
+            cls.api = API(cassette=Cassette(path, strict=strict))
+        else:
+            cls.api = API()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.api.close()
 
     def test_all_methods(self):
-        methods = [name for name in dir(self.api) if callable(getattr(self.api, name)) and not name.startswith("_")]
+        methods = [
+            name
+            for name in dir(self.api)
+            if callable(getattr(self.api, name)) and not name.startswith("_") and name not in LIFECYCLE_METHODS
+        ]
         for method in methods:
             func = getattr(self.api, method)
-            annotations = func.__annotations__
+            # annotations are strings, the types are resolved from `rbtv.types` which is loaded lazily
+            annotations = get_type_hints(func, localns=vars(types))
             if len(annotations) == 1:
                 return_type = annotations["return"]
                 print(method, return_type)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from unittest import TestCase
+
+import pytest
+
+from rbtv.benchmarks.server import MockServer
+from rbtv.metrics import Metrics
+
+aiohttp = pytest.importorskip("aiohttp")
+from rbtv.aio import AsyncRBTVAPI  # noqa: E402
+
+
+class AsyncMockServerTest(TestCase):
+    """Exercises the aiohttp request path of `AsyncAPI` against `MockServer`."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockServer(num_shows=60, episodes_per_show=120, num_bohnen=10)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def run_client(self, func, **kwargs):
+        async def main():
+            api = AsyncRBTVAPI(**{"scheme": "http", "retries": 0, "metrics": Metrics(), **kwargs})
+            api.netloc = self.server.netloc
+            async with api:
+                return await func(api)
+
+        return asyncio.run(main())
+
+    def requests(self, api):
+        """Returns the sorted `(status, cache)` pairs of all requests."""
+
+        return sorted(
+            (status, cache) for (_, _, status, cache), num in api.metrics._requests.items() for _ in range(num)
+        )
+
+    def test_paging(self):
+        async def func(api):
+            shows = [show async for show in api.get_shows()]
+            serial = [page async for page in api.get_episodes_by_show(3)]
+            parallel = [page async for page in api.get_episodes_by_show(4, workers=3)]
+            return shows, serial, parallel
+
+        async def func_streamed(api):
+            return [show async for show in api.get_shows()]
+
+        shows, serial, parallel = self.run_client(func)
+        streamed = self.run_client(func_streamed, stream=True)
+        self.assertEqual([show["id"] for show in shows], list(range(1, 61)))
+        self.assertEqual(len(serial), 3)
+        self.assertEqual(sum(len(page["episodes"]) for page in serial), 120)
+        self.assertEqual(sum(len(page["episodes"]) for page in parallel), 120)
+        self.assertEqual(streamed, shows)
+
+    def test_cache(self):
+        async def func(api):
+            first = await api.get_bohnen_portraits()
+            self.assertEqual(await api.get_bohnen_portraits(), first)
+            time.sleep(0.1)
+            # the entry expired, so it's revalidated using the ETag of the first response
+            self.assertEqual(await api.get_bohnen_portraits(), first)
+            return api
+
+        api = self.run_client(func, ttls={"/v1/bohne/": 0.05})
+        self.assertEqual(self.requests(api), [("", "hit"), ("200", "miss"), ("304", "revalidated")])
+
+    def test_errors(self):
+        async def not_found(api):
+            await api.get_show(1)
+
+        with self.assertRaises(aiohttp.ClientResponseError) as cm:
+            self.run_client(not_found)
+        self.assertEqual(cm.exception.status, 404)
+
+        async def patch(api):
+            await api._patch_request("/v1/subscription/mydefault/1", {"type": 1, "flags": []})
+
+        # the server only implements GET
+        with self.assertRaises(aiohttp.ClientResponseError) as cm:
+            self.run_client(patch)
+        self.assertEqual(cm.exception.status, 501)
+
+        async def retried(api):
+            return await api.get_viewer_count()
+
+        self.server.fail("/v1/streamcount", 503, 503)
+        self.assertEqual(self.run_client(retried, retries=2, backoff=0.01)["total"], 3000)
+
+        self.server.fail("/v1/media/show/all", 500)
+        with self.assertRaises(aiohttp.ClientResponseError) as cm:
+            self.run_client(lambda api: api.get_shows().__anext__(), stream=True)
+        self.assertEqual(cm.exception.status, 500)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from rbtv import RBTVAPI, HTTPError
+from rbtv.benchmarks.scenarios import SCENARIOS, percentile, run
+from rbtv.benchmarks.server import MockServer
+
+
+class MockServerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = MockServer(num_shows=60, episodes_per_show=120, num_bohnen=10)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def client(self, **kwargs):
+        api = RBTVAPI(scheme="http", retries=0, **kwargs)
+        api.netloc = self.server.netloc
+        return api
+
+    def test_endpoints(self):
+        with self.client() as api:
+            self.assertEqual([show["id"] for show in api.get_shows()], list(range(1, 61)))
+            pages = list(api.get_episodes_by_show(3, workers=2))
+            self.assertEqual(sum(len(page["episodes"]) for page in pages), 120)
+            title = next(show["title"] for show in api.get_shows_mini() if show["id"] == 5)
+            self.assertEqual(api.show_name_to_id(title), 5)
+            start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+            self.assertEqual(len(api.get_schedule_range(start, start + timedelta(days=20))), 21)
+            with self.assertRaises(HTTPError):
+                api.get_show(1)
+
+    def test_scenarios(self):
+        for name, scenario in SCENARIOS.items():
+            result = run(name, scenario, self.server)
+            self.assertGreater(result.requests, 0)
+            self.assertLessEqual(result.p50, result.p99)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+        self.assertEqual(percentile([5], 99), 5)
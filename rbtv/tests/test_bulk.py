@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+import pytest
+
+from rbtv import API
+
+
+class BulkAPI(API):
+    """Serves `/v1/media/episode/{id}` with a delay depending on the id. Negative ids fail."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _fetch(self, url, path, event, refresh=False):
+        _id = int(path.rsplit("/", 1)[1])
+        with self.lock:
+            self.requested.append(_id)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(0.01 * (abs(_id) % 5))
+            if _id < 0:
+                raise ValueError(_id)
+            res = {"success": True, "data": {"id": _id}}
+            self._cache_set(url, path, res)
+            return res
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+class BulkTest(TestCase):
+    def test_ordered(self):
+        api = BulkAPI()
+        ids = [4, 3, 2, 1, 0, 3, 9, 8, 7]
+        results = list(api.get_episodes(ids, workers=3))
+        self.assertEqual([r.id for r in results], [4, 3, 2, 1, 0, 9, 8, 7])
+        self.assertEqual([r.result["id"] for r in results], [4, 3, 2, 1, 0, 9, 8, 7])
+        self.assertLessEqual(api.max_in_flight, 3)
+
+    def test_unordered_and_errors(self):
+        api = BulkAPI()
+        results = list(api.get_episodes([4, -1, 0, 2, -3], workers=5, ordered=False))
+        self.assertEqual(sorted(r.id for r in results), [-3, -1, 0, 2, 4])
+        self.assertEqual(results[0].id, 0)  # finished first
+        errors = {r.id: r.error for r in results if r.error is not None}
+        self.assertEqual(sorted(errors), [-3, -1])
+        self.assertIsInstance(errors[-1], ValueError)
+
+    def test_cached(self):
+        api = BulkAPI()
+        list(api.get_episodes([1, 2]))
+        api.requested.clear()
+        for ordered in (True, False):
+            results = list(api.get_episodes([1, 5, 2, 6], workers=2, ordered=ordered))
+            self.assertEqual(sorted(r.id for r in results), [1, 2, 5, 6])
+        self.assertEqual(api.requested, [5, 6])
+        self.assertEqual([r.id for r in api.get_episodes([1, 5, 2, 6])], [1, 5, 2, 6])
+
+    def test_async(self):
+        pytest.importorskip("aiohttp")
+        from rbtv.aio import AsyncAPI
+
+        class AsyncBulkAPI(AsyncAPI):
+            requested = []
+
+            async def _fetch(self, url, path, event, refresh=False):
+                _id = int(path.rsplit("/", 1)[1])
+                self.requested.append(_id)
+                await asyncio.sleep(0.001 * (_id % 5))
+                res = {"success": True, "data": {"id": _id}}
+                self._cache_set(url, path, res)
+                return res
+
+        async def main():
+            api = AsyncBulkAPI()
+            ordered = [r.id async for r in api.get_shows_by_id([4, 3, 2, 3, 1], workers=2)]
+            self.assertEqual(ordered, [4, 3, 2, 1])
+            unordered = [r.id async for r in api.get_shows_by_id([4, 0, 9], workers=3, ordered=False)]
+            self.assertEqual(unordered, [4, 0, 9])  # 4 is cached and returned right away
+            self.assertEqual(api.requested, [4, 3, 2, 1, 0, 9])
+
+        asyncio.run(main())
@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import patch
+
+from rbtv import API
+from rbtv.cache import BaseCache, CacheEntry, MemoryCache, SqliteCache, ttl_for_path
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200, headers=None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    @property
+    def content(self):
+        return json.dumps(self.data).encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryCacheTest(TestCase):
+    def test_lru(self):
+        cache = MemoryCache(2)
+        cache.set("a", CacheEntry(1, 0))
+        cache.set("b", CacheEntry(2, 0))
+        cache.get("a")
+        cache.set("c", CacheEntry(3, 0))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a").data, 1)
+
+    def test_invalidate(self):
+        cache = MemoryCache()
+        for key in ("x/1", "x/2", "y/1"):
+            cache.set(key, CacheEntry(None, 0))
+        self.assertEqual(cache.invalidate("x/"), 2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.invalidate(), 1)
+
+    def test_incomplete_backend(self):
+        class NoInvalidateCache(BaseCache):
+            def get(self, key):
+                return None
+
+            def set(self, key, entry):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoInvalidateCache()
+
+    def test_ttl_for_path(self):
+        ttls = {"/v1/media/show/": 10, "/v1/media/show/preview/mini/all": 20}
+        self.assertEqual(ttl_for_path(ttls, "/v1/media/show/1", 5), 10)
+        self.assertEqual(ttl_for_path(ttls, "/v1/media/show/preview/mini/all", 5), 20)
+        self.assertEqual(ttl_for_path(ttls, "/v1/blog/1", 5), 5)
+
+
+class ApiCacheTest(TestCase):
+    def setUp(self):
+        self.api = API(ttls={"/v1/nocache": 0})
+        self.responses = 0
+
+        def get(url, headers, timeout):
+            self.responses += 1
+            return FakeResponse({"success": True, "data": {"url": url, "list": [1, 2]}})
+
+        self.get = patch.object(self.api.session, "get", get)
+        self.get.start()
+
+    def tearDown(self):
+        self.get.stop()
+
+    def test_hit_returns_copy(self):
+        a = self.api._request_single("/v1/blog/1")
+        a["list"].append(3)
+        b = self.api._request_single("/v1/blog/1")
+        self.assertEqual(b["list"], [1, 2])
+        self.assertEqual(self.responses, 1)
+
+    def test_expiry_and_invalidate(self):
+        self.api._request_single("/v1/nocache")
+        self.api._request_single("/v1/nocache")
+        self.assertEqual(self.responses, 2)
+
+        self.api._request_single("/v1/streamcount")
+        self.assertEqual(self.api.invalidate("/v1/streamcount"), 1)
+        self.api._request_single("/v1/streamcount")
+        self.assertEqual(self.responses, 4)
+
+
+class SqliteCacheTest(TestCase):
+    def test_persistence(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "cache.sqlite")
+            cache = SqliteCache(path)
+            cache.set("https://host/v1/a_1", CacheEntry({"a": [1]}, 10.0, '"etag"', None))
+            cache.set("https://host/v1/b", CacheEntry(None, 10.0))
+            cache.close()
+
+            cache = SqliteCache(path)
+            entry = cache.get("https://host/v1/a_1")
+            self.assertEqual(entry.data, {"a": [1]})
+            self.assertEqual(entry.conditional_headers(), {"If-None-Match": '"etag"'})
+            self.assertEqual(cache.invalidate("https://host/v1/a_"), 1)
+            self.assertEqual(len(cache), 1)
+            cache.close()
+
+
+class RevalidationTest(TestCase):
+    def test_not_modified(self):
+        api = API(ttls={"/v1/blog/": 0.01})
+        requests = []
+
+        def get(url, headers, timeout):
+            requests.append(headers)
+            if headers:
+                return FakeResponse(None, 304)
+            return FakeResponse({"success": True, "data": [1]}, 200, {"ETag": '"v1"'})
+
+        with patch.object(api.session, "get", get):
+            self.assertEqual(api._request_single("/v1/blog/1"), [1])
+            time.sleep(0.02)
+            self.assertEqual(api._request_single("/v1/blog/1"), [1])
+            self.assertEqual(api._request_single("/v1/blog/1"), [1])
+
+        self.assertEqual(requests, [None, {"If-None-Match": '"v1"'}])
+
+    def test_refresh(self):
+        api = API()
+        requests = []
+
+        def get(url, headers, timeout):
+            requests.append(headers)
+            if len(requests) == 2:
+                return FakeResponse(None, 304)
+            return FakeResponse({"success": True, "data": [len(requests)]}, 200, {"ETag": f'"v{len(requests)}"'})
+
+        with patch.object(api.session, "get", get):
+            self.assertEqual(api._request_single("/v1/blog/1"), [1])
+            self.assertEqual(api._request_single("/v1/blog/1", refresh=True), [1])
+            self.assertEqual(api._request_single("/v1/blog/1", refresh=True), [3])
+            # the refreshed response replaced the cached one
+            self.assertEqual(api._request_single("/v1/blog/1"), [3])
+
+        self.assertEqual(requests, [None, {"If-None-Match": '"v1"'}, {"If-None-Match": '"v1"'}])
@@ -0,0 +1,109 @@
+import io
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import requests
+from requests.adapters import BaseAdapter
+
+from rbtv import API
+from rbtv.cassette import Cassette, CassetteMiss, request_key
+
+
+class FakeAdapter(BaseAdapter):
+    """Answers every request with its URL and a counter."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent = 0
+
+    def send(self, request, **kwargs):
+        self.sent += 1
+        r = requests.Response()
+        r.status_code = 200
+        r.headers["Content-Type"] = "application/json"
+        body = {"success": True, "data": [{"url": request.url, "n": self.sent}], "pagination": {"total": 120}}
+        r.raw = io.BytesIO(json.dumps(body).encode("utf-8"))
+        r.request = request
+        return r
+
+    def close(self):
+        pass
+
+
+def client(cassette, adapter=None, **kwargs):
+    api = API(cassette=cassette, cache_size=0, **kwargs)
+    if adapter is not None:
+        api.session.adapters["https://"].adapter = adapter
+    return api
+
+
+class CassetteTest(TestCase):
+    def test_request_key(self):
+        self.assertEqual(
+            request_key("get", "https://a/v1/x?b=2&a=1"), request_key("GET", "http://b/v1/x?a=1&b=2", None)
+        )
+        self.assertNotEqual(request_key("PATCH", "/v1/x", b'{"a": 1}'), request_key("PATCH", "/v1/x", b'{"a": 2}'))
+
+    def test_record_replay(self):
+        for ext in (".json", ".json.gz", ".json.xz"):
+            with TemporaryDirectory() as tmpdir:
+                path = os.path.join(tmpdir, "api" + ext)
+
+                adapter = FakeAdapter()
+                with client(Cassette(path, mode="record"), adapter, ttls={"/": 0}) as api:
+                    first = api.get_viewer_count()
+                    second = api.get_viewer_count()
+                    shows = list(api.get_shows())
+                self.assertEqual(adapter.sent, 5)
+                self.assertEqual((first[0]["n"], second[0]["n"]), (1, 2))
+
+                cassette = Cassette(path, strict=True)
+                self.assertEqual(len(cassette), 5)
+                with client(cassette, ttls={"/": 0}) as api:
+                    self.assertEqual(api.get_viewer_count(), first)
+                    self.assertEqual(api.get_viewer_count(), second)
+                    self.assertEqual(api.get_viewer_count(), second)  # last response is repeated
+                    self.assertEqual(list(api.get_shows()), shows)
+                    with self.assertRaises(CassetteMiss):
+                        api.get_shows_mini()
+
+    def test_stream_replay(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "api.json.gz")
+            with client(Cassette(path, mode="record"), FakeAdapter()) as api:
+                recorded = list(api.get_shows())
+            with client(Cassette(path, strict=True), stream=True) as api:
+                self.assertEqual(list(api.get_shows()), recorded)
+
+    def test_record_misses(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "api.json.gz")
+            with client(Cassette(path, mode="record"), FakeAdapter()) as api:
+                api.get_viewer_count()
+
+            adapter = FakeAdapter()
+            with client(Cassette(path), adapter) as api:
+                api.get_viewer_count()
+                api.get_shows_mini()
+            self.assertEqual(adapter.sent, 1)
+            self.assertEqual(len(Cassette(path)), 2)
+
+    def test_rerecord(self):
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "api.json.gz")
+            with client(Cassette(path, mode="record"), FakeAdapter(), ttls={"/": 0}) as api:
+                api.get_viewer_count()
+                api.get_viewer_count()
+                mini = api.get_shows_mini()
+
+            # only the requested key is replaced, the other interactions are kept
+            with client(Cassette(path, mode="record"), FakeAdapter(), ttls={"/": 0}) as api:
+                viewers = api.get_viewer_count()
+
+            cassette = Cassette(path, strict=True)
+            self.assertEqual(len(cassette), 2)
+            with client(cassette, ttls={"/": 0}) as api:
+                self.assertEqual(api.get_viewer_count(), viewers)
+                self.assertEqual(api.get_shows_mini(), mini)
@@ -0,0 +1,53 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import pytest
+
+from rbtv.benchmarks.fixtures import episode_page
+
+np = pytest.importorskip("numpy")
+from rbtv.columnar import episodes_to_arrow, episodes_to_numpy, parse_dates, write_parquet  # noqa: E402
+
+
+def pages(total: int):
+    return [episode_page(1, offset, 50, total)["data"] for offset in range(0, total, 50)]
+
+
+class ColumnarTest(TestCase):
+    def test_numpy(self):
+        data = pages(120)
+        columns = episodes_to_numpy(data, strings=True)
+        episodes = [e for page in data for e in page["episodes"]]
+
+        self.assertEqual(columns["id"].tolist(), [e["id"] for e in episodes])
+        self.assertEqual(columns["distributionPublishingDate"].dtype, np.dtype("datetime64[ms]"))
+        offsets, values = columns["hosts_offsets"], columns["hosts_values"]
+        self.assertEqual(len(offsets), len(episodes) + 1)
+        self.assertEqual(values[offsets[5] : offsets[6]].tolist(), episodes[5]["hosts"])
+        self.assertEqual(columns["title"][0], episodes[0]["title"])
+
+    def test_missing_ids(self):
+        episodes = [{"id": 1, "showId": 0, "seasonId": 0}, {"id": 2}]
+        columns = episodes_to_numpy([{"episodes": episodes}])
+        self.assertEqual(columns["showId"].tolist(), [0, -1])
+        self.assertEqual(columns["seasonId"].tolist(), [0, -1])
+
+    def test_parse_dates(self):
+        dates = parse_dates(["2020-05-04T10:30:00.000Z", None, "2020-05-04T12:30:00+02:00"])
+        self.assertEqual(dates[0], dates[2])
+        self.assertTrue(np.isnat(dates[1]))
+
+    def test_arrow_and_parquet(self):
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        table = episodes_to_arrow(pages(70))
+        self.assertEqual(table.num_rows, 70)
+        self.assertEqual(table.column("hosts")[3].as_py(), pages(70)[0]["episodes"][3]["hosts"])
+
+        with TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "episodes.parquet")
+            self.assertEqual(write_parquet(pages(120), path, batch_size=50), 120)
+            table = pq.read_table(path)
+            self.assertEqual(table.num_rows, 120)
+            self.assertEqual(table.column("id").to_pylist(), episodes_to_numpy(pages(120))["id"].tolist())
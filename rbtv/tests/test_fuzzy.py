@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from rbtv import RBTVAPI
+from rbtv.fuzzy import TrigramIndex
+from rbtv.rbtv import alphastring
+
+
+class TrigramIndexTest(TestCase):
+    def setUp(self):
+        self.index = TrigramIndex(alphastring)
+        for i, name in enumerate(["Pen & Paper", "Almost Daily", "Game Two", "Pen & Paper: Unter den Augen Tiamats"]):
+            self.index.add(name, i)
+
+    def test_exact(self):
+        score, value = self.index.search("Almost Daily", 1)[0]
+        self.assertEqual((score, value), (1.0, 1))
+
+    def test_typos(self):
+        self.assertEqual(self.index.search("Pen and Paper", 1)[0][1], 0)
+        self.assertEqual(self.index.search("almost dayli", 1)[0][1], 1)
+        self.assertEqual(self.index.search("gametwo", 1)[0][1], 2)
+
+    def test_ranking(self):
+        results = self.index.search("Pen Paper", 3)
+        self.assertEqual([value for score, value in results][:2], [0, 3])
+        self.assertGreater(results[0][0], results[1][0])
+        self.assertEqual(self.index.search("xyz"), [])
+
+
+class FuzzyMatchTest(TestCase):
+    def test_kinds(self):
+        class API(RBTVAPI):
+            def get_shows_mini(self):
+                return [{"id": 5, "title": "Pen & Paper"}]
+
+            def get_bohnen_portraits(self):
+                return [{"mgmtid": 1, "name": "Florentin"}]
+
+            def get_shows(self):
+                return iter([{"id": 5, "title": "Pen & Paper", "seasons": [{"id": 9, "name": "", "numeric": 2}]}])
+
+        api = API()
+        match = api.fuzzy_match("florentn", kinds=("show", "bohne"))[0]
+        self.assertEqual((match.kind, match.id), ("bohne", 1))
+        match = api.fuzzy_match("pen and paper season 2", kinds=("season",))[0]
+        self.assertEqual((match.kind, match.id, match.name), ("season", 9, "Pen & Paper Season 2"))
@@ -0,0 +1,22 @@
+import subprocess  # nosec
+import sys
+from unittest import TestCase
+
+from rbtv.benchmarks.import_time import LAZY_MODULES, import_times
+
+
+class ImportTest(TestCase):
+    def test_types_lazy_attribute(self):
+        code = "import rbtv; print(rbtv.types.mediaEpisode.__name__)"
+        out = subprocess.check_output([sys.executable, "-c", code], universal_newlines=True)  # nosec
+        self.assertEqual(out.strip(), "mediaEpisode")
+
+    def test_types_not_loaded(self):
+        total, cumulative = import_times("rbtv")
+        self.assertIn("rbtv.rbtv", cumulative)
+        self.assertNotIn("rbtv.types", cumulative)
+
+    def test_optional_modules_not_loaded(self):
+        _, cumulative = import_times("rbtv")
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, cumulative)
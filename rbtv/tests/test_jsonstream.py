@@ -0,0 +1,157 @@
+import json
+from json import JSONDecodeError
+from unittest import TestCase
+from unittest.mock import patch
+
+from rbtv import API, RBTVAPI
+from rbtv.jsonstream import ObjectStreamParser, iter_object
+from rbtv.searchindex import SearchIndex
+from rbtv.store import EntityStore
+
+
+def chunked(data: bytes, size: int):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class IterObjectTest(TestCase):
+    doc = {
+        "success": True,
+        "data": [{"id": 1, "title": "Bohnen für alle", "hosts": [1, 2]}, 12345, "x", None, [{"a": {}}]],
+        "pagination": {"offset": 0, "limit": 50, "total": 123456},
+    }
+
+    def test_chunk_sizes(self):
+        data = json.dumps(self.doc, ensure_ascii=False, indent=1).encode("utf-8")
+        for size in (1, 2, 3, 7, 64, len(data)):
+            events = list(iter_object(chunked(data, size)))
+            self.assertEqual(
+                events,
+                [("success", True)]
+                + [(None, item) for item in self.doc["data"]]
+                + [("pagination", self.doc["pagination"])],
+            )
+
+    def test_strings(self):
+        item = {"a": 'quote " backslash \\ brackets ]}{[ unicode \u00fc', "b": ["\\", '"']}
+        data = json.dumps({"data": [item, "]"]}).encode("ascii")
+        for size in (1, 2, 5):
+            self.assertEqual(list(iter_object(chunked(data, size))), [(None, item), (None, "]")])
+
+    def test_decoded_once(self):
+        item = {"text": "x" * 10000, "list": list(range(1000))}
+        data = json.dumps({"data": [item, item]}).encode("ascii")
+        parser = ObjectStreamParser()
+        with patch.object(parser._json, "raw_decode", wraps=parser._json.raw_decode) as raw_decode:
+            events = []
+            for chunk in chunked(data, 100):
+                events.extend(parser.feed(chunk))
+            events.extend(parser.feed(b"", final=True))
+        self.assertEqual(events, [(None, item), (None, item)])
+        # the key and each item, not once per chunk
+        self.assertEqual(raw_decode.call_count, 3)
+
+    def test_empty(self):
+        self.assertEqual(list(iter_object([b'{"data": [ ], "pagination": 1}'])), [("pagination", 1)])
+        self.assertEqual(list(iter_object([b"{}"])), [])
+
+    def test_not_an_array(self):
+        self.assertEqual(list(iter_object([b'{"data": {"episodes": []}}'])), [("data", {"episodes": []})])
+
+    def test_nested(self):
+        doc = {"success": True, "data": {"bohnen": {"1": {}}, "episodes": [{"id": 1}, {"id": 2}], "x": 1}}
+        data = json.dumps(doc).encode("ascii")
+        for size in (1, 4, len(data)):
+            events = list(iter_object(chunked(data, size), "data.episodes"))
+            self.assertEqual(
+                events,
+                [("success", True), ("data.bohnen", {"1": {}}), (None, {"id": 1}), (None, {"id": 2}), ("data.x", 1)],
+            )
+        self.assertEqual(list(iter_object([b'{"data": []}'], "data.episodes")), [("data", [])])
+
+    def test_invalid(self):
+        for data in (b'{"data": [1, 2', b'{"data" 1}', b"[1]", b'{"a": 1} x'):
+            with self.assertRaises(JSONDecodeError):
+                list(iter_object([data]))
+
+
+class FakeStreamedResponse:
+    status_code = 200
+    headers: dict = {}
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        return iter(chunked(self.data, 5))
+
+
+class StreamedPagingTest(TestCase):
+    def test_items(self):
+        api = API(stream=True)
+
+        def get(url, timeout, stream):
+            offset = int(url.split("offset=")[1].split("&")[0])
+            data = list(range(offset, min(offset + 10, 25)))
+            body = {"success": True, "data": data, "pagination": {"total": 25}}
+            return FakeStreamedResponse(json.dumps(body).encode("ascii"))
+
+        with patch.object(api.session, "get", get):
+            self.assertEqual(list(api._request_paged("/v1/test", 10)), list(range(25)))
+
+    def test_not_an_array(self):
+        api = API(stream=True)
+        body = b'{"success": true, "data": {"episodes": []}, "pagination": {"total": 1}}'
+        with patch.object(api.session, "get", lambda url, timeout, stream: FakeStreamedResponse(body)):
+            with self.assertRaises(ValueError):
+                list(api._request_paged("/v1/test", 10))
+
+    def test_episodes(self):
+        api = API(stream=True)
+        bohnen = {"1": {"mgmtid": 1}, "2": {"mgmtid": 2}}
+        episodes = [{"id": 10, "hosts": [1]}, {"id": 11, "hosts": [1, 2]}, {"id": 12, "hosts": []}]
+        expected = [
+            {"bohnen": {"1": {"mgmtid": 1}}, "episodes": [episodes[0]]},
+            {"bohnen": bohnen, "episodes": [episodes[1]]},
+            {"bohnen": {}, "episodes": [episodes[2]]},
+        ]
+
+        for data in ({"bohnen": bohnen, "episodes": episodes}, {"episodes": episodes, "bohnen": bohnen}):
+            body = json.dumps({"success": True, "data": data, "pagination": {"total": 3}}).encode("ascii")
+            with patch.object(api.session, "get", lambda url, timeout, stream: FakeStreamedResponse(body)):
+                pages = list(api.get_episodes_by_show(1))
+            self.assertEqual(pages, expected)
+
+    def test_ingest(self):
+        api = RBTVAPI(stream=True, store=EntityStore(), search_index=SearchIndex())
+        shows = {"success": True, "data": [{"id": 5, "title": "Pen & Paper"}], "pagination": {"total": 1}}
+        episodes = {
+            "success": True,
+            "data": {
+                "bohnen": {"1": {"mgmtid": 1, "name": "Hauke"}},
+                "episodes": [{"id": 10, "title": "Finale", "hosts": [1]}],
+            },
+            "pagination": {"total": 1},
+        }
+
+        def get(url, timeout, stream):
+            body = episodes if "/episode/" in url else shows
+            return FakeStreamedResponse(json.dumps(body).encode("ascii"))
+
+        with patch.object(api.session, "get", get):
+            list(api.get_shows())
+            list(api.get_episodes_by_show(5))
+
+        self.assertEqual(api.store.get("show", 5, "full"), {"id": 5, "title": "Pen & Paper"})
+        self.assertEqual(api.store.get("bohne", 1, "portrait"), {"mgmtid": 1, "name": "Hauke"})
+        self.assertEqual(api.store.get("episode", 10, "full")["title"], "Finale")
+        self.assertEqual([episode["id"] for episode in api.search_local("final")["episodes"]], [10])
+        self.assertEqual(len(api.cache), 0)
@@ -0,0 +1,72 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from requests.exceptions import HTTPError
+
+from rbtv import API
+from rbtv.metrics import Metrics, RequestEvent, endpoint_template
+from rbtv.tests.test_cache import FakeResponse
+
+
+class MetricsTest(TestCase):
+    def test_endpoint_template(self):
+        self.assertEqual(endpoint_template("/v1/media/episode/byshow/5"), "/v1/media/episode/byshow/{id}")
+        self.assertEqual(endpoint_template("/v1/subscription/2/15"), "/v1/subscription/{id}/{id}")
+        self.assertEqual(endpoint_template("/v1/search/pen%20paper"), "/v1/search/{query}")
+        self.assertEqual(endpoint_template("/v1/frontend/init"), "/v1/frontend/init")
+
+    def test_prometheus(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        for latency, cache in ((0.05, "miss"), (0.5, "miss"), (0.0, "hit")):
+            event = RequestEvent("GET", '/v1/x/"{id}"', "")
+            event.status = 200
+            event.latency = latency
+            event.cache = cache
+            event.bytes = 10
+            metrics.observe(event)
+
+        text = metrics.to_prometheus()
+        self.assertIn('rbtv_requests_total{endpoint="/v1/x/\\"{id}\\"",method="GET",status="200",cache="miss"} 2', text)
+        self.assertIn('rbtv_response_bytes_total{endpoint="/v1/x/\\"{id}\\""} 30', text)
+        self.assertIn('rbtv_request_duration_seconds_bucket{endpoint="/v1/x/\\"{id}\\"",le="0.1"} 1', text)
+        self.assertIn('rbtv_request_duration_seconds_bucket{endpoint="/v1/x/\\"{id}\\"",le="+Inf"} 2', text)
+        self.assertIn('rbtv_request_duration_seconds_count{endpoint="/v1/x/\\"{id}\\""} 2', text)
+
+        (stats,) = metrics.stats()
+        self.assertEqual((stats.requests, stats.network, stats.bytes), (3, 2, 30))
+        self.assertAlmostEqual(stats.mean_latency, 0.275)
+
+
+class HookTest(TestCase):
+    def test_api_events(self):
+        api = API(retries=1)
+        pre = []
+        post = []
+        api.pre_request_hooks.append(lambda event: pre.append(event.endpoint))
+        api.post_request_hooks.append(post.append)
+
+        statuses = iter([503, 200, 500, 500])
+
+        def get(url, headers=None, timeout=None):
+            return FakeResponse({"success": True, "data": [1, 2]}, next(statuses))
+
+        with patch("rbtv.rbtv.sleep"), patch.object(api.session, "get", get):
+            api.get_episode(5)
+            api.get_episode(5)
+            with patch.object(FakeResponse, "raise_for_status", raise_http), self.assertRaises(HTTPError):
+                api.get_episode(6)
+
+        self.assertEqual(pre, ["/v1/media/episode/{id}"] * 3)
+        self.assertEqual(
+            [(e.status, e.cache, e.retries) for e in post], [(200, "miss", 1), (None, "hit", 0), (500, "miss", 1)]
+        )
+        self.assertEqual(post[0].bytes, len(b'{"success": true, "data": [1, 2]}'))
+        self.assertEqual(post[2].error, "HTTPError")
+
+        (stats,) = api.metrics.stats()
+        self.assertEqual((stats.requests, stats.network, stats.errors, stats.retries), (3, 2, 1, 2))
+
+
+def raise_http(self):
+    if self.status_code >= 400:
+        raise HTTPError(self.status_code)
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from rbtv import RBTVAPI
+from rbtv.mirror import Mirror
+
+
+class FakeMediathek(RBTVAPI):
+    """Two shows with 120 and 3 episodes. Episode ids increase with publishing date."""
+
+    def __init__(self):
+        super().__init__()
+        self.episodes = {1: list(range(1000, 1120)), 2: [2000, 2001, 2002]}
+        self.requests = []
+
+    def _request(self, path, offset=0, limit=50, **params):
+        self.requests.append(path)
+        if path == "/v1/bohne/portrait/all":
+            data = [{"mgmtid": 7, "name": "Bohne"}]
+            return {"success": True, "data": data}
+        if path == "/v1/media/show/all":
+            data = [
+                {
+                    "id": show_id,
+                    "title": f"Show {show_id}",
+                    "seasons": [{"id": show_id * 10, "showId": show_id}],
+                    "lastEpisode": {"episodes": [{"id": ids[-1], "distributionPublishingDate": str(ids[-1])}]},
+                }
+                for show_id, ids in self.episodes.items()
+            ]
+        else:
+            show_id = int(path.rsplit("/", 1)[1])
+            ids = sorted(self.episodes[show_id], reverse=params["order"] == "DESC")
+            episodes = [
+                {"id": i, "showId": show_id, "seasonId": show_id * 10, "distributionPublishingDate": str(i)}
+                for i in ids
+            ]
+            data = {"episodes": episodes[offset : offset + limit]}
+            return {"success": True, "data": data, "pagination": {"total": len(ids)}}
+        return {"success": True, "data": data[offset : offset + limit], "pagination": {"total": len(data)}}
+
+
+class MirrorTest(TestCase):
+    def test_incremental(self):
+        api = FakeMediathek()
+        with Mirror(":memory:") as mirror:
+            report = mirror.sync(api)
+            self.assertEqual(report.requests, 1 + 1 + 3 + 1)
+            self.assertEqual(report.episodes_added, 123)
+            self.assertEqual(mirror.count("episodes"), 123)
+            self.assertEqual(mirror.count("seasons"), 2)
+
+            report = mirror.sync(api)
+            self.assertEqual((report.requests, report.requests_saved, report.shows_unchanged), (2, 4, 2))
+
+            api.episodes[1].append(1120)
+            report = mirror.sync(api)
+            self.assertEqual((report.requests, report.shows_updated, report.episodes_added), (3, 1, 1))
+            self.assertEqual(report.requests_saved, 3)
+            self.assertEqual(list(mirror.episodes(1))[-1]["id"], 1120)
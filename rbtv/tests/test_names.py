@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from rbtv import RBTVAPI, NameIndex
+
+
+class NameIndexTest(TestCase):
+    def setUp(self):
+        self.index = NameIndex("name", "mgmtid", "Bohne", synonyms={"eddy": "etienne"})
+        self.index.update([{"name": "Étienne", "mgmtid": 1}, {"name": "Simon Krätschmer", "mgmtid": "2"}])
+
+    def test_lookup(self):
+        self.assertEqual(self.index.lookup("etienne"), 1)
+        self.assertEqual(self.index.lookup("Eddy"), 1)
+        self.assertEqual(self.index.lookup("Simon Krätschmer"), 2)
+        with self.assertRaises(ValueError):
+            self.index.lookup("nobody")
+
+    def test_names_to_ids(self):
+        self.assertEqual(self.index.names_to_ids(["eddy", "simonkratschmer"]), [1, 2])
+        with self.assertRaisesRegex(ValueError, "'a', 'b'"):
+            self.index.names_to_ids(["a", "etienne", "b"])
+
+
+class RBTVAPINameTest(TestCase):
+    def test_index_is_reused(self):
+        calls = []
+
+        class API(RBTVAPI):
+            def get_shows_mini(self):
+                calls.append(1)
+                return [{"id": 5, "title": "Pen & Paper"}, {"id": 6, "title": "Almost Daily"}]
+
+        api = API(name_index_ttl=60)
+        self.assertEqual(api.show_name_to_id("pen paper"), 5)
+        self.assertEqual(api.show_names_to_ids(["Almost Daily", "PEN & PAPER"]), [6, 5])
+        self.assertEqual(len(calls), 1)
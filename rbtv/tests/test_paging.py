@@ -0,0 +1,47 @@
+import threading
+import time
+from itertools import islice
+from unittest import TestCase
+
+from rbtv import API
+
+
+class PagedAPI(API):
+    """Serves a fake paginated endpoint of `total` integers without network access."""
+
+    def __init__(self, total: int, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.total = total
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def _request(self, path, offset=0, limit=50, **params):
+        with self.lock:
+            self.requested.append(offset)
+        time.sleep(0.001 * ((offset // limit) % 3))  # finish out of order
+        data = list(range(offset, min(offset + limit, self.total)))
+        return {"success": True, "data": data, "pagination": {"offset": offset, "limit": limit, "total": self.total}}
+
+
+class PagingTest(TestCase):
+    def test_serial(self):
+        api = PagedAPI(123)
+        self.assertEqual(list(api._request_paged("/v1/test", 10)), list(range(123)))
+        self.assertEqual(api.requested, list(range(0, 123, 10)))
+
+    def test_parallel_in_order(self):
+        for workers in (2, 4, 32):
+            api = PagedAPI(1234)
+            self.assertEqual(list(api._request_paged("/v1/test", 10, workers=workers)), list(range(1234)))
+            self.assertEqual(sorted(api.requested), list(range(0, 1234, 10)))
+
+    def test_parallel_client_default(self):
+        api = PagedAPI(95, page_workers=3)
+        pages = list(api._request_paged("/v1/test", 10, flat=False))
+        self.assertEqual(len(pages), 10)
+        self.assertEqual(pages[-1], list(range(90, 95)))
+
+    def test_parallel_early_stop(self):
+        api = PagedAPI(10000)
+        self.assertEqual(list(islice(api._request_paged("/v1/test", 10, workers=4), 15)), list(range(15)))
+        self.assertLessEqual(len(api.requested), 1 + 4 + 1)
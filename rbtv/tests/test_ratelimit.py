@@ -0,0 +1,95 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from requests.exceptions import HTTPError
+
+from rbtv import API
+from rbtv.ratelimit import RateLimiter, backoff_delay, parse_retry_after
+from rbtv.tests.test_cache import FakeResponse
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RateLimiterTest(TestCase):
+    def test_token_bucket(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=2, burst=3, max_rate=2, clock=clock)
+        self.assertEqual([limiter.reserve() for _ in range(3)], [0, 0, 0])
+        self.assertEqual(limiter.reserve(), 0.5)
+        self.assertEqual(limiter.reserve(), 1.0)
+        clock.now = 10
+        self.assertEqual(limiter.reserve(), 0)
+
+    def test_adaptive(self):
+        clock = FakeClock()
+        limiter = RateLimiter(rate=4, burst=1, min_rate=1, max_rate=5, increase=0.5, clock=clock)
+        limiter.throttled(3)
+        self.assertEqual(limiter.rate, 2)
+        self.assertEqual(limiter.reserve(), 3)  # paused
+        limiter.throttled()
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 1)
+        for _ in range(20):
+            limiter.succeeded()
+        self.assertEqual(limiter.rate, 5)
+
+    def test_retry_after(self):
+        self.assertEqual(parse_retry_after("120"), 120)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470), 10)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+        for attempt in range(10):
+            self.assertTrue(0 <= backoff_delay(attempt, 1, 8) <= min(8, 2**attempt))
+
+
+class RetryTest(TestCase):
+    def setUp(self):
+        self.sleeps = []
+        self.sleep = patch("rbtv.rbtv.sleep", self.sleeps.append)
+        self.sleep.start()
+
+    def tearDown(self):
+        self.sleep.stop()
+
+    def fake_get(self, statuses):
+        calls = []
+        statuses = iter(statuses)
+
+        def get(url, headers=None, timeout=None):
+            status = next(statuses)
+            calls.append(status)
+            headers = {"Retry-After": "7"} if status == 429 else {}
+            return FakeResponse({"success": True, "data": 1}, status, headers)
+
+        return calls, get
+
+    def test_retry(self):
+        limiter = RateLimiter(rate=10, max_rate=20, sleep=self.sleeps.append)
+        api = API(rate_limiter=limiter)
+        calls, get = self.fake_get([429, 503, 200])
+        with patch.object(api.session, "get", get):
+            self.assertEqual(api.get_viewer_count(), 1)
+        self.assertEqual(calls, [429, 503, 200])
+        self.assertEqual(self.sleeps[0], 7)  # retry delay
+        self.assertAlmostEqual(self.sleeps[1], 7, places=1)  # limiter pause
+        self.assertLess(limiter.rate, 10)
+
+    def test_give_up(self):
+        api = API(retries=2)
+        calls, get = self.fake_get([500] * 5)
+        with patch.object(api.session, "get", get), patch.object(FakeResponse, "raise_for_status", raise_http):
+            with self.assertRaises(HTTPError):
+                api.get_viewer_count()
+        self.assertEqual(calls, [500, 500, 500])
+        self.assertEqual(len(self.sleeps), 2)
+
+
+def raise_http(self):
+    if self.status_code >= 400:
+        raise HTTPError(self.status_code)
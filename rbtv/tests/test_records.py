@@ -0,0 +1,54 @@
+from types import MappingProxyType
+from unittest import TestCase
+
+from rbtv import RBTVAPI
+from rbtv.benchmarks.fixtures import episode_page, show
+from rbtv.records import Record, record_class, to_record
+
+
+class RecordsTest(TestCase):
+    def test_fields(self):
+        cls = record_class("mediaEpisode")
+        self.assertIs(cls, record_class("mediaEpisode"))
+        self.assertIn("distributionPublishingDate", cls._fields)
+        self.assertFalse(hasattr(cls(episode_page(1, 0, 1, 1)["data"]["episodes"][0]), "__dict__"))
+
+    def test_nested(self):
+        page = episode_page(1, 0, 2, 2)["data"]
+        rec = to_record(page, "mediaEpisodeCombinedResponse")
+        self.assertIsInstance(rec._episodes, tuple)
+        self.assertIsInstance(rec._episodes[0]._thumbnail[0], Record)
+        self.assertIsInstance(rec._bohnen, MappingProxyType)
+        self.assertEqual(rec.to_dict(), page)
+
+    def test_lazy_nested(self):
+        page = episode_page(1, 0, 2, 2)["data"]
+        rec = to_record(page, "mediaEpisodeCombinedResponse", lazy=True)
+        self.assertIsInstance(rec._episodes, list)  # not converted yet
+        episode = rec.episodes[0]
+        self.assertIsInstance(rec._episodes, tuple)
+        self.assertIsInstance(episode, Record)
+        self.assertEqual(episode.thumbnail[0].width, 1920)
+        self.assertIsInstance(rec.bohnen, MappingProxyType)
+        self.assertEqual(rec.to_dict(), page)
+
+    def test_immutable_and_dict_access(self):
+        rec = to_record(show(3), "mediaShowResponse")
+        with self.assertRaises(AttributeError):
+            rec.title = "x"
+        self.assertEqual(rec["seasons"][0]["id"], 301)
+        self.assertEqual(rec.get("missing", 1), 1)
+        self.assertIsNone(rec.backgroundImage)
+        with self.assertRaises(KeyError):
+            rec["missing"]
+
+
+class ApiRecordsTest(TestCase):
+    def test_get_season(self):
+        class API(RBTVAPI):
+            def _request(self, path, **params):
+                return {"success": True, "data": show(3)}
+
+        season = API(records=True).get_season(3, 302)
+        self.assertEqual(type(season).__name__, "mediaSeasonResponse")
+        self.assertEqual(season.numeric, 2)
@@ -0,0 +1,88 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+from unittest.mock import patch
+
+from rbtv import API
+from rbtv.schedule import day_starts, schedule_windows
+
+UTC = timezone.utc
+
+
+def fake_schedule(startDay: float, endDay: float):
+    """Returns one schedule day per calendar day, including both boundary days like the real API."""
+
+    day = datetime.fromtimestamp(startDay, UTC)
+    end = datetime.fromtimestamp(endDay, UTC)
+    days = []
+    while day <= end:
+        days.append({"date": day.strftime("%Y-%m-%dT%H:%M:%S.000Z"), "elements": [{"id": int(day.timestamp())}]})
+        day += timedelta(days=1)
+    return days
+
+
+class ScheduleAPI(API):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def _request(self, path, **params):
+        assert path == "/v1/schedule/normalized"
+        assert params["endDay"] - params["startDay"] <= 14 * 86400
+        with self.lock:
+            self.requested.append((params["startDay"], params["endDay"]))
+        return {"success": True, "data": fake_schedule(params["startDay"], params["endDay"])}
+
+
+class ScheduleTest(TestCase):
+    def test_windows(self):
+        days = day_starts(datetime(2021, 1, 1, 12, tzinfo=UTC), datetime(2021, 1, 31, 8, tzinfo=UTC))
+        self.assertEqual(len(days), 31)
+        self.assertEqual(days[0], datetime(2021, 1, 1, tzinfo=UTC))
+        windows = schedule_windows(days[:5] + days[10:])
+        self.assertEqual([len(w) for w in windows], [5, 14, 7])
+
+    def test_range(self):
+        api = ScheduleAPI()
+        start = datetime(2021, 1, 1, tzinfo=UTC)
+        res = api.get_schedule_range(start, datetime(2021, 3, 31, tzinfo=UTC))
+        self.assertEqual(len(api.requested), 7)
+        self.assertEqual(len(res), 90)
+        self.assertEqual(res[0]["date"], "2021-01-01T00:00:00.000Z")
+        self.assertEqual(res[-1]["date"], "2021-03-31T00:00:00.000Z")
+        self.assertEqual(len({day["date"] for day in res}), 90)
+
+        # overlapping query only fetches the missing days
+        api.requested.clear()
+        res = api.get_schedule_range(datetime(2021, 3, 20, tzinfo=UTC), datetime(2021, 4, 5, tzinfo=UTC))
+        self.assertEqual(len(res), 17)
+        self.assertEqual(
+            api.requested,
+            [(datetime(2021, 4, 1, tzinfo=UTC).timestamp(), datetime(2021, 4, 6, tzinfo=UTC).timestamp())],
+        )
+
+        api.requested.clear()
+        self.assertEqual(len(api.get_schedule_range(start, datetime(2021, 4, 5, tzinfo=UTC))), 95)
+        self.assertEqual(api.requested, [])
+
+    def test_workers(self):
+        for page_workers, workers, expected in ((1, None, 1), (3, None, 3), (1, 2, 2)):
+            api = ScheduleAPI(page_workers=page_workers)
+            with patch("rbtv.rbtv.ThreadPoolExecutor", wraps=ThreadPoolExecutor) as executor:
+                api.get_schedule_range(datetime(2021, 1, 1, tzinfo=UTC), datetime(2021, 12, 31, tzinfo=UTC), workers)
+            executor.assert_called_once_with(expected)
+
+    def test_same_calendar_day(self):
+        api = ScheduleAPI()
+        window = day_starts(datetime(2021, 1, 1, tzinfo=UTC), datetime(2021, 1, 2, tzinfo=UTC))
+        days = [
+            {"date": "2021-01-01T00:00:00.000Z", "elements": []},
+            {"date": "2021-01-01T23:00:00.000Z", "elements": []},
+            {"date": "2021-01-01T23:00:00.000Z", "elements": []},
+        ]
+        found = {}
+        with self.assertLogs(level="WARNING"):
+            api._schedule_store(window, days, found)
+        self.assertEqual(found, {window[0].date(): days[:2], window[1].date(): []})
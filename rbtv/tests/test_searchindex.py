@@ -0,0 +1,79 @@
+from unittest import TestCase
+
+from rbtv import RBTVAPI
+from rbtv.searchindex import SearchIndex, tokenize
+from rbtv.tests.test_cache import FakeResponse
+from rbtv.text import alphastring
+
+SHOWS = [
+    {"id": 1, "title": "Pen & Paper", "description": "Rollenspiel mit Hauke", "thumbnail": []},
+    {"id": 2, "title": "Almost Daily", "description": "Täglicher Talk, manchmal über Pen & Paper", "thumbnail": []},
+]
+EPISODES = {
+    "bohnen": {},
+    "episodes": [
+        {
+            "id": 7,
+            "title": "Das Schwarze Auge #1",
+            "showName": "Pen & Paper",
+            "description": "Die Helden brechen auf",
+            "thumbnail": [],
+            "distributionPublishingDate": "2021-01-01T20:00:00.000Z",
+            "firstBroadcastdate": None,
+        }
+    ],
+}
+BLOG = [{"id": 3, "title": "Neue Sendungen", "subtitle": "Pen & Paper wird wöchentlich", "thumbImage": []}]
+
+
+class SearchIndexTest(TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.ingest("/v1/media/show/all", SHOWS)
+        self.index.ingest("/v1/media/episode/byshow/1", EPISODES)
+        self.index.ingest("/v1/blog/preview/all", BLOG)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Täglicher Talk, über Pen&Paper!"), ["taglicher", "talk", "uber", "pen", "paper"])
+        self.assertEqual("".join(tokenize("Étienne Gardé")), alphastring("Étienne Gardé"))
+
+    def test_ranking(self):
+        res = self.index.search("pen paper")
+        # the title match ranks above the description match
+        self.assertEqual([show["id"] for show in res["shows"]], [1, 2])
+        self.assertEqual(res["shows"][0], {"id": 1, "title": "Pen & Paper", "thumbnail": []})
+        self.assertEqual(res["episodes"][0]["distibutionPublishingDate"], "2021-01-01T20:00:00.000Z")
+        self.assertEqual(res["blog"], [{"id": 3, "title": "Neue Sendungen", "thumbnail": []}])
+
+    def test_prefix(self):
+        self.assertEqual([show["id"] for show in self.index.search("ta")["shows"]], [2])
+        self.assertEqual(self.index.search("ta", prefix=False)["shows"], [])
+        self.assertEqual([ep["id"] for ep in self.index.search("schwarze au")["episodes"]], [7])
+        self.assertEqual(self.index.search("xyz pen"), {"shows": [], "episodes": [], "blog": []})
+
+    def test_update(self):
+        # reduced responses keep the indexed description
+        self.index.ingest("/v1/media/show/preview/mini/all", [{"id": 1, "title": "Pen and Paper", "thumbnail": []}])
+        self.assertEqual(self.index.search("hauke")["shows"][0]["title"], "Pen and Paper")
+        self.assertEqual(self.index.search("and")["shows"][0]["id"], 1)
+
+        self.index.add("show", 1, {}, title="Pen & Paper", text="")
+        self.assertEqual(self.index.search("hauke")["shows"], [])
+
+        self.assertTrue(self.index.remove("show", 2))
+        self.assertEqual(self.index.search("talk")["shows"], [])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index._terms, sorted(self.index._postings))
+
+
+class RBTVAPISearchTest(TestCase):
+    def test_search_local(self):
+        api = RBTVAPI(search_index=SearchIndex())
+        api.session.get = lambda url, headers, timeout: FakeResponse(
+            {"success": True, "data": SHOWS, "pagination": {"total": len(SHOWS)}}
+        )
+        list(api.get_shows())
+        self.assertEqual([show["id"] for show in api.search_local("almost d")["shows"]], [2])
+
+        with self.assertRaises(RuntimeError):
+            RBTVAPI().search_local("pen")
@@ -0,0 +1,108 @@
+import asyncio
+from unittest import TestCase
+
+import pytest
+
+from rbtv import RBTVAPI, SeasonIndex
+
+SHOWS = {
+    1: {"id": 1, "title": "Pen & Paper", "seasons": [{"id": 10, "numeric": 1}, {"id": 11, "numeric": 2}]},
+    2: {"id": 2, "title": "Almost Daily", "seasons": [{"id": 20, "numeric": 1}]},
+}
+
+
+def respond(path, params):
+    if path == "/v1/media/show/all":
+        return {"success": True, "data": list(SHOWS.values()), "pagination": {"total": len(SHOWS)}}
+    show_id = int(path.rsplit("/", 1)[1])
+    return {"success": True, "data": SHOWS[show_id]}
+
+
+class FakeRBTVAPI(RBTVAPI):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.paths = []
+
+    def _request(self, path, **params):
+        self.paths.append(path)
+        return respond(path, params)
+
+
+class SeasonIndexTest(TestCase):
+    def test_add_shows(self):
+        index = SeasonIndex()
+        index.add_shows(SHOWS.values())
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.show_id(11), 1)
+        self.assertEqual(index.get(20), {"id": 20, "numeric": 1})
+        self.assertEqual(index.season_ids(1), [10, 11])
+        self.assertIsNone(index.get(99))
+
+        # re-adding a show drops seasons which were removed
+        index.add_shows([{"id": 1, "seasons": [{"id": 12}]}])
+        self.assertNotIn(10, index)
+        self.assertEqual(index.season_ids(1), [12])
+        self.assertEqual(index.show_id(20), 2)
+
+    def test_copies(self):
+        index = SeasonIndex()
+        show = {"id": 1, "seasons": [{"id": 10, "numeric": 1}]}
+        index.add_shows([show])
+        show["seasons"][0]["numeric"] = 2
+        index.get(10)["numeric"] = 3
+        self.assertEqual(index.get(10), {"id": 10, "numeric": 1})
+
+
+class RBTVAPISeasonTest(TestCase):
+    def test_get_season(self):
+        api = FakeRBTVAPI()
+        self.assertEqual(api.get_season(1, 11)["numeric"], 2)
+        self.assertEqual(api.get_season(1, 10)["numeric"], 1)
+        self.assertEqual(api.paths, ["/v1/media/show/1"])
+        with self.assertRaises(KeyError):
+            api.get_season(2, 10)
+
+    def test_get_season_by_id(self):
+        api = FakeRBTVAPI()
+        self.assertEqual(api.get_season_by_id(20)["id"], 20)
+        self.assertEqual(api.season_to_show_id(11), 1)
+        self.assertEqual(api.paths, ["/v1/media/show/all"])
+
+        # unknown seasons don't trigger another full scan before the ttl expired
+        with self.assertRaises(KeyError):
+            api.get_season_by_id(99)
+        self.assertEqual(api.paths, ["/v1/media/show/all"])
+
+    def test_filled_by_bulk(self):
+        api = FakeRBTVAPI()
+        list(api.get_shows_by_id([1, 2]))
+        api.paths.clear()
+        self.assertEqual(api.season_to_show_id(20), 2)
+        self.assertEqual(api.paths, [])
+
+    def test_async(self):
+        pytest.importorskip("aiohttp")
+        from rbtv.aio import AsyncRBTVAPI
+
+        class FakeAsyncRBTVAPI(AsyncRBTVAPI):
+            def __init__(self, **kwargs) -> None:
+                super().__init__(**kwargs)
+                self.paths = []
+
+            async def _request(self, path, **params):
+                self.paths.append(path)
+                return respond(path, params)
+
+        async def main():
+            api = FakeAsyncRBTVAPI()
+            try:
+                season = await api.get_season(2, 20)
+                show_id = await api.season_to_show_id(11)
+                return season, show_id, api.paths
+            finally:
+                await api.close()
+
+        season, show_id, paths = asyncio.run(main())
+        self.assertEqual(season["id"], 20)
+        self.assertEqual(show_id, 1)
+        self.assertEqual(paths, ["/v1/media/show/2", "/v1/media/show/all"])
@@ -0,0 +1,32 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+import requests
+
+from rbtv import API
+
+
+class SessionTest(TestCase):
+    def test_pool(self):
+        with API(pool_connections=2, pool_maxsize=7) as api:
+            for url in ("https://api.rocketbeans.tv/v1/", "http://localhost/"):
+                adapter = api.session.get_adapter(url)
+                self.assertEqual(adapter._pool_connections, 2)
+                self.assertEqual(adapter._pool_maxsize, 7)
+                self.assertEqual(adapter.poolmanager.connection_pool_kw["maxsize"], 7)
+            self.assertEqual(api.session.headers["Connection"], "keep-alive")
+
+        with API(keep_alive=False) as api:
+            self.assertEqual(api.session.headers["Connection"], "close")
+
+    def test_closed_on_exit(self):
+        with patch.object(requests.Session, "close", autospec=True, side_effect=requests.Session.close) as close:
+            with API() as api:
+                close.assert_not_called()
+            close.assert_called_once_with(api.session)
+
+            close.reset_mock()
+            with self.assertRaises(ValueError):
+                with API() as api:
+                    raise ValueError
+            close.assert_called_once_with(api.session)
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import patch
+
+import pytest
+
+from rbtv import API
+from rbtv.singleflight import SingleFlight
+from rbtv.tests.test_cache import FakeResponse
+
+
+class SingleFlightTest(TestCase):
+    def test_threads(self):
+        api = API(ttls={"/v1/frontend/init": 0})  # no caching, only coalescing
+        calls = []
+        barrier = threading.Barrier(20)
+
+        def get(url, headers=None, timeout=None):
+            calls.append(url)
+            time.sleep(0.05)
+            return FakeResponse({"success": True, "data": {"value": len(calls)}})
+
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(api.get_frontend_init_info())
+
+        with patch.object(api.session, "get", get):
+            threads = [threading.Thread(target=worker) for _ in range(20)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(results, [{"value": 1}] * 20)
+            self.assertEqual(len({id(res) for res in results}), 20)  # callers get their own copies
+
+            api.get_frontend_init_info()
+            self.assertEqual(len(calls), 2)
+
+    def test_leader_shares(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        value = {"a": 1}
+        results = []
+
+        def func():
+            started.set()
+            release.wait()
+            return value
+
+        t = threading.Thread(target=lambda: results.append(flights.do("key", func)))
+        t.start()
+        started.wait()
+        follower = threading.Thread(target=lambda: results.append(flights.do("key", func)))
+        follower.start()
+        while not flights._calls["key"].waiters:
+            time.sleep(0.001)
+        release.set()
+        t.join()
+        follower.join()
+
+        # the leader must copy as well, because the follower got the same object
+        self.assertEqual(results, [(value, True), (value, True)])
+        self.assertEqual(flights.do("key", lambda: 2), (2, False))
+
+    def test_leader_copies(self):
+        api = API(ttls={"/v1/frontend/init": 0})
+        fetched = []
+        barrier = threading.Barrier(2)
+        fetch = api._fetch
+
+        def slow_fetch(url, path, event, refresh=False):
+            time.sleep(0.05)
+            res = fetch(url, path, event, refresh)
+            fetched.append(res)
+            return res
+
+        results = []
+
+        def worker():
+            barrier.wait()
+            res = api.get_frontend_init_info()
+            results.append(res)
+            res["value"] = "modified"
+
+        api._fetch = slow_fetch
+        with patch.object(
+            api.session, "get", lambda url, headers, timeout: FakeResponse({"success": True, "data": {"value": 1}})
+        ):
+            threads = [threading.Thread(target=worker) for _ in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(len(fetched), 1)
+        self.assertEqual(fetched[0]["data"], {"value": 1})
+        self.assertTrue(all(res is not fetched[0]["data"] for res in results))
+        self.assertEqual(sorted(key[3] for key in api.metrics._requests), ["coalesced", "miss"])
+
+    def test_errors(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            time.sleep(0.05)
+            raise ValueError("failed")
+
+        def follower():
+            started.wait()
+            try:
+                flights.do("key", fail)
+            except ValueError as e:
+                errors.append(e)
+
+        t = threading.Thread(target=follower)
+        t.start()
+        with self.assertRaises(ValueError):
+            flights.do("key", fail)
+        t.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(len(flights), 0)
+
+
+def import_aio():
+    """Returns `rbtv.aio` or skips the test if `aiohttp` is not installed."""
+
+    pytest.importorskip("aiohttp")
+    import rbtv.aio
+
+    return rbtv.aio
+
+
+class AsyncSingleFlightTest(TestCase):
+    def test_async_api(self):
+        AsyncAPI = import_aio().AsyncAPI
+
+        class FetchAPI(AsyncAPI):
+            fetches = 0
+
+            async def _fetch(self, url, path, event, refresh=False):
+                self.fetches += 1
+                await asyncio.sleep(0.01)
+                return {"success": True, "data": {"url": url}}
+
+        async def main():
+            api = FetchAPI()
+            results = await asyncio.gather(*(api.get_shows_mini() for _ in range(50)))
+            self.assertEqual(api.fetches, 1)
+            self.assertEqual(len({id(res) for res in results}), 50)
+
+        asyncio.run(main())
+
+    def test_cancel_follower(self):
+        AsyncSingleFlight = import_aio().AsyncSingleFlight
+
+        async def main():
+            flights = AsyncSingleFlight()
+
+            async def slow():
+                await asyncio.sleep(0.02)
+                return 1
+
+            first = asyncio.ensure_future(flights.do("key", slow))
+            second = asyncio.ensure_future(flights.do("key", slow))
+            await asyncio.sleep(0)
+            first.cancel()
+            self.assertEqual(await second, (1, True))
+            self.assertEqual(len(flights), 0)
+
+        asyncio.run(main())
+
+    def test_leader_shares(self):
+        AsyncSingleFlight = import_aio().AsyncSingleFlight
+
+        async def main():
+            flights = AsyncSingleFlight()
+
+            async def slow():
+                await asyncio.sleep(0.01)
+                return {"a": 1}
+
+            first, second = await asyncio.gather(flights.do("key", slow), flights.do("key", slow))
+            self.assertTrue(first[1])
+            self.assertTrue(second[1])
+            self.assertIs(first[0], second[0])
+            self.assertEqual(await flights.do("key", slow), ({"a": 1}, False))
+
+        asyncio.run(main())
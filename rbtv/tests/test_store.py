@@ -0,0 +1,137 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from rbtv import API
+from rbtv.store import EntityStore
+from rbtv.tests.test_cache import FakeResponse
+
+PORTRAIT = {"mgmtid": 33, "name": "Etienne", "role": "onair", "episodeCount": 10, "images": []}
+EPISODE = {
+    "id": 7,
+    "showId": 1,
+    "showName": "Pen & Paper",
+    "title": "Folge 1",
+    "description": "...",
+    "hosts": [33],
+    "duration": 3600,
+    "prev": {"id": 6, "title": "Folge 0", "hosts": []},
+    "next": None,
+}
+SHOW = {
+    "id": 1,
+    "title": "Pen & Paper",
+    "genre": "Rollenspiel",
+    "isExternal": False,
+    "isTruePodcast": False,
+    "thumbnail": [],
+    "podcast": {"feedUrl": "https://example.com/feed"},
+    "hosts": [PORTRAIT],
+    "seasons": [],
+    "lastEpisode": {"bohnen": {"33": PORTRAIT}, "episodes": [EPISODE]},
+}
+RESPONSES = {
+    "/v1/media/show/1": SHOW,
+    "/v1/cms/route/all": [{"route": "/", "page": "home"}],
+    "/v1/frontend/init": {"routes": [{"route": "/about", "page": "about"}]},
+    "/v1/bohne/portrait/33": PORTRAIT,
+}
+
+
+class EntityStoreTest(TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.store = EntityStore(clock=lambda: self.now)
+
+    def test_merge(self):
+        self.store.ingest("/v1/media/show/preview/mini/all", [{"id": 1, "title": "Old", "thumbnail": []}])
+        self.assertIsNone(self.store.get("show", 1, "preview"))
+        self.store.ingest("/v1/media/show/1", SHOW)
+
+        preview = self.store.get("show", 1, "preview")
+        self.assertEqual(preview["title"], "Pen & Paper")
+        self.assertTrue(preview["hasPodcast"])
+        self.assertNotIn("seasons", preview)
+        self.assertEqual(self.store.get("show", 1, "mini"), {"id": 1, "title": "Pen & Paper", "thumbnail": []})
+
+        # nested entities
+        self.assertEqual(self.store.get("bohne", 33, "portrait"), PORTRAIT)
+        self.assertEqual(self.store.get("episode", 7, "preview")["title"], "Folge 1")
+        self.assertEqual(self.store.get("episode", 6, "preview")["title"], "Folge 0")
+        self.assertIsNone(self.store.get("episode", 6, "full"))
+
+    def test_max_age(self):
+        self.store.ingest("/v1/bohne/portrait/all", [PORTRAIT])
+        self.now += 10
+        self.assertEqual(self.store.serve("/v1/bohne/portrait/all", 20), [PORTRAIT])
+        self.assertIsNone(self.store.serve("/v1/bohne/portrait/33", 5))
+        self.assertIsNone(self.store.serve("/v1/bohne/33", 20))
+
+    def test_invalidate(self):
+        self.store.ingest("/v1/media/show/1", SHOW)
+        self.store.ingest("/v1/cms/route/all", RESPONSES["/v1/cms/route/all"])
+        self.store.ingest("/v1/bohne/portrait/all", [PORTRAIT])
+
+        # not served by the store
+        self.assertEqual(self.store.invalidate("/v1/media/episode/preview/newest"), 0)
+        self.assertEqual(self.store.invalidate("/v1/media/show/2"), 0)
+
+        self.assertEqual(self.store.invalidate("/v1/bohne/portrait/all"), 1)
+        self.assertIsNone(self.store.serve("/v1/bohne/portrait/all", 20))
+        self.assertEqual(self.store.serve("/v1/bohne/portrait/33", 20), PORTRAIT)
+
+        self.assertEqual(self.store.invalidate("/v1/media/episode/preview/7"), 1)
+        self.assertIsNone(self.store.get("episode", 7, "preview"))
+        self.assertIsNotNone(self.store.get("episode", 6, "preview"))
+
+        self.assertEqual(self.store.invalidate("/v1/bohne/"), 1)
+        self.assertEqual(self.store.invalidate("/v1/media/"), 2)
+        self.assertEqual(len(self.store), 1)  # the route
+        self.assertEqual(self.store.invalidate("/v1/cms/"), 1)
+        self.assertIsNone(self.store.serve("/v1/cms/route/all", 20))
+        self.assertEqual(self.store.invalidate(), 1)
+        self.assertEqual(len(self.store), 0)
+
+    def test_copies(self):
+        self.store.ingest("/v1/bohne/portrait/33", PORTRAIT)
+        self.store.get("bohne", 33, "portrait")["images"].append(1)
+        self.assertEqual(self.store.get("bohne", 33, "portrait")["images"], [])
+
+
+class ApiStoreTest(TestCase):
+    def setUp(self):
+        self.api = API(store=EntityStore())
+        self.responses = dict(RESPONSES)
+        self.paths = []
+
+        def get(url, headers, timeout):
+            path = url.split("api.rocketbeans.tv", 1)[1].split("?", 1)[0]
+            self.paths.append(path)
+            return FakeResponse({"success": True, "data": self.responses[path]})
+
+        get_patch = patch.object(self.api.session, "get", get)
+        get_patch.start()
+        self.addCleanup(get_patch.stop)
+
+    def test_served_from_store(self):
+        self.api.get_show(1)
+        self.assertEqual(self.api.get_show_preview(1)["genre"], "Rollenspiel")
+        self.assertEqual(self.api.get_bohne_portrait(33), PORTRAIT)
+        episode = self.api.get_episode_preview(7)
+        self.assertEqual(episode["bohnen"], {"33": PORTRAIT})
+        self.assertEqual(episode["episodes"][0]["id"], 7)
+        self.assertNotIn("description", episode["episodes"][0])
+        self.assertEqual(self.paths, ["/v1/media/show/1"])
+        self.assertEqual([s.endpoint for s in self.api.metrics.stats() if s.network], ["/v1/media/show/{id}"])
+
+    def test_routes(self):
+        self.api.get_frontend_init_info()
+        self.assertEqual(self.api.get_cms_routes(), [{"route": "/about", "page": "about"}])
+        self.assertEqual(self.paths, ["/v1/frontend/init"])
+
+    def test_invalidate(self):
+        self.responses["/v1/bohne/portrait/all"] = [PORTRAIT]
+        self.api.get_bohnen_portraits()
+        self.api.get_bohnen_portraits()
+        self.api.invalidate("/v1/bohne/portrait/")
+        self.api.get_bohnen_portraits()
+        self.assertEqual(self.paths, ["/v1/bohne/portrait/all", "/v1/bohne/portrait/all"])
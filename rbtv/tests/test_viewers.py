@@ -0,0 +1,74 @@
+import time
+from unittest import TestCase
+
+from rbtv import API
+from rbtv.viewers import MISSING, RingBuffer, ViewerSampler
+
+
+class CountAPI(API):
+    def __init__(self, totals, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.totals = iter(totals)
+
+    def _request(self, path, refresh=False, **params):
+        url = self._url(path, params)
+        res, _ = (None, None) if refresh else self._cache_get(url)
+        if res is None:
+            total = next(self.totals)
+            data = {"youtube": total // 2, "twitch": total - total // 2, "total": total}
+            if total > 100:
+                data["external"] = [{"name": "extra", "url": "", "count": 7}]
+            res = {"success": True, "data": data}
+            self._cache_set(url, path, res)
+        return res
+
+
+class RingBufferTest(TestCase):
+    def test_wraparound(self):
+        buf = RingBuffer(4, ("a",))
+        for i in range(6):
+            buf.append(float(i), {"a": i})
+        self.assertEqual(len(buf), 4)
+        self.assertEqual(buf.times(), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(buf.column("a"), [2, 3, 4, 5])
+        self.assertEqual(buf.last(), (5.0, {"a": 5}))
+
+        buf.append(6.0, {"a": 6, "b": 1})
+        self.assertEqual(buf.column("b"), [MISSING, MISSING, MISSING, 1])
+
+    def test_downsample(self):
+        buf = RingBuffer(100, ("a",))
+        for i in range(30):
+            buf.append(float(i), {"a": i % 7} if i != 3 else {})
+        buckets = buf.downsample("a", 10)
+        self.assertEqual([b.start for b in buckets], [0.0, 10.0, 20.0])
+        self.assertEqual(buckets[0].count, 9)
+        self.assertEqual((buckets[0].min, buckets[0].max), (0, 6))
+        self.assertAlmostEqual(buckets[1].mean, sum(i % 7 for i in range(10, 20)) / 10)
+        self.assertEqual(len(buf.downsample("a", 10, since=25)), 1)
+
+
+class ViewerSamplerTest(TestCase):
+    def test_sample_bypasses_cache(self):
+        t = iter(range(100))
+        api = CountAPI([100, 100, 100, 150, 151])
+        sampler = ViewerSampler(api, min_interval=1, max_interval=8, clock=lambda: next(t))
+        intervals = []
+        for _ in range(5):
+            sampler.sample()
+            intervals.append(sampler.interval)
+
+        self.assertEqual([v for _, v in sampler.series("total")], [100, 100, 100, 150, 151])
+        self.assertEqual(intervals, [1, 2, 4, 1, 2])
+        self.assertEqual(sampler.series("external:extra")[-2:], [(3, 7), (4, 7)])
+        self.assertEqual(sampler.downsample("twitch", 10)[0].max, 76)
+
+        # the cache isn't invalidated, other callers get the last sampled count
+        self.assertEqual(api.get_viewer_count()["total"], 151)
+
+    def test_thread(self):
+        sampler = ViewerSampler(CountAPI([10] * 1000), min_interval=0.001, max_interval=0.002)
+        with sampler:
+            while len(sampler.buffer) < 3:
+                time.sleep(0.001)
+        self.assertIsNone(sampler._thread)
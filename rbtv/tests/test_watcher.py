@@ -0,0 +1,111 @@
+from unittest import TestCase
+
+from rbtv import API
+from rbtv.tests.test_cache import FakeResponse
+from rbtv.watcher import EpisodeWatcher, IdBitmap
+
+
+class NewestAPI(API):
+    """Serves `/v1/media/episode/preview/newest` from `episode_ids`, newest first."""
+
+    def __init__(self, episode_ids, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.episode_ids = episode_ids
+        self.requested = []
+
+    def _request(self, path, **params):
+        assert params["order"] == "DESC"
+        assert params["refresh"]  # the cache is bypassed, not invalidated
+        offset = params["offset"]
+        limit = params["limit"]
+        self.requested.append(offset)
+        episodes = [{"id": _id, "title": str(_id)} for _id in self.episode_ids[offset : offset + limit]]
+        return {
+            "success": True,
+            "data": {"bohnen": {}, "episodes": episodes},
+            "pagination": {"offset": offset, "limit": limit, "total": len(self.episode_ids)},
+        }
+
+
+class IdBitmapTest(TestCase):
+    def test_add(self):
+        bitmap = IdBitmap()
+        self.assertTrue(bitmap.add(1000))
+        self.assertFalse(bitmap.add(1000))
+        self.assertTrue(bitmap.add(3))
+        self.assertIn(3, bitmap)
+        self.assertNotIn(4, bitmap)
+        self.assertNotIn(10**9, bitmap)
+        self.assertEqual(len(bitmap), 2)
+        with self.assertRaises(ValueError):
+            bitmap.add(-1)
+
+        restored = IdBitmap(bitmap.to_bytes())
+        self.assertEqual(len(restored), 2)
+        self.assertIn(1000, restored)
+        self.assertEqual(len(bitmap.to_bytes()), 126)
+
+
+class EpisodeWatcherTest(TestCase):
+    def test_poll(self):
+        api = NewestAPI(list(range(200, 0, -1)))
+        watcher = EpisodeWatcher(api)
+
+        # the first poll records the newest page as baseline
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(api.requested, [0])
+
+        # steady state: a single request
+        api.requested.clear()
+        self.assertEqual(watcher.poll(), [])
+        self.assertEqual(api.requested, [0])
+
+        # 60 new episodes span two pages
+        api.requested.clear()
+        api.episode_ids = list(range(260, 200, -1)) + api.episode_ids
+        new = watcher.poll()
+        self.assertEqual([episode["id"] for episode in new], list(range(201, 261)))
+        self.assertEqual(api.requested, [0, 50])
+        self.assertEqual(watcher.poll(), [])
+
+    def test_backfill(self):
+        api = NewestAPI(list(range(120, 0, -1)))
+        watcher = EpisodeWatcher(api, baseline=False, max_pages=2)
+        self.assertEqual(len(watcher.poll()), 100)
+        self.assertEqual(api.requested, [0, 50])
+
+    def test_failed_poll(self):
+        api = NewestAPI(list(range(10, 0, -1)))
+        watcher = EpisodeWatcher(api, seen=IdBitmap())
+        watcher.poll()
+        api.episode_ids = [11] + api.episode_ids
+
+        request = api._request
+        api._request = lambda path, **params: 1 / 0
+        with self.assertRaises(ZeroDivisionError):
+            watcher.poll()
+        api._request = request
+        self.assertEqual([episode["id"] for episode in watcher.poll()], [11])
+
+    def test_cache_kept(self):
+        api = API()
+        ids = [3, 2, 1]
+        sent = []
+
+        def get(url, headers, timeout):
+            sent.append(url)
+            episodes = [{"id": _id} for _id in ids]
+            data = {"bohnen": {}, "episodes": episodes}
+            return FakeResponse({"success": True, "data": data, "pagination": {"total": len(ids)}})
+
+        api.session.get = get
+        next(api.get_newest_episodes_preview("DESC"))
+        watcher = EpisodeWatcher(api)
+        watcher.poll()
+        ids.insert(0, 4)
+        self.assertEqual([episode["id"] for episode in watcher.poll()], [4])
+        self.assertEqual(len(sent), 3)
+
+        # other callers are answered from the cache, which holds the refreshed page
+        self.assertEqual(len(next(api.get_newest_episodes_preview("DESC"))["episodes"]), 4)
+        self.assertEqual(len(sent), 3)
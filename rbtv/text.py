@@ -0,0 +1,27 @@
+"""Normalization of names and text for matching and searching."""
+
+import re
+
+alpha = re.compile("[^a-z]+")
+
+try:
+    from unidecode import unidecode
+
+    def asciifold(s: str) -> str:
+        """Transliterates `s` to lowercase ASCII."""
+
+        return unidecode(s).lower()
+
+except ImportError:
+    from unicodedata import normalize
+
+    def asciifold(s: str) -> str:
+        """Transliterates `s` to lowercase ASCII."""
+
+        return normalize("NFKD", s).casefold().encode("ascii", "ignore").decode("ascii")
+
+
+def alphastring(s: str) -> str:
+    """Returns only the lowercase ASCII letters of `s`, used to compare names."""
+
+    return alpha.sub("", asciifold(s))
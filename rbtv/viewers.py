@@ -0,0 +1,214 @@
+"""Background sampling of the live viewer count (`/v1/streamcount`) into a fixed-size time series."""
+
+import logging
+import threading
+from array import array
+from time import time
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .rbtv import API
+
+MISSING = -1
+
+
+class Bucket(NamedTuple):
+    start: float
+    count: int
+    min: int
+    max: int
+    mean: float
+
+
+class RingBuffer:
+    """Time series of integer columns with a fixed capacity, backed by typed arrays.
+    When the buffer is full, appending overwrites the oldest sample.
+    Columns can be added at any time, earlier samples of new columns are `MISSING`.
+    """
+
+    def __init__(self, capacity: int, columns: Iterable[str] = ()) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self._times = array("d", [0.0]) * capacity
+        self._columns: Dict[str, array] = {}
+        self._next = 0
+        self._len = 0
+        for name in columns:
+            self._add_column(name)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _add_column(self, name: str) -> array:
+        values = array("q", [MISSING]) * self.capacity
+        self._columns[name] = values
+        return values
+
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def append(self, timestamp: float, values: Dict[str, int]) -> None:
+        pos = self._next
+        self._times[pos] = timestamp
+        for name, column in self._columns.items():
+            column[pos] = values.get(name, MISSING)
+        for name in values.keys() - self._columns.keys():
+            self._add_column(name)[pos] = values[name]
+
+        self._next = (pos + 1) % self.capacity
+        self._len = min(self._len + 1, self.capacity)
+
+    def _positions(self) -> Iterator[int]:
+        """Yields the positions of all samples, oldest first."""
+
+        start = (self._next - self._len) % self.capacity
+        for i in range(self._len):
+            yield (start + i) % self.capacity
+
+    def times(self) -> List[float]:
+        return [self._times[pos] for pos in self._positions()]
+
+    def column(self, name: str) -> List[int]:
+        """Returns the values of column `name`, oldest first."""
+
+        values = self._columns[name]
+        return [values[pos] for pos in self._positions()]
+
+    def last(self) -> Optional[Tuple[float, Dict[str, int]]]:
+        if not self._len:
+            return None
+        pos = (self._next - 1) % self.capacity
+        return self._times[pos], {name: values[pos] for name, values in self._columns.items()}
+
+    def downsample(self, name: str, width: float, since: Optional[float] = None) -> List[Bucket]:
+        """Aggregates column `name` into buckets of `width` seconds (aligned to multiples of `width`)
+        and returns the minimum, maximum and mean of every non-empty bucket.
+        Missing values and samples older than `since` are ignored.
+        """
+
+        times = self._times
+        values = self._columns[name]
+        buckets: List[Bucket] = []
+
+        start = None
+        count = total = 0
+        lo = hi = 0
+        for pos in self._positions():
+            t = times[pos]
+            value = values[pos]
+            if value == MISSING or (since is not None and t < since):
+                continue
+            bucket_start = t - t % width
+            if bucket_start != start:
+                if count:
+                    buckets.append(Bucket(start, count, lo, hi, total / count))
+                start = bucket_start
+                count = total = 0
+                lo = hi = value
+            count += 1
+            total += value
+            lo = min(lo, value)
+            hi = max(hi, value)
+
+        if count:
+            buckets.append(Bucket(start, count, lo, hi, total / count))
+
+        return buckets
+
+
+class ViewerSampler:
+    """Polls the viewer count in a background thread and records it in a `RingBuffer`.
+
+    Columns are `youtube`, `twitch`, `total` and `external:<name>` for every external channel.
+    The polling interval adapts between `min_interval` and `max_interval`: it's reset to `min_interval`
+    when the total changes by more than `sensitivity` (relative), and doubled while it stays stable.
+    The default capacity holds one day of samples at the minimum interval.
+    """
+
+    def __init__(
+        self,
+        api: API,
+        capacity: int = 8640,
+        min_interval: float = 10.0,
+        max_interval: float = 120.0,
+        sensitivity: float = 0.05,
+        clock: Callable[[], float] = time,
+    ) -> None:
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Invalid polling intervals")
+
+        self.api = api
+        self.buffer = RingBuffer(capacity, ("youtube", "twitch", "total"))
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.sensitivity = sensitivity
+        self.interval = min_interval
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sample(self) -> Dict[str, int]:
+        """Requests the current viewer count, records it and adapts the polling interval."""
+
+        # bypasses the response cache, which would return the same count until the entry expires
+        count = self.api.get_viewer_count(refresh=True)
+
+        values = {key: count.get(key, MISSING) for key in ("youtube", "twitch", "total")}
+        for channel in count.get("external") or ():
+            values[f"external:{channel['name']}"] = channel["count"]
+
+        with self.lock:
+            last = self.buffer.last()
+            self.buffer.append(self.clock(), values)
+
+        previous = last[1]["total"] if last is not None else MISSING
+        if previous == MISSING or abs(values["total"] - previous) > self.sensitivity * max(previous, 1):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+
+        return values
+
+    def downsample(self, name: str, width: float, since: Optional[float] = None) -> List[Bucket]:
+        """Thread-safe version of `RingBuffer.downsample`."""
+
+        with self.lock:
+            return self.buffer.downsample(name, width, since)
+
+    def series(self, name: str) -> List[Tuple[float, int]]:
+        """Returns all `(timestamp, value)` samples of column `name`, oldest first."""
+
+        with self.lock:
+            return list(zip(self.buffer.times(), self.buffer.column(name)))
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception:
+                logging.exception("Sampling the viewer count failed")
+                self.interval = self.max_interval
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            raise RuntimeError("Sampler is already running")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ViewerSampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "ViewerSampler":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
@@ -0,0 +1,123 @@
+"""Detection of newly published episodes."""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Iterator, List, Optional, Set
+
+from .rbtv import API
+
+if TYPE_CHECKING:
+    from .types import mediaEpisodePreview
+
+
+class IdBitmap:
+    """Set of non-negative integer ids with one bit per id up to the largest one.
+    Episode ids are dense, so this needs much less memory than a set (about 12 KiB per 100000 ids)
+    and never gives false positives like a Bloom filter. Use `to_bytes()` to persist it.
+    """
+
+    def __init__(self, data: bytes = b"") -> None:
+        self._bits = bytearray(data)
+        self._count = sum(bin(byte).count("1") for byte in self._bits)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, _id: int) -> bool:
+        i, bit = divmod(_id, 8)
+        return 0 <= i < len(self._bits) and bool(self._bits[i] & (1 << bit))
+
+    def add(self, _id: int) -> bool:
+        """Adds `_id` and returns True if it wasn't contained before."""
+
+        if _id < 0:
+            raise ValueError(f"Invalid id: {_id}")
+
+        i, bit = divmod(_id, 8)
+        if i >= len(self._bits):
+            self._bits.extend(bytes(max(i + 1 - len(self._bits), len(self._bits) // 2)))
+        if self._bits[i] & (1 << bit):
+            return False
+        self._bits[i] |= 1 << bit
+        self._count += 1
+        return True
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._bits).rstrip(b"\0")
+
+
+class EpisodeWatcher:
+    """Finds new episodes by paging `get_newest_episodes_preview` newest first.
+
+    Paging stops after the first page which contains an episode that was already seen,
+    so a poll without new episodes costs a single request. Seen ids are kept in `seen`.
+    If it is empty and `baseline` is true, the first poll only records the newest page
+    instead of returning the whole back catalogue. `max_pages` limits the number of pages per poll.
+    Pages are requested with `refresh=True`, so cached pages are neither used nor evicted.
+    `workers` is the number of pages requested concurrently (the client's `page_workers` if None).
+    With more than one, pages after the stopping page may be requested in vain.
+    """
+
+    def __init__(
+        self,
+        api: API,
+        seen: Optional[IdBitmap] = None,
+        baseline: bool = True,
+        max_pages: Optional[int] = None,
+        workers: Optional[int] = 1,
+    ) -> None:
+        self.api = api
+        self.seen = IdBitmap() if seen is None else seen
+        self.baseline = baseline
+        self.max_pages = max_pages
+        self.workers = workers
+        self.requests = 0
+
+        self._stop = threading.Event()
+
+    def poll(self) -> List["mediaEpisodePreview"]:
+        """Returns the episodes published since the last poll, oldest first."""
+
+        record_only = self.baseline and len(self.seen) == 0
+
+        new: List["mediaEpisodePreview"] = []
+        ids: Set[int] = set()
+        # the response cache would return the same page until the entry expires
+        pages = self.api.get_newest_episodes_preview("DESC", workers=self.workers, refresh=True)
+        for num, page in enumerate(pages, 1):
+            self.requests += 1
+            reached = False
+            for episode in page["episodes"]:
+                _id = int(episode["id"])
+                if _id in self.seen:
+                    reached = True
+                elif _id not in ids:
+                    ids.add(_id)
+                    new.append(episode)
+            if reached or record_only or (self.max_pages is not None and num >= self.max_pages):
+                break
+
+        # only marked as seen after the poll succeeded, so nothing is lost if a request fails
+        for _id in ids:
+            self.seen.add(_id)
+
+        if record_only:
+            return []
+        new.reverse()
+        return new
+
+    def watch(self, interval: float = 60.0) -> Iterator["mediaEpisodePreview"]:
+        """Polls every `interval` seconds and yields new episodes until `stop()` is called.
+        Failed polls are logged and retried at the next interval.
+        """
+
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                yield from self.poll()
+            except Exception:
+                logging.exception("Polling the newest episodes failed")
+            self._stop.wait(interval)
+
+    def stop(self) -> None:
+        self._stop.set()